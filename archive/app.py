@@ -1,24 +1,28 @@
 import streamlit as st
 import re
 import logging
-import pytesseract
-from pdf2image import convert_from_bytes
-import io
 import tempfile
 import os
-import httpx
 import json
 from pathlib import Path
 from datetime import datetime
-import PyPDF2
-import pandas as pd
-from parsers.at_codes import interpret_transaction
-from utils.api_client import render_client_profile_tab
+from parsers.at_codes import CATALOG as CODE_CATALOG
+from parsers.at_parser import parse_at_transcript
+from parsers.wi_parser import iter_wi_texts, parse_wi_forms, parse_wi_header
+from utils.form_dedup import dedupe_wi_data
+from utils.pdf_extract import get_extraction_router
 from utils.tp_s_parser import TPSParser
+from utils.case_store import get_case_store
+from utils.run_log import capture_run_log, log_text_ref
+from utils.text_cache import get_text_cache
+from utils.artifact_store import get_artifact_store
+from utils.money import parse_cents, to_cents, to_dollars
+from utils.progress import (
+    ProgressBus, open_run, close_run, document_fraction, describe_event,
+    STAGE_LISTED, STAGE_DOWNLOADING, STAGE_EXTRACTING, STAGE_PARSING, STAGE_DONE, STAGE_FAILED
+)
 from collections import defaultdict
-from io import BytesIO
 import time
-from playwright.sync_api import sync_playwright
 import sys
 import subprocess
 
@@ -31,11 +35,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Load full form_patterns (paste your complete form_patterns JSON here)
-from full_form_patterns import form_patterns  # make sure this file exists!
+# Heavy dependencies (pandas, httpx, PDF/OCR engines, Playwright, the form
+# pattern table) are imported inside the functions that use them so a page
+# only pays for what it renders; see benchmarks/import_time.py
 
 COOKIE_FILE = "tps_cookies.json"
 
+def spill_artifact(key, value):
+    """Store a large artifact on disk and keep only its handle in session state"""
+    store = get_artifact_store()
+    if 'artifact_session' not in st.session_state:
+        st.session_state['artifact_session'] = store.new_session_id()
+    try:
+        st.session_state[key] = store.put(st.session_state['artifact_session'], key, value)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not store {key}: {e}")
+        st.session_state[key] = None
+
+def load_artifact(key, default=None):
+    """Load an artifact spilled with spill_artifact (default if missing or evicted)"""
+    return get_artifact_store().get(st.session_state.get(key), default)
+
+def get_wi_cube():
+    """Aggregation cube for the current case's wi_data (built once, then sliced)"""
+    from utils.wi_cube import WICube
+    if st.session_state.get('wi_cube') is None:
+        st.session_state['wi_cube'] = WICube.from_wi_data(st.session_state.get('wi_data') or {})
+    return st.session_state['wi_cube']
+
 def load_cookies_from_file():
     """Load cookies from the logiqs-cookies.json file (matching JS format)"""
     cookie_files = ["logiqs-cookies.json", "tps_cookies.json"]  # Try both formats
@@ -93,6 +120,7 @@ def get_wi_files(case_id: str) -> list:
     """
     Get list of WI files associated with a case.
     """
+    import httpx
     cookies, user_agent, message = load_cookies_from_file()
     if not cookies:
         st.error("Authentication required. Please ensure cookies are valid.")
@@ -165,6 +193,7 @@ def download_file(case_doc_id: str, case_id: str) -> bytes:
     """
     Download a file using the case document ID and case ID.
     """
+    import httpx
     cookies, user_agent, message = load_cookies_from_file()
     if not cookies:
         st.error("Authentication required. Please ensure cookies are valid.")
@@ -192,343 +221,34 @@ def download_file(case_doc_id: str, case_id: str) -> bytes:
         return None
 
 def to_float(val):
-    try:
-        return float(val.replace(',', ''))
-    except:
-        return 0.0
-
-def extract_text_from_pdf(pdf_bytes):
-    """Extract text from PDF bytes using PyPDF2, then pdfplumber, then OCR as fallback."""
-    import PyPDF2
-    import pytesseract
-    from pdf2image import convert_from_bytes
-    import re
-    text = ""
-    used_method = None
-
-    def is_text_readable(text):
-        if not text or len(text) < 100:
-            return False
-        # Too many (cid:xx) patterns = garbage
-        if len(re.findall(r'\(cid:\d+\)', text)) > 10:
-            return False
-        # Too many non-ASCII or non-printable chars
-        ascii_ratio = sum(32 <= ord(c) < 127 for c in text) / len(text)
-        if ascii_ratio < 0.7:
-            return False
-        # At least 20% letters, at least 10 spaces per 1000 chars
-        letter_ratio = sum(c.isalpha() for c in text) / len(text)
-        space_ratio = text.count(' ') / max(1, len(text))
-        return letter_ratio > 0.2 and space_ratio > 0.01
-
-    # Try PyPDF2 first
-    try:
-        reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
-        page_texts = []
-        for page in reader.pages:
-            page_text = page.extract_text() or ""
-            page_texts.append(page_text)
-        text = "\n".join(page_texts)
-        if is_text_readable(text):
-            used_method = "PyPDF2"
-            logger.info("Successfully extracted text using PyPDF2")
-            return text
-        else:
-            logger.warning("PyPDF2 extraction unreadable, will try fallback.")
-    except Exception as e:
-        logger.warning(f"PyPDF2 failed: {e}")
-
-    # Try pdfplumber next
-    try:
-        import pdfplumber
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-            page_texts = []
-            for page in pdf.pages:
-                page_text = page.extract_text() or ""
-                page_texts.append(page_text)
-            text = "\n".join(page_texts)
-        if is_text_readable(text):
-            used_method = "pdfplumber"
-            logger.info("Successfully extracted text using pdfplumber")
-            return text
-        else:
-            logger.warning("pdfplumber extraction unreadable, will try OCR fallback.")
-    except Exception as e:
-        logger.warning(f"pdfplumber failed: {e}")
-
-    # OCR fallback
-    try:
-        images = convert_from_bytes(pdf_bytes)
-        ocr_text = "\n".join(pytesseract.image_to_string(img) for img in images)
-        if is_text_readable(ocr_text):
-            used_method = "OCR"
-            logger.info("Successfully extracted text using OCR fallback")
-            return ocr_text
-        else:
-            logger.warning("OCR extraction also unreadable.")
-    except Exception as e:
-        logger.warning(f"OCR fallback failed: {e}")
-
-    logger.warning("Could not extract readable text from PDF with any method.")
-    return ""
+    """Amount string -> dollars, parsed exactly to the cent (0.0 if not an amount)"""
+    return to_dollars(to_cents(val))
+
+def extract_text_from_pdf(pdf_bytes, on_page=None):
+    """Extract text from PDF bytes with the engine that works for the PDF's producer.
+
+    Engines (pypdf, pdfplumber, OCR) are tried in the order the extraction
+    router learned for the PDF's Producer/Creator fingerprint (see
+    utils/pdf_extract.py); the first readable result wins. If `on_page` is
+    given it is called as on_page(engine, page, pages) after each page is
+    processed so callers can report per-page progress. Pages are joined with
+    PAGE_BREAK so repeated page headers can be found (parsers.boilerplate).
+    """
+    return get_extraction_router().extract(pdf_bytes, on_page)['text']
 
 def extract_header_info(text):
     """Extract header information from text"""
-    logger.info("Extracting header information")
-    
-    # Updated SSN pattern to match "SSN Provided: XXX-XX-XXXX"
-    ssn_match = re.search(r'SSN\s+Provided:\s*([\d\-Xx]{9,})', text, re.IGNORECASE)
-    ssn = ssn_match.group(1) if ssn_match else 'UNKNOWN'
-    
-    # Updated tax period pattern to match "Tax Period Requested: Month, YYYY"
-    tax_period_matches = re.findall(r'Tax\s+Period\s+Requested:\s*([A-Za-z]+),\s*(\d{4})', text, re.IGNORECASE)
-    tax_periods = [f"{month} {year}" for month, year in tax_period_matches]
-    tax_year = int(tax_period_matches[0][1]) if tax_period_matches else 0
-    
-    logger.info(f"Found SSN: {ssn} | Tax Periods: {', '.join(tax_periods)}")
-    
-    return ssn, tax_periods, tax_year
+    return parse_wi_header(text, log=logger)
 
-def extract_form_data(text, form_patterns, tax_year, filing_status='Single', combined_income=0, output_buffer=None, filename=None):
+def extract_form_data(text, form_patterns, tax_year, filing_status='Single', output_buffer=None, filename=None):
     """Extract form data from text using patterns"""
-    results = {}
-    def write_out(msg):
-        logger.info(msg)
-        if output_buffer:
-            output_buffer.write(msg + "\n")
-    write_out("Starting form pattern matching")
-    form_like_sections = []
-    for match in re.finditer(r'(^|\n)\s*Form [A-Z0-9\-]+', text, re.IGNORECASE):
-        form_str = match.group(0).strip()
-        line_start = text.rfind('\n', 0, match.start()) + 1
-        line_end = text.find('\n', match.end())
-        if line_end == -1:
-            line_end = len(text)
-        line = text[line_start:line_end].strip()
-        if re.search(r'check box|applicable|transactions that do not flow|indicator', line, re.IGNORECASE):
-            continue
-        form_like_sections.append((form_str, match.start(), match.end()))
-    for form_name, pattern_info in form_patterns.items():
-        write_out(f"Processing form: {form_name}")
-        matches = list(re.finditer(pattern_info['pattern'], text, re.MULTILINE))
-        if not matches:
-            write_out(f"Form {form_name}: No pattern match found")
-            continue
-        for idx, match in enumerate(matches):
-            start = match.start()
-            end = matches[idx + 1].start() if idx + 1 < len(matches) else len(text)
-            form_text = text[start:end]
-            # Extract unique identifiers
-            unique_id = None
-            unique_label = None
-            payer_blurb = None
-            # Improved: Only grab the FIN line and next 1-3 lines (payer name/address), stop at Recipient: or blank
-            fin_line_idx = None
-            lines = form_text.splitlines()
-            for i, line in enumerate(lines):
-                if "Payer's Federal Identification Number (FIN):" in line:
-                    fin_line_idx = i
-                    break
-            if fin_line_idx is not None:
-                blurb_lines = [lines[fin_line_idx]]
-                for j in range(fin_line_idx + 1, min(fin_line_idx + 4, len(lines))):
-                    next_line = lines[j].strip()
-                    if not next_line or next_line.startswith('Recipient:'):
-                        break
-                    blurb_lines.append(next_line)
-                payer_blurb = '\n'.join(blurb_lines).strip()
-            if not payer_blurb:
-                # Fallback: try to grab lines after 'Payer:' up to 3 lines
-                for i, line in enumerate(lines):
-                    if 'Payer:' in line:
-                        blurb_lines = [line.strip()]
-                        for j in range(i + 1, min(i + 4, len(lines))):
-                            next_line = lines[j].strip()
-                            if not next_line or next_line.startswith('Recipient:'):
-                                break
-                            blurb_lines.append(next_line)
-                        payer_blurb = '\n'.join(blurb_lines).strip()
-                        break
-            if form_name == 'W-2':
-                ein_match = re.search(r'Employer Identification Number \(EIN\):\s*([\d\-]+)', form_text)
-                unique_id = ein_match.group(1) if ein_match else 'UNKNOWN'
-                employer_match = re.search(r'Employer:\s*([A-Z0-9 &.,\-]+)', form_text)
-                unique_label = employer_match.group(1).strip() if employer_match else 'UNKNOWN'
-            elif form_name == '1099-INT':
-                fin_match = re.search(r"Payer's Federal Identification Number \(FIN\):\s*([\d\-]+)", form_text)
-                unique_id = fin_match.group(1) if fin_match else 'UNKNOWN'
-                payer_match = re.search(r'Payer:\s*([A-Z0-9 &.,\-]+)', form_text)
-                unique_label = payer_match.group(1).strip() if payer_match else 'UNKNOWN'
-            elif form_name.startswith('1099'):
-                payer_match = re.search(r'Payer:\s*([A-Z0-9 &.,\-]+)', form_text)
-                unique_label = payer_match.group(1).strip() if payer_match else None
-            if form_name == 'W-2':
-                label_str = f" (EIN: {unique_id}, Employer: {unique_label})"
-            elif form_name == '1099-INT':
-                label_str = f" (FIN: {unique_id}, Payer: {unique_label})"
-            elif form_name.startswith('1099') and unique_label:
-                label_str = f", Payer: {unique_label}"
-            else:
-                label_str = ""
-            write_out(f"Form {form_name} #{idx+1}{label_str}:")
-            write_out("Pattern matched successfully")
-            write_out(f"Using tax year {tax_year}")
-            fields_data = {}
-            write_out("Starting field extraction")
-            for field_name, regex in pattern_info['fields'].items():
-                if regex:
-                    if field_name == 'TY Payments':
-                        all_ty = re.findall(regex, form_text, re.IGNORECASE)
-                        if all_ty:
-                            fields_data[field_name] = all_ty
-                            write_out(f"Field {field_name} = {all_ty}")
-                        else:
-                            write_out(f"Field {field_name} - No match found (Regex: {regex})")
-                            write_out(f"Raw snippet: {form_text[:200]}...")
-                    else:
-                        field_match = re.search(regex, form_text, re.IGNORECASE)
-                        if field_match:
-                            value = to_float(field_match.group(1))
-                            fields_data[field_name] = value
-                            write_out(f"Field {field_name} = {value}")
-                            write_out(f"Matched text for {field_name}: {field_match.group(0)}")
-                        else:
-                            write_out(f"Field {field_name} - No match found (Regex: {regex})")
-                            write_out(f"Raw snippet: {form_text[:200]}...")
-            write_out(f"All extracted fields for {form_name}: {fields_data}")
-            if not fields_data:
-                write_out(f"Form {form_name} matched but no fields were captured. Fields attempted: {list(pattern_info['fields'].keys())}")
-                write_out(f"Raw form text snippet: {form_text[:300]}...")
-                continue
-            calc = pattern_info['calculation']
-            try:
-                if 'filing_status' in calc['Income'].__code__.co_varnames:
-                    income = calc['Income'](fields_data, filing_status, combined_income)
-                    write_out(f"Income calculation for {form_name}: fields={fields_data}, filing_status={filing_status}, combined_income={combined_income} => {income}")
-                else:
-                    income = calc['Income'](fields_data)
-                    write_out(f"Income calculation for {form_name}: fields={fields_data} => {income}")
-            except Exception as e:
-                income = 0
-                write_out(f"ERROR: Income calculation for {form_name} failed: {e}")
-            try:
-                withholding = calc['Withholding'](fields_data) if callable(calc.get('Withholding')) else 0
-                write_out(f"Withholding calculation for {form_name}: fields={fields_data} => {withholding}")
-            except Exception as e:
-                withholding = 0
-                write_out(f"ERROR: Withholding calculation for {form_name} failed: {e}")
-            category = pattern_info.get('category', 'Neither')
-            write_out(f"Calculated values - Income: {income}, Withholding: {withholding}, Category: {category}")
-            if tax_year not in results:
-                results[tax_year] = []
-            results[tax_year].append({
-                'Form': form_name,
-                'UniqueID': unique_id if unique_id else None,
-                'Label': unique_label if unique_label else None,
-                'Income': income,
-                'Withholding': withholding,
-                'Category': category,
-                'Fields': fields_data,
-                'PayerBlurb': payer_blurb
-            })
-    matched_spans = []
-    for form_name, pattern_info in form_patterns.items():
-        for m in re.finditer(pattern_info['pattern'], text, re.MULTILINE):
-            matched_spans.append((m.start(), m.end()))
-    for form_label, start, end in form_like_sections:
-        if not any(ms <= start < me for ms, me in matched_spans):
-            snippet = text[start-30:end+70] if start > 30 else text[start:end+70]
-            fname = filename if filename else "UNKNOWN"
-            write_out(f"Potential form detected in text but no pattern matched: '{form_label}' at position {start}. [FILENAME: {fname}] Snippet: {snippet}")
-    write_out("Form processing completed")
-    return results
-
-def get_transaction_alerts(transactions):
-    """Get alerts for important transaction codes that require attention"""
-    alerts = []
-    
-    # Define alert categories and their associated codes
-    alert_categories = {
-        'Audit Alerts': {
-            'codes': ['420', '424', '430'],
-            'severity': 'error',
-            'icon': '🔍'
-        },
-        'Collection Alerts': {
-            'codes': ['520', '530', '780'],
-            'severity': 'error',
-            'icon': '⚠️'
-        },
-        'Additional Tax Assessments': {
-            'codes': ['290', '300'],
-            'severity': 'error',
-            'icon': '💸'
-        },
-        'Payment Issues': {
-            'codes': ['706', '898'],
-            'severity': 'warning',
-            'icon': '💰'
-        },
-        'Account Holds': {
-            'codes': ['570', '810'],
-            'severity': 'warning',
-            'icon': '🔒'
-        },
-        'Refund Issues': {
-            'codes': ['846', '811'],
-            'severity': 'warning',
-            'icon': '💳'
-        },
-        'Amended Returns': {
-            'codes': ['320'],
-            'severity': 'info',
-            'icon': '📝'
-        },
-        'Resolution Programs': {
-            'codes': ['480', '482'],
-            'severity': 'info',
-            'icon': '✅'
-        },
-        'Bankruptcy': {
-            'codes': ['780'],
-            'severity': 'error',
-            'icon': '🏛️'
-        },
-        'Extensions': {
-            'codes': ['460'],
-            'severity': 'info',
-            'icon': '⏰'
-        },
-        'Substitute Returns': {
-            'codes': ['599'],
-            'severity': 'warning',
-            'icon': '📋'
-        },
-        'Litigation/Freezes': {
-            'codes': ['520', '571'],
-            'severity': 'warning',
-            'icon': '⚖️'
-        }
-    }
-    
-    for trans in transactions:
-        code = trans.get('code')
-        for category, info in alert_categories.items():
-            if code in info['codes']:
-                alert = {
-                    'category': category,
-                    'severity': info['severity'],
-                    'icon': info['icon'],
-                    'code': code,
-                    'meaning': trans.get('meaning', ''),
-                    'date': trans.get('date', ''),
-                    'description': trans.get('description', ''),
-                    'amount': trans.get('amount', 0),
-                    'tax_year': trans.get('tax_year', '')
-                }
-                alerts.append(alert)
-    
-    return alerts
+    return parse_wi_forms(text, form_patterns, tax_year, filing_status=filing_status,
+                          output_buffer=output_buffer, filename=filename, log=logger)
+
+def get_transaction_alerts(at_data):
+    """Get alerts for important transaction codes that require attention (tax year from each record)"""
+    from utils.at_columns import ATColumns
+    return ATColumns.from_records(at_data).alerts()
 
 def display_alerts(alerts):
     """Display alerts in a formatted way"""
@@ -557,6 +277,22 @@ def display_alerts(alerts):
             Amount: ${alert['amount']:,.2f}
             """)
 
+def render_progress(progress, doc_type, files):
+    """Drive a Streamlit progress bar and status line from a ProgressBus"""
+    progress_bar = st.progress(0.0)
+    status = st.empty()
+    fractions = {f['FileName']: 0.0 for f in files}
+    total = max(1, len(fractions))
+
+    def on_event(event):
+        if event.get('doc_type') != doc_type or event.get('filename') not in fractions:
+            return
+        fractions[event['filename']] = document_fraction(event)
+        progress_bar.progress(min(1.0, sum(fractions.values()) / total))
+        status.text(describe_event(event))
+
+    progress.subscribe(on_event)
+
 def render_home():
     """Render the home page with case number input"""
     st.title("IRS Transcript Parser")
@@ -584,17 +320,48 @@ def render_home():
     
     if case_id:
         # Clear previous session data if case ID changes
-        if st.session_state.get('case_id') != case_id:
+        case_changed = st.session_state.get('case_id') != case_id
+        if case_changed:
             for key in ['wi_data', 'wi_form_matching', 'wi_summary', 'wi_projection', 'wi_log',
-                       'at_data', 'at_form_matching', 'at_summary', 'at_projection', 'at_log']:
+                       'at_data', 'at_form_matching', 'at_summary', 'at_projection', 'at_log',
+                       'at_alerts', 'wi_texts', 'case_stored_at', 'wi_cube', 'wi_pattern_hash', 'wi_form_hashes',
+                       'wi_filing_status', 'wi_text_keys', 'at_pattern_hash', 'at_text_keys', 'wi_duplicates']:
                 if key in st.session_state:
                     del st.session_state[key]
         
         st.session_state['case_id'] = case_id
         st.success(f"✅ Case ID set to: {case_id}")
         
+        # Re-open previously processed cases from the local case store
+        case_store = get_case_store()
+        if case_changed or 'case_stored_at' not in st.session_state:
+            stored = case_store.load_case(case_id)
+            if stored:
+                for key in ['wi_data', 'at_data', 'wi_summary', 'wi_projection', 'at_alerts', 'wi_form_matching']:
+                    st.session_state[key] = stored[key]
+                st.session_state['wi_cube'] = None
+                st.session_state['wi_pattern_hash'] = stored['pattern_hash']
+                st.session_state['wi_form_hashes'] = stored['form_hashes']
+                st.session_state['wi_filing_status'] = stored['wi_filing_status']
+                st.session_state['at_pattern_hash'] = stored['at_pattern_hash']
+                st.session_state['wi_text_keys'] = stored['text_keys'].get('WI', {})
+                st.session_state['at_text_keys'] = stored['text_keys'].get('AT', {})
+                st.session_state['case_stored_at'] = stored['updated_at']
+        reprocess = False
+        if 'case_stored_at' in st.session_state:
+            st.info(f"📂 Showing stored results (last processed {st.session_state['case_stored_at']})")
+            if st.session_state.get('wi_data'):
+                from parsers.pattern_bundle import get_pattern_bundle
+                changed = get_pattern_bundle().changed_forms(st.session_state.get('wi_form_hashes'))
+                if changed:
+                    st.warning(f"Form patterns changed since these results were parsed ({', '.join(changed[:8])}"
+                               f"{', ...' if len(changed) > 8 else ''}); re-parse or reprocess to apply them.")
+                    if st.button("♻️ Re-parse from cached text"):
+                        render_reparse(case_id, case_store)
+            reprocess = st.button("🔄 Reprocess documents")
+        
         # Document type detection
-        if cookies:  # Only try to detect documents if we have cookies
+        if cookies and ('case_stored_at' not in st.session_state or reprocess):  # Only try to detect documents if we have cookies
             with st.spinner("🔍 Fetching all available documents..."):
                 wi_files = get_wi_files(case_id)
                 at_files = get_at_files(case_id)
@@ -609,19 +376,49 @@ def render_home():
                 st.write("📋 **Record of Account:**", len(roa_files))
                 st.write("📝 **Tax Return Transcripts:**", len(trt_files))
             
-            # Process WI documents if available
-            if wi_files:
-                process_wi_documents(case_id, wi_files)
-                st.success("✅ Wage & Income documents processed successfully")
+            # One progress run per case load (utils.progress.get_run(run_id)
+            # finds it again)
+            run_id = f"{case_id}-{int(time.time())}"
+            st.session_state['progress_run_id'] = run_id
+            progress = open_run(run_id)
+            try:
+                # Process AT documents first: they are text PDFs and finish
+                # quickly, so alerts are reviewable while WI OCR is running
+                if at_files:
+                    process_at_documents(case_id, at_files, progress=progress)
+                    st.success("✅ Account Transcript documents processed successfully")
+                    if st.session_state.get('at_alerts'):
+                        with st.expander("🚨 Account alerts (available now)", expanded=True):
+                            display_alerts(list(st.session_state['at_alerts']))
+                
+                # Process WI documents if available
+                if wi_files:
+                    process_wi_documents(case_id, wi_files, progress=progress)
+                    st.success("✅ Wage & Income documents processed successfully")
+            finally:
+                close_run(run_id)
             
-            # Process AT documents if available
-            if at_files:
-                process_at_documents(case_id, at_files)
-                st.success("✅ Account Transcript documents processed successfully")
+            if wi_files or at_files:
+                case_store.save_case(
+                    case_id,
+                    wi_data=st.session_state.get('wi_data'),
+                    at_data=st.session_state.get('at_data'),
+                    wi_summary=st.session_state.get('wi_summary'),
+                    wi_projection=st.session_state.get('wi_projection'),
+                    at_alerts=st.session_state.get('at_alerts'),
+                    wi_form_matching=st.session_state.get('wi_form_matching'),
+                    pattern_hash=st.session_state.get('wi_pattern_hash'),
+                    form_hashes=st.session_state.get('wi_form_hashes'),
+                    at_pattern_hash=st.session_state.get('at_pattern_hash'),
+                    wi_filing_status=st.session_state.get('wi_filing_status'),
+                    text_keys={'WI': st.session_state.get('wi_text_keys') or {},
+                               'AT': st.session_state.get('at_text_keys') or {}}
+                )
+                st.session_state['case_stored_at'] = datetime.now().isoformat()
             
             if not any([wi_files, at_files, roa_files, trt_files]):
                 st.warning("No documents found for this case ID")
-        else:
+        elif not cookies:
             st.info("Please ensure you have valid cookies before checking for documents.")
 
     # After this line:
@@ -629,171 +426,178 @@ def render_home():
     # Add this:
     st.session_state['wi_files'] = wi_files
 
-def process_wi_documents(case_id, wi_files):
-    """Process all WI documents once and store results"""
+def render_reparse(case_id, case_store):
+    """Re-parse the stored case over its cached texts and show what changed"""
+    import pandas as pd
+    from utils.reparse import reparse_case, save_reparsed
+    stored = case_store.load_case(case_id)
+    if not stored:
+        return
+    with st.spinner("Re-parsing cached text..."):
+        result = reparse_case(stored)
+    save_reparsed(case_store, case_id, stored, result)
+    for key in ['wi_data', 'wi_summary', 'wi_projection', 'at_data', 'at_alerts', 'wi_duplicates']:
+        st.session_state[key] = result[key]
+    st.session_state['wi_cube'] = None
+    st.session_state['wi_pattern_hash'] = result['pattern_hash']
+    st.session_state['wi_form_hashes'] = result['form_hashes']
+    st.session_state['at_pattern_hash'] = result['at_pattern_hash']
+    st.session_state['case_stored_at'] = datetime.now().isoformat()
+
+    reparsed = result['reparsed_files']
+    st.success(f"Re-parsed {len(reparsed['WI'])} WI and {len(reparsed['AT'])} AT files "
+               f"for {len(result['changed_forms'])} changed form patterns")
+    missing = result['missing_texts']['WI'] + result['missing_texts']['AT']
+    if missing:
+        st.warning(f"No cached text for {len(missing)} files (kept as stored; reprocess to refresh): {', '.join(missing)}")
+    if result['total_changes']:
+        st.dataframe(pd.DataFrame(result['total_changes']), use_container_width=True)
+    if result['form_changes']:
+        st.dataframe(pd.DataFrame(result['form_changes']), use_container_width=True)
+    if result['at_changed_files']:
+        st.info(f"AT records changed: {', '.join(result['at_changed_files'])}")
+    if not (result['total_changes'] or result['form_changes'] or result['at_changed_files']):
+        st.info("No results changed.")
+
+def process_wi_documents(case_id, wi_files, progress=None):
+    """Process all WI documents once and store results
+
+    Stage events for every file are published on `progress` (a ProgressBus);
+    a private bus is used when none is given so the progress bar still works.
+    """
+    from parsers.pattern_bundle import get_pattern_bundle
+    bundle = get_pattern_bundle()
+    form_patterns = bundle.form_patterns
     all_data = {}
     form_matching_results = []  # Track form matching results
-    
-    # Set up logging
-    log_buffer = io.StringIO()
-    log_handler = logging.StreamHandler(log_buffer)
-    log_handler.setLevel(logging.INFO)
-    logger.addHandler(log_handler)
-    
-    with st.spinner("Processing Wage & Income documents..."):
-        progress_bar = st.progress(0)
-        total_files = len(wi_files)
-        wi_texts = {}  # Store extracted text by filename
-        for idx, wi_file in enumerate(wi_files):
-            logger.info(f"\n{'='*50}")
-            logger.info(f"Processing file: {wi_file['FileName']}")
-            logger.info(f"{'='*50}\n")
+    # Filing status from the client profile (if available) drives the SSA-1099 calculation
+    client_data = st.session_state.get('client_data') or st.session_state.get('client_profile_data')
+    marital_status = 'Single'
+    if client_data:
+        marital_status = client_data.get('client_info', {}).get('marital_status', 'Single')
+    if progress is None:
+        progress = ProgressBus(str(case_id))
+    render_progress(progress, 'WI', wi_files)
+    for wi_file in wi_files:
+        progress.publish('WI', wi_file['FileName'], STAGE_LISTED)
+    
+    with capture_run_log(logger) as run_log:
+        with st.spinner("Processing Wage & Income documents..."):
+            wi_texts = {}  # Store extracted text by filename
+            wi_text_keys = {}  # Text cache key by filename, stored with the case for re-parsing
+            normalized_texts = {}  # Normalized text by filename, as each file is extracted
+            owners = {}
+
+            def extracted_texts():
+                """Download and extract the files one by one (read lazily by iter_wi_texts)"""
+                for wi_file in wi_files:
+                    filename = wi_file['FileName']
+                    logger.info(f"\n{'='*50}")
+                    logger.info(f"Processing file: {filename}")
+                    logger.info(f"{'='*50}\n")
             
-            # Extract owner from filename using TPSParser
-            owner = TPSParser.extract_owner_from_filename(wi_file['FileName'])
-            logger.info(f"Extracted owner from filename '{wi_file['FileName']}': {owner}")
+                    # Extract owner from filename using TPSParser
+                    owner = owners[filename] = TPSParser.extract_owner_from_filename(filename)
+                    logger.info(f"Extracted owner from filename '{filename}': {owner}")
             
-            pdf_bytes = download_file(wi_file["CaseDocumentID"], case_id)
-            if pdf_bytes:
-                text = extract_text_from_pdf(pdf_bytes)
-                if text:
-                    wi_texts[wi_file['FileName']] = text
-                    # Log the complete raw text
-                    logger.info("Complete extracted text from PDF:")
-                    logger.info("-" * 50)
-                    logger.info(text)
-                    logger.info("-" * 50)
-                    
-                    # Extract header info (returns ssn, tax_periods, tax_year)
-                    ssn, tax_periods, tax_year = extract_header_info(text)
-                    if ssn and tax_periods:
-                        logger.info(f"Found SSN: {ssn} | Tax Periods: {tax_periods}")
-                    
-                    # Store form matching results
-                    file_results = {
-                        'filename': wi_file['FileName'],
-                        'owner': owner,  # Add owner to file results
-                        'ssn': ssn,
-                        'tax_period': tax_periods,
-                        'form_matches': []
-                    }
-                    
-                    # Check form patterns
-                    for form_name, pattern_info in form_patterns.items():
-                        found_match = bool(re.search(pattern_info['pattern'], text, re.MULTILINE))
-                        file_results['form_matches'].append({
-                            'form_name': form_name,
-                            'matched': found_match
-                        })
-                    
-                    form_matching_results.append(file_results)
-                    
-                    # Process forms (first pass: all except SSA-1099)
-                    forms_data = extract_form_data(text, form_patterns, tax_year, output_buffer=log_buffer, filename=wi_file['FileName'])
-                    if forms_data:
-                        for year, year_forms in forms_data.items():
-                            if year not in all_data:
-                                all_data[year] = []
-                            
-                            # Add owner information to each form
-                            for form in year_forms:
-                                form['Owner'] = owner
-                                form['SourceFile'] = wi_file['FileName']  # Add source file for tracking
-                                logger.info(f"Added Owner={owner} to form {form['Form']}")
-                            
-                            # Separate SSA-1099 and others
-                            non_ssa_forms = [f for f in year_forms if f['Form'] != 'SSA-1099']
-                            ssa_forms = [f for f in year_forms if f['Form'] == 'SSA-1099']
-                            all_data[year].extend(non_ssa_forms)
-                            # Calculate combined income for the year (excluding SSA-1099)
-                            combined_income = sum(f['Income'] for f in non_ssa_forms if f.get('Income') is not None)
-                            # Get marital status from client profile (if available)
-                            client_data = st.session_state.get('client_data') or st.session_state.get('client_profile_data')
-                            marital_status = 'Single'
-                            if client_data:
-                                marital_status = client_data.get('client_info', {}).get('marital_status', 'Single')
-                            # Now process SSA-1099 forms with correct combined_income and marital_status
-                            for ssa_form in ssa_forms:
-                                fields = ssa_form.get('Fields', {})
-                                calc = form_patterns['SSA-1099']['calculation']
-                                try:
-                                    income = calc['Income'](fields, marital_status, combined_income)
-                                    logger.info(f"SSA-1099 calculation: fields={fields}, marital_status={marital_status}, combined_income={combined_income} => {income}")
-                                except Exception as e:
-                                    income = 0
-                                    logger.info(f"ERROR: SSA-1099 income calculation failed: {e}")
-                                try:
-                                    withholding = calc['Withholding'](fields) if callable(calc.get('Withholding')) else 0
-                                except Exception as e:
-                                    withholding = 0
-                                    logger.info(f"ERROR: SSA-1099 withholding calculation failed: {e}")
-                                ssa_form['Income'] = income
-                                ssa_form['Withholding'] = withholding
-                                all_data[year].append(ssa_form)
-            # Update progress bar
-            progress_bar.progress((idx + 1) / total_files)
+                    progress.publish('WI', filename, STAGE_DOWNLOADING)
+                    pdf_bytes = download_file(wi_file["CaseDocumentID"], case_id)
+                    if not pdf_bytes:
+                        progress.publish('WI', filename, STAGE_FAILED, message="Download failed")
+                        continue
+                    progress.publish('WI', filename, STAGE_EXTRACTING)
+                    text = extract_text_from_pdf(
+                        pdf_bytes,
+                        on_page=lambda engine, page, pages: progress.publish(
+                            'WI', filename, STAGE_EXTRACTING, engine=engine, page=page, pages=pages
+                        )
+                    )
+                    if not text:
+                        progress.publish('WI', filename, STAGE_FAILED, message="No readable text")
+                        continue
+                    progress.publish('WI', filename, STAGE_PARSING)
+                    wi_texts[filename] = text
+                    # Log a reference to the raw text (kept in the text cache)
+                    wi_text_keys[filename] = log_text_ref(logger, "Complete extracted text from PDF", text)
+                    # Normalized once and cached with the text; patterns match the normalized text
+                    normalized_texts[filename] = get_text_cache().normalized(wi_text_keys[filename])
+                    yield filename, normalized_texts[filename]
+
+            # Each file is parsed as soon as its text is ready (on a thread pool
+            # with a GIL-releasing regex backend, see iter_wi_texts), so its done
+            # event and partial result go out per document. SSA-1099 income
+            # depends on the file's other income and the filing status; the
+            # calculation specs resolve that per file in one pass
+            for filename, result in iter_wi_texts(extracted_texts(), form_patterns, filing_status=marital_status,
+                                                  log=logger):
+                normalized = normalized_texts[filename]
+                if result['error']:
+                    progress.publish('WI', filename, STAGE_FAILED, message=result['error'])
+                    continue
+                owner = owners[filename]
+                file_forms = []  # Forms from this file, delivered as a partial result
+
+                # Store form matching results
+                file_results = {
+                    'filename': filename,
+                    'owner': owner,  # Add owner to file results
+                    'ssn': result['ssn'],
+                    'tax_period': result['tax_periods'],
+                    'form_matches': []
+                }
+            
+                # Check form patterns
+                for form_name, pattern_info in form_patterns.items():
+                    found_match = bool(re.search(pattern_info['pattern'], normalized, re.MULTILINE))
+                    file_results['form_matches'].append({
+                        'form_name': form_name,
+                        'matched': found_match
+                    })
+            
+                form_matching_results.append(file_results)
+            
+                for year, year_forms in result['forms'].items():
+                    if year not in all_data:
+                        all_data[year] = []
+                
+                    # Add owner information to each form
+                    for form in year_forms:
+                        form['Owner'] = owner
+                        form['SourceFile'] = filename  # Add source file for tracking
+                        logger.info(f"Added Owner={owner} to form {form['Form']}")
+                
+                    all_data[year].extend(year_forms)
+                    file_forms.extend(year_forms)
+                progress.publish('WI', filename, STAGE_DONE, result=file_forms)
+
+        # A form found in two files of the case (TP and combined transcripts) is counted once
+        deduped = dedupe_wi_data(all_data)
+        all_data = deduped['wi_data']
+        for dup in deduped['duplicates']:
+            logger.info(f"Duplicate {dup['form']} ({dup['unique_id']}) for {dup['tax_year']} in {dup['source_file']}: "
+                        f"already parsed from {dup['kept_source_file']}, counted once")
     
     # Store results in session state
     st.session_state['wi_data'] = all_data
-    st.session_state['wi_log'] = log_buffer.getvalue()
+    st.session_state['wi_duplicates'] = deduped['duplicates']
+    spill_artifact('wi_log', run_log.getvalue())
     st.session_state['wi_form_matching'] = form_matching_results
-    st.session_state['wi_texts'] = wi_texts
-    
-    # Calculate and store summary data
-    summary_data = []
-    for year in sorted(all_data.keys(), reverse=True):
-        year_forms = all_data[year]
-        
-        # Calculate totals by category
-        se_income = sum(form['Income'] for form in year_forms if form.get('Category') == 'SE' and form.get('Income') is not None)
-        se_withholding = sum(form['Withholding'] for form in year_forms if form.get('Category') == 'SE' and form.get('Withholding') is not None)
-        
-        nonse_income = sum(form['Income'] for form in year_forms if form.get('Category') == 'Non-SE' and form.get('Income') is not None)
-        nonse_withholding = sum(form['Withholding'] for form in year_forms if form.get('Category') == 'Non-SE' and form.get('Withholding') is not None)
-        
-        other_income = sum(form['Income'] for form in year_forms if form.get('Category') == 'Neither' and form.get('Income') is not None)
-        other_withholding = sum(form['Withholding'] for form in year_forms if form.get('Category') == 'Neither' and form.get('Withholding') is not None)
-        
-        summary_data.append({
-            'Tax Year': format_year(year),
-            'Number of Forms': len(year_forms),
-            'SE Income': se_income,
-            'SE Withholding': se_withholding,
-            'Non-SE Income': nonse_income,
-            'Non-SE Withholding': nonse_withholding,
-            'Other Income': other_income,
-            'Other Withholding': other_withholding,
-            'Total Income': se_income + nonse_income + other_income,
-            'Total Withholding': se_withholding + nonse_withholding + other_withholding
-        })
-    st.session_state['wi_summary'] = summary_data
-    
-    # Calculate and store tax projection data
-    projection_data = []
-    for year in sorted(all_data.keys(), reverse=True):
-        year_forms = all_data[year]
-        se_income = sum(form['Income'] for form in year_forms if form.get('Category') == 'SE' and form.get('Income') is not None)
-        se_withholding = sum(form['Withholding'] for form in year_forms if form.get('Category') == 'SE' and form.get('Withholding') is not None)
-        nonse_income = sum(form['Income'] for form in year_forms if form.get('Category') == 'Non-SE' and form.get('Income') is not None)
-        nonse_withholding = sum(form['Withholding'] for form in year_forms if form.get('Category') == 'Non-SE' and form.get('Withholding') is not None)
-        other_income = sum(form['Income'] for form in year_forms if form.get('Category') == 'Neither' and form.get('Income') is not None)
-        
-        projection_data.append({
-            'Tax Year': str(year),
-            'SE Income': se_income,
-            'SE Withholding': se_withholding,
-            'Non-SE Income': nonse_income,
-            'Non-SE Withholding': nonse_withholding,
-            'Other Income': other_income
-        })
-    st.session_state['wi_projection'] = projection_data
-    
-    # Clean up logging
-    logger.removeHandler(log_handler)
-    log_buffer.close()
+    spill_artifact('wi_texts', wi_texts)
+    # Pattern hashes key the stored results, so a pattern change marks them stale
+    st.session_state['wi_pattern_hash'] = bundle.hash
+    st.session_state['wi_form_hashes'] = bundle.form_hashes()
+    st.session_state['wi_filing_status'] = marital_status
+    st.session_state['wi_text_keys'] = wi_text_keys
+    
+    # Summary and projection rows are slices of one aggregation cube
+    st.session_state['wi_cube'] = None
+    cube = get_wi_cube()
+    st.session_state['wi_summary'] = cube.summary_rows()
+    st.session_state['wi_projection'] = cube.projection_rows()
 
 def render_wi_parser():
     """Render the WI Parser page (Wage & Income)"""
+    import pandas as pd
     st.title("WI Parser")
     
     # Get case_id from session state
@@ -827,13 +631,11 @@ def render_wi_parser():
             df['Estimated AGI'] = df['Total Income'] - (df['SE Income'] * 0.0765)
             df['Estimated AGI'] = df['Estimated AGI'].round(2)
             # Prepare owner breakdowns for each year
+            cube = get_wi_cube()
             owner_rows = []
             for _, row in df.iterrows():
                 year = row['Tax Year']
-                year_forms = st.session_state['wi_data'].get(int(year), [])
-                year_data = {int(year): year_forms}
-                totals = TPSParser.aggregate_income_by_owner(year_data)
-                year_totals = totals.get(int(year), {})
+                year_totals = cube.owner_totals(int(year))
                 owner_rows.append({
                     'Tax Year': year,
                     'Taxpayer Income': year_totals.get('taxpayer', {}).get('income', 0),
@@ -883,10 +685,7 @@ def render_wi_parser():
                 year_forms = st.session_state['wi_data'].get(int(year), [])
                 
                 if year_forms:
-                    # Use TPSParser to aggregate by owner
-                    year_data = {int(year): year_forms}
-                    totals = TPSParser.aggregate_income_by_owner(year_data)
-                    year_totals = totals.get(int(year), {})
+                    year_totals = cube.owner_totals(int(year))
                     
                     with st.expander(f"📊 Tax Year {year} - Owner Breakdown", expanded=False):
                         col1, col2, col3, col4 = st.columns(4)
@@ -986,17 +785,18 @@ def render_wi_parser():
     
     with critical_tab:
         st.subheader("Critical Extraction Issues & Forms to Check")
-        wi_log = st.session_state.get('wi_log', '')
-        wi_texts = st.session_state.get('wi_texts', {})
+        # The log and document texts live on disk; only load them on request
+        load_issues = st.checkbox("🔍 Load processing log and document texts", key='wi_critical_load')
+        wi_log = load_artifact('wi_log', '') if load_issues else ''
+        wi_texts = load_artifact('wi_texts', {}) if load_issues else {}
         if 'wi_data' in st.session_state and st.session_state['wi_data']:
             pass  # Placeholder for future enhancement
-        if not wi_log:
+        if not load_issues:
+            st.info("Tick the box above to analyze extraction issues.")
+        elif not wi_log:
             st.info("No log data available yet.")
         else:
-            import re
-            from collections import defaultdict
             def extract_full_form_snippet(form_name, text, start_pos=None, filename=None):
-                import re
                 debug_info = []
                 if text is None:
                     return f"[DEBUG] No text found for filename: {filename}"
@@ -1007,12 +807,10 @@ def render_wi_parser():
                     pattern = re.compile(rf'(Form[ \-]?{re.escape(form_name)})', re.IGNORECASE)
                     match = pattern.search(text)
                     start = match.start() if match else 0
-                # Find the next form after start
-                next_form_match = re.search(r'(\n|^)\s*Form [A-Z0-9\-]+', text[start+1:], re.IGNORECASE)
-                if next_form_match:
-                    end = start + 1 + next_form_match.start()
-                else:
-                    end = len(text)
+                # Find the next form after start (scanned in place, no copy of the rest of the text)
+                from parsers.wi_parser import FORM_HEADER
+                next_form_match = FORM_HEADER.search(text, start + 1)
+                end = next_form_match.start() if next_form_match else len(text)
                 # Debug info
                 debug_info.append(f"[DEBUG] Filename: {filename}")
                 debug_info.append(f"[DEBUG] Start pos: {start}")
@@ -1158,45 +956,27 @@ def render_wi_parser():
                 else:
                     st.text("❌ No match found")
             st.markdown("---")
-    # In the Critical Issues tab, add debug output for cross-checking
-            # Build a set of all parsed forms by filename (from wi_data)
-            parsed_forms_by_file = {}
-            wi_data = st.session_state.get('wi_data', {})
-            for year, forms in wi_data.items():
-                for form in forms:
-                    filename = form.get('SourceFile') or form.get('filename') or None
-                    form_name = form.get('Form')
-                    if filename and form_name:
-                        if filename not in parsed_forms_by_file:
-                            parsed_forms_by_file[filename] = set()
-                        parsed_forms_by_file[filename].add(form_name)
-            # Debug: show parsed forms by file
-            st.markdown("<details><summary>Debug: Parsed forms by file</summary><pre>" + str(parsed_forms_by_file) + "</pre></details>", unsafe_allow_html=True)
-            for m in re.finditer(r"Potential form detected in text but no pattern matched: '([^']+)' at position (\d+)\. \[FILENAME: ([^\]]+)\] Snippet: (.+?)\n", wi_log, re.DOTALL):
-                form_label, pos_str, filename, snippet = m.groups()
-                wi_text = wi_texts.get(filename, None)
-                start_pos = int(pos_str)
-                # Only show as a critical issue if this form is NOT present in parsed_forms_by_file for this filename
-                parsed_forms = parsed_forms_by_file.get(filename, set())
-                # Debug: show cross-check for this form
-                st.markdown(f"<details><summary>Debug: Checking {form_label} in {filename}</summary><pre>Parsed forms: {parsed_forms}</pre></details>", unsafe_allow_html=True)
-                if form_label.strip() in parsed_forms:
-                    continue  # Skip, it was actually parsed
-                full_snippet = extract_full_form_snippet(form_label, wi_text, start_pos=start_pos, filename=filename)
-                form_no_match.append({"form": form_label.strip(), "snippet": full_snippet})
 
     with log_tab:
         st.subheader("Log Output")
-        st.text(st.session_state.get('wi_log', ''))
+        if st.checkbox("📜 Load log", key='wi_log_load'):
+            st.text(load_artifact('wi_log', 'Log not available (expired or not processed in this session).'))
 
 def render_tax_projection(summary_rows):
     """Render the tax projection page"""
+    import pandas as pd
+    from datetime import date
+    from utils.irs_accrual import due_date
+    from utils.sfr_scenarios import sfr_scenario_grid
+    from utils.tax_tables import FILING_STATUSES
     st.header("📊 SFR Tax Projection Calculator")
     st.markdown("---")
     
+    # No rows when the WI files held no parsable forms: return (st.stop would
+    # also cut off the WI Parser tabs rendered after this one)
     if not summary_rows:
         st.info("💡 **No data available for tax projection.** Please process a case ID first to see tax projections.")
-        st.stop()
+        return
     
     st.write("This calculator estimates what the IRS would assess if they filed a **Substitute for Return (SFR)** for you. It includes penalties and interest that would be added to your tax liability.")
     
@@ -1211,86 +991,35 @@ def render_tax_projection(summary_rows):
     """)
     
     # Tax calculation constants
-    filing_status_options = [
-        "Single", "Married Filing Jointly", "Married Filing Separately", "Head of Household", "Qualifying Widow(er)"
-    ]
-    
-    # 2023 standard deduction and wage base
-    std_deduction = {
-        "Single": 13850,
-        "Married Filing Jointly": 27700,
-        "Married Filing Separately": 13850,
-        "Head of Household": 20800,
-        "Qualifying Widow(er)": 27700
-    }
-    ss_wage_base = 160200
-    ss_rate = 0.124
-    medicare_rate = 0.029
-    
-    # SFR Penalty rates
-    ftf_rate = 0.05  # 5% per month for failure to file
-    ftf_max = 0.25   # Maximum 25%
-    ftp_rate = 0.005 # 0.5% per month for failure to pay
-    interest_rate = 0.08  # 8% annual interest rate (approximate current rate)
-    
-    # 2023 tax brackets
-    tax_brackets = {
-        "Single": [
-            (0, 11000, 0.10),
-            (11000, 44725, 0.12),
-            (44725, 95375, 0.22),
-            (95375, 182100, 0.24),
-            (182100, 231250, 0.32),
-            (231250, 578125, 0.35),
-            (578125, float('inf'), 0.37)
-        ],
-        "Married Filing Jointly": [
-            (0, 22000, 0.10),
-            (22000, 89450, 0.12),
-            (89450, 190750, 0.22),
-            (190750, 364200, 0.24),
-            (364200, 462500, 0.32),
-            (462500, 693750, 0.35),
-            (693750, float('inf'), 0.37)
-        ],
-        "Married Filing Separately": [
-            (0, 11000, 0.10),
-            (11000, 44725, 0.12),
-            (44725, 95375, 0.22),
-            (95375, 182100, 0.24),
-            (182100, 231250, 0.32),
-            (231250, 346875, 0.35),
-            (346875, float('inf'), 0.37)
-        ],
-        "Head of Household": [
-            (0, 15700, 0.10),
-            (15700, 59850, 0.12),
-            (59850, 95350, 0.22),
-            (95350, 182100, 0.24),
-            (182100, 231250, 0.32),
-            (231250, 578100, 0.35),
-            (578100, float('inf'), 0.37)
-        ],
-        "Qualifying Widow(er)": [
-            (0, 22000, 0.10),
-            (22000, 89450, 0.12),
-            (89450, 190750, 0.22),
-            (190750, 364200, 0.24),
-            (364200, 462500, 0.32),
-            (462500, 693750, 0.35),
-            (693750, float('inf'), 0.37)
-        ]
-    }
+    filing_status_options = FILING_STATUSES
+    
+    # Every year x filing status x months-late scenario in one batched call;
+    # the grid is kept in session state so widget changes only slice it
+    def parse_amount(value):
+        return to_dollars(to_cents(value))
+    grid_inputs = tuple(
+        (int(row['Tax Year']), parse_amount(row['SE Income']), parse_amount(row['Non-SE Income']),
+         parse_amount(row['SE Withholding']) + parse_amount(row['Non-SE Withholding']))
+        for row in summary_rows
+    )
+    if not grid_inputs:
+        return
+    as_of = date.today()
+    if st.session_state.get('sfr_grid_inputs') != (grid_inputs, as_of):
+        years, se_incomes, nonse_incomes, withholdings = zip(*grid_inputs)
+        st.session_state.sfr_grid = sfr_scenario_grid(years, se_incomes, nonse_incomes, withholdings, as_of=as_of)
+        st.session_state.sfr_grid_inputs = (grid_inputs, as_of)
+    grid = st.session_state.sfr_grid
     
     # Process each year
     tax_rows = []
     
     for row in summary_rows:
         year = row['Tax Year']
-        se_income = float(str(row['SE Income']).replace("$", "").replace(",", ""))
-        nonse_income = float(str(row['Non-SE Income']).replace("$", "").replace(",", ""))
-        se_withholding = float(str(row['SE Withholding']).replace("$", "").replace(",", ""))
-        nonse_withholding = float(str(row['Non-SE Withholding']).replace("$", "").replace(",", ""))
+        se_income = parse_amount(row['SE Income'])
+        nonse_income = parse_amount(row['Non-SE Income'])
+        se_withholding = parse_amount(row['SE Withholding'])
+        nonse_withholding = parse_amount(row['Non-SE Withholding'])
         
         # Create expandable section for each year
         with st.expander(f"📅 Tax Year {year} - Click to expand", expanded=True):
@@ -1331,50 +1060,30 @@ def render_tax_projection(summary_rows):
                 )
             
             with col2:
-                current_year = 2024  # Approximate current year
-                years_since = current_year - int(year)
+                years_since = as_of.year - int(year)
                 st.info(f"**Years since {year}:** {years_since}")
             
             # Tax Calculations Section
             st.markdown("#### 🧮 SFR Tax Calculations")
             
-            # Calculate taxes
-            deduction = std_deduction[filing_status]
-            ss_tax = min(se_income, ss_wage_base) * ss_rate
-            medicare_tax = se_income * medicare_rate
-            se_tax = ss_tax + medicare_tax
-            taxable_income = max(0, se_income + nonse_income - deduction)
-            
-            # Federal tax calculation
-            fed_tax = 0
-            for bracket in tax_brackets[filing_status]:
-                lower, upper, rate = bracket
-                if taxable_income > lower:
-                    fed_tax += (min(taxable_income, upper) - lower) * rate
-                else:
-                    break
+            # Slice this scenario out of the precomputed grid
+            scenario = grid.cell(int(year), filing_status, months_late)
+            deduction = scenario['deduction']
+            ss_tax = scenario['ss_tax']
+            medicare_tax = scenario['medicare_tax']
+            se_tax = scenario['se_tax']
+            taxable_income = scenario['taxable_income']
+            fed_tax = scenario['fed_tax']
             
             total_withholding = se_withholding + nonse_withholding
-            base_tax_owed = se_tax + fed_tax - total_withholding
+            base_tax_owed = scenario['base_tax_owed']
             
             # SFR Penalties and Interest
-            if base_tax_owed > 0:
-                # Failure to file penalty (5% per month, max 25%)
-                ftf_penalty = min(base_tax_owed * ftf_rate * months_late, base_tax_owed * ftf_max)
-                
-                # Failure to pay penalty (0.5% per month)
-                ftp_penalty = base_tax_owed * ftp_rate * months_late
-                
-                # Interest calculation (simplified - assumes average over time)
-                avg_years = years_since + (months_late / 12)
-                interest = base_tax_owed * interest_rate * avg_years
-                
-                total_owed = base_tax_owed + ftf_penalty + ftp_penalty + interest
-            else:
-                ftf_penalty = 0
-                ftp_penalty = 0
-                interest = 0
-                total_owed = base_tax_owed
+            ftf_penalty = scenario['ftf_penalty']
+            ftp_penalty = scenario['ftp_penalty']
+            interest = scenario['interest']
+            total_owed = scenario['total_owed']
+            interest_years = max(0, (as_of - due_date(int(year))).days) / 365.25
             
             # Display calculations in columns
             col1, col2 = st.columns(2)
@@ -1408,7 +1117,7 @@ def render_tax_projection(summary_rows):
                 with col2:
                     st.metric("Failure to Pay Penalty", f"${ftp_penalty:,.2f}", delta=f"{months_late} months")
                 with col3:
-                    st.metric("Interest", f"${interest:,.2f}", delta=f"{avg_years:.1f} years")
+                    st.metric("Interest", f"${interest:,.2f}", delta=f"{interest_years:.1f} years")
             
             # Tax Summary Box
             st.markdown("---")
@@ -1523,6 +1232,7 @@ def get_at_files(case_id: str) -> list:
     """
     Get list of AT (Account Transcript) files associated with a case.
     """
+    import httpx
     cookies, user_agent, message = load_cookies_from_file()
     if not cookies:
         st.error("Authentication required. Please ensure cookies are valid.")
@@ -1593,202 +1303,79 @@ def format_year(year):
         return year.replace(',', '')
     return str(year)
 
-def extract_at_transactions(text):
-    """Extract transaction data from AT transcript text (robust to compact and spaced formats)"""
-    import re
-    from datetime import datetime
-    # Find the transactions section
-    idx = text.find("TRANSACTIONS")
-    if idx < 0:
-        return []
-    buf = text[idx:]
-    transactions = []
-    # Regex for compact format (single line, no spaces between columns)
-    compact_regex = re.compile(r'^(\d{3}|n/a)([^\d\n]+?)(\d{8})\s+(\d{2}-\d{2}-\d{4})\s+(-?\$?[\d,]+\.\d{2})', re.MULTILINE)
-    # Regex for spaced/multiline format (columns with headers)
-    spaced_regex = re.compile(r'^(\d{3}|n/a)\s*([^\n]+)\n(?:[\w\s]*)?(\d{2}-\d{2}-\d{4})\s*\n\$?([\d,\.-]+)', re.MULTILINE)
-    # Try compact format first
-    for match in compact_regex.finditer(buf):
-        code, desc, cyc, post, amt = match.groups()
-        # Try to parse cycle date
-        try:
-            cycle_date = f"{cyc[:4]}-{cyc[4:6]}-{cyc[6:]}"
-        except Exception:
-            cycle_date = ''
-        # Parse post date
-        try:
-            post_date = datetime.strptime(post, "%m-%d-%Y").date().isoformat()
-        except Exception:
-            post_date = post
-        # Parse amount
-        try:
-            amount = float(amt.replace('$','').replace(',',''))
-        except Exception:
-            amount = 0.0
-        transactions.append({
-            "code": code.strip(),
-            "meaning": desc.strip(),
-            "cycle_date": cycle_date,
-            "date": post_date,
-            "amount": amount
-        })
-    # If no compact matches, try spaced format
-    if not transactions:
-        # Look for special lines like 'No tax return filed'
-        for line in buf.splitlines():
-            if re.search(r'no tax return filed', line, re.IGNORECASE):
-                transactions.append({
-                    'code': 'n/a',
-                    'meaning': 'No tax return filed',
-                    'cycle_date': '',
-                    'date': '',
-                    'amount': 0.0
-                })
-        for match in spaced_regex.finditer(buf):
-            code, desc, post, amt = match.groups()
-            # Parse post date
-            try:
-                post_date = datetime.strptime(post, "%m-%d-%Y").date().isoformat()
-            except Exception:
-                post_date = post
-            # Parse amount
-            try:
-                amount = float(amt.replace('$','').replace(',',''))
-            except Exception:
-                amount = 0.0
-            transactions.append({
-                "code": code.strip(),
-                "meaning": desc.strip(),
-                "cycle_date": '',
-                "date": post_date,
-                "amount": amount
-            })
-    return transactions
-
 def extract_at_data(text):
     """Extract data from Account Transcript text (robust to all formats)"""
-    data = {}
-    # Extract tax year (handle all known formats)
-    year_match = re.search(r'Report for Tax Period Ending:\s*\d{2}-\d{2}-(\d{4})', text)
-    if year_match:
-        year = year_match.group(1)
-        data['tax_year'] = format_year(year)
-        logger.info(f"Found tax year from Report for Tax Period Ending: {data['tax_year']}")
-    else:
-        year_match = re.search(r'TAX PERIOD:\s*Dec\.\s*31,\s*(\d{4})', text, re.IGNORECASE)
-        if year_match:
-            year = year_match.group(1)
-            data['tax_year'] = format_year(year)
-            logger.info(f"Found tax year from TAX PERIOD: {data['tax_year']}")
-        else:
-            year_match = re.search(r'TAX PERIOD:\s*([A-Za-z]+\.\s*\d{1,2},?\s*\d{4})', text, re.IGNORECASE)
-            if year_match:
-                # Try to extract year from the matched string
-                year = re.search(r'(\d{4})', year_match.group(1))
-                if year:
-                    data['tax_year'] = format_year(year.group(1))
-                    logger.info(f"Found tax year from TAX PERIOD alt: {data['tax_year']}")
-                else:
-                    data['tax_year'] = 'Unknown'
-            else:
-                year_match = re.search(r'(\d{4})', text)
-                if year_match:
-                    data['tax_year'] = format_year(year_match.group(1))
-                    logger.info(f"Found tax year from fallback pattern: {data['tax_year']}")
-                else:
-                    logger.warning("No tax year found")
-                    data['tax_year'] = 'Unknown'
-    # Extract financial data (robust to upper/lowercase, colon/space, missing values)
-    financial_patterns = {
-        'account_balance': r'(?:ACCOUNT BALANCE|Account balance)[:\s]*[\$]?([\d,\.\-]+)',
-        'accrued_interest': r'(?:ACCRUED INTEREST|Accrued interest)[:\s]*[\$]?([\d,\.\-]+)',
-        'accrued_penalty': r'(?:ACCRUED PENALTY|Accrued penalty)[:\s]*[\$]?([\d,\.\-]+)',
-        'total_balance': r'(?:ACCOUNT BALANCE PLUS ACCRUALS|Account balance plus accruals).*?:[\s]*[\$]?([\d,\.\-]+)',
-        'adjusted_gross_income': r'(?:ADJUSTED GROSS INCOME|Adjusted gross income)[:\s]*[\$]?([\d,\.\-]+)',
-        'taxable_income': r'(?:TAXABLE INCOME|Taxable income)[:\s]*[\$]?([\d,\.\-]+)',
-        'tax_per_return': r'(?:TAX PER RETURN|Tax per return)[:\s]*[\$]?([\d,\.\-]+)',
-        'se_tax_taxpayer': r'(?:SE TAXABLE INCOME TAXPAYER|SE taxable income taxpayer)[:\s]*[\$]?([\d,\.\-]+)',
-        'se_tax_spouse': r'(?:SE TAXABLE INCOME SPOUSE|SE taxable income spouse)[:\s]*[\$]?([\d,\.\-]+)',
-        'total_se_tax': r'(?:TOTAL SELF EMPLOYMENT TAX|Total self employment tax)[:\s]*[\$]?([\d,\.\-]+)'
-    }
-    for key, pattern in financial_patterns.items():
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            try:
-                amount = float(match.group(1).replace(',', ''))
-                data[key] = amount
-                logger.info(f"Found {key}: {amount}")
-            except ValueError:
-                logger.warning(f"Could not parse amount for {key}: {match.group(1)}")
-                data[key] = 0.00
-        else:
-            logger.warning(f"No match found for {key}")
-            data[key] = 0.00
-    # Extract filing status
-    filing_match = re.search(r'(?:FILING STATUS|Filing status)[:\s]*([^,\n]+)', text, re.IGNORECASE)
-    if filing_match:
-        data['filing_status'] = filing_match.group(1).strip()
-    # Extract processing date (robust to all formats)
-    processing_match = re.search(r'(?:PROCESSING DATE|Processing date)[:\s]*([A-Za-z]+\.?\s+\d{1,2},?\s*\d{4})', text)
-    if processing_match:
-        data['processing_date'] = processing_match.group(1)
-        logger.info(f"Found processing date: {data['processing_date']}")
-    else:
-        alt_processing_match = re.search(r'(?:PROCESSING DATE|Processing date)[:\s]*([A-Za-z]+\.?\s+\d{1,2}\s+\d{4})', text)
-        if alt_processing_match:
-            data['processing_date'] = alt_processing_match.group(1)
-            logger.info(f"Found processing date (alt format): {data['processing_date']}")
-        else:
-            logger.warning("No processing date found")
-    # Extract transactions
-    data['transactions'] = extract_at_transactions(text)
-    return data
+    return parse_at_transcript(text, log=logger)
+
+def process_at_documents(case_id, at_files, progress=None):
+    """Process all AT documents once and store results
 
-def process_at_documents(case_id, at_files):
-    """Process all AT documents once and store results"""
+    `at_data` and `at_alerts` in session state are updated as each file
+    finishes, and the file's record and alerts are attached to its "done"
+    event on `progress`, so alerts can be reviewed before the run ends.
+    """
     from utils.tp_s_parser import TPSParser
+    from parsers.at_parser import pattern_hash as at_pattern_hash
     all_data = []
-    # Set up logging
-    log_buffer = io.StringIO()
-    log_handler = logging.StreamHandler(log_buffer)
-    log_handler.setLevel(logging.INFO)
-    logger.addHandler(log_handler)
-    with st.spinner("Processing Account Transcript documents..."):
-        progress_bar = st.progress(0)
-        total_files = len(at_files)
-        for idx, at_file in enumerate(at_files):
-            logger.info(f"\n{'='*50}")
-            logger.info(f"Processing file: {at_file['FileName']}")
-            logger.info(f"{'='*50}\n")
-            pdf_bytes = download_file(at_file["CaseDocumentID"], case_id)
-            if pdf_bytes:
-                text = extract_text_from_pdf(pdf_bytes)
-                if text:
-                    logger.info("Complete extracted text from PDF:")
-                    logger.info("-" * 50)
-                    logger.info(text)
-                    logger.info("-" * 50)
-                    data = extract_at_data(text)
-                    if data:
-                        # Extract owner from filename
-                        owner = TPSParser.extract_owner_from_filename(at_file['FileName'])
-                        data['owner'] = owner or 'Unknown'
-                        data['source_file'] = at_file['FileName']
-                        all_data.append(data)
-            progress_bar.progress((idx + 1) / total_files)
-    st.session_state['at_data'] = all_data
-    st.session_state['at_log'] = log_buffer.getvalue()
     all_alerts = []
-    for year_data in all_data:
-        if 'transactions' in year_data:
-            alerts = get_transaction_alerts(year_data['transactions'])
-            all_alerts.extend(alerts)
+    at_text_keys = {}
+    st.session_state['at_data'] = all_data
     st.session_state['at_alerts'] = all_alerts
-    logger.removeHandler(log_handler)
-    log_buffer.close()
+    st.session_state['at_pattern_hash'] = at_pattern_hash()
+    st.session_state['at_text_keys'] = at_text_keys
+    if progress is None:
+        progress = ProgressBus(str(case_id))
+    render_progress(progress, 'AT', at_files)
+    for at_file in at_files:
+        progress.publish('AT', at_file['FileName'], STAGE_LISTED)
+    with capture_run_log(logger) as run_log:
+        with st.spinner("Processing Account Transcript documents..."):
+            for at_file in at_files:
+                filename = at_file['FileName']
+                logger.info(f"\n{'='*50}")
+                logger.info(f"Processing file: {filename}")
+                logger.info(f"{'='*50}\n")
+                progress.publish('AT', filename, STAGE_DOWNLOADING)
+                pdf_bytes = download_file(at_file["CaseDocumentID"], case_id)
+                if not pdf_bytes:
+                    progress.publish('AT', filename, STAGE_FAILED, message="Download failed")
+                    continue
+                progress.publish('AT', filename, STAGE_EXTRACTING)
+                text = extract_text_from_pdf(
+                    pdf_bytes,
+                    on_page=lambda engine, page, pages: progress.publish(
+                        'AT', filename, STAGE_EXTRACTING, engine=engine, page=page, pages=pages
+                    )
+                )
+                if not text:
+                    progress.publish('AT', filename, STAGE_FAILED, message="No readable text")
+                    continue
+                progress.publish('AT', filename, STAGE_PARSING)
+                at_text_keys[filename] = log_text_ref(logger, "Complete extracted text from PDF", text)
+                try:
+                    data = extract_at_data(text)
+                except Exception as e:
+                    logger.error(f"Failed to parse {filename}: {e}")
+                    progress.publish('AT', filename, STAGE_FAILED, message=str(e))
+                    continue
+                alerts = []
+                if data:
+                    # Extract owner from filename
+                    owner = TPSParser.extract_owner_from_filename(filename)
+                    data['owner'] = owner or 'Unknown'
+                    data['source_file'] = filename
+                    all_data.append(data)
+                    if 'transactions' in data:
+                        alerts = get_transaction_alerts([data])
+                        all_alerts.extend(alerts)
+                progress.publish('AT', filename, STAGE_DONE, result={'at_data': data, 'alerts': alerts})
+    spill_artifact('at_log', run_log.getvalue())
 
 def render_at_parser():
     """Render the AT Parser page (Account Transcript)"""
+    import pandas as pd
+    from utils.at_columns import ATColumns
+    from utils.irs_accrual import accrue_portfolio
     st.title("AT Parser")
     case_id = st.session_state.get('case_id', None)
     if not case_id:
@@ -1856,6 +1443,29 @@ def render_at_parser():
             for col in currency_cols:
                 df[col] = df[col].apply(lambda x: f"${x:,.2f}" if isinstance(x, (int, float)) else x)
             st.table(df)
+            # Case-wide totals from the columnar view of the AT data
+            columns = ATColumns.from_records(at_data)
+            year_totals = columns.totals_by_year().values()
+            tcol1, tcol2, tcol3, tcol4 = st.columns(4)
+            with tcol1:
+                st.metric("Total Balance", f"${sum(t['account_balance'] for t in year_totals):,.2f}")
+            with tcol2:
+                st.metric("Accrued Interest", f"${sum(t['accrued_interest'] for t in year_totals):,.2f}")
+            with tcol3:
+                st.metric("Accrued Penalty", f"${sum(t['accrued_penalty'] for t in year_totals):,.2f}")
+            with tcol4:
+                st.metric("Assessed Penalties", f"${columns.group_total('penalty'):,.2f}")
+            # Balances run forward to today from the transaction stream
+            st.markdown("#### Projected Balance (accrued to today)")
+            accruals = [a for a in accrue_portfolio(at_data) if 'error' not in a]
+            if accruals:
+                accrual_df = pd.DataFrame([
+                    {k: a[k] for k in ('tax_year', 'owner', 'tax', 'payments', 'ftf_penalty', 'ftp_penalty', 'interest', 'balance')}
+                    for a in accruals
+                ])
+                for col in ('tax', 'payments', 'ftf_penalty', 'ftp_penalty', 'interest', 'balance'):
+                    accrual_df[col] = accrual_df[col].apply(lambda x: f"${x:,.2f}")
+                st.dataframe(accrual_df, use_container_width=True, hide_index=True)
         else:
             st.info("No Account Transcript data available")
 
@@ -1880,6 +1490,8 @@ def render_at_parser():
                 with st.expander(f"Tax Year {format_year(tax_year)}", expanded=True):
                     trans_df = pd.DataFrame(transactions)
                     if not trans_df.empty:
+                        if 'code' in trans_df.columns:
+                            trans_df.insert(1, 'code_meaning', trans_df['code'].map(CODE_CATALOG.meaning))
                         # Format amount column
                         if 'amount' in trans_df.columns:
                             trans_df['amount'] = trans_df['amount'].apply(lambda x: f"${x:,.2f}" if pd.notnull(x) else '')
@@ -1895,12 +1507,14 @@ def render_at_parser():
 
     with log_tab:
         st.subheader("Log Output")
-        st.text(st.session_state.get('at_log', ''))
+        if st.checkbox("📜 Load log", key='at_log_load'):
+            st.text(load_artifact('at_log', 'Log not available (expired or not processed in this session).'))
 
 def get_roa_files(case_id: str) -> list:
     """
     Get list of ROA (Record of Account) files associated with a case.
     """
+    import httpx
     cookies, user_agent, message = load_cookies_from_file()
     if not cookies:
         st.error("Authentication required. Please ensure cookies are valid.")
@@ -1967,6 +1581,7 @@ def get_trt_files(case_id: str) -> list:
     """
     Get list of TRT (Tax Return Transcript) files associated with a case.
     """
+    import httpx
     cookies, user_agent, message = load_cookies_from_file()
     if not cookies:
         st.error("Authentication required. Please ensure cookies are valid.")
@@ -2042,13 +1657,6 @@ def render_roa_parser():
     # Set up Streamlit tabs
     summary_tab, log_tab = st.tabs(["Summary", "Logs"])
 
-    # Set up a string buffer for logs
-    import io as _io
-    log_buffer = _io.StringIO()
-    log_handler = logging.StreamHandler(log_buffer)
-    log_handler.setLevel(logging.INFO)
-    logger.addHandler(log_handler)
-
     roa_files = get_roa_files(case_id)
     if roa_files:
         with summary_tab:
@@ -2057,29 +1665,24 @@ def render_roa_parser():
             
         with log_tab:
             st.subheader("Log Output")
-            for roa_file in roa_files:
-                logger.info(f"Processing file: {roa_file['FileName']}")
-                pdf_bytes = download_file(roa_file["CaseDocumentID"], case_id)
-                if pdf_bytes:
-                    text = extract_text_from_pdf(pdf_bytes)
-                    if text:
-                        logger.info("Successfully extracted text from PDF")
-                        logger.info("Raw text content:")
-                        logger.info("-" * 50)
-                        logger.info(text)
-                        logger.info("-" * 50)
+            with capture_run_log(logger) as run_log:
+                for roa_file in roa_files:
+                    logger.info(f"Processing file: {roa_file['FileName']}")
+                    pdf_bytes = download_file(roa_file["CaseDocumentID"], case_id)
+                    if pdf_bytes:
+                        text = extract_text_from_pdf(pdf_bytes)
+                        if text:
+                            logger.info("Successfully extracted text from PDF")
+                            log_text_ref(logger, "Raw text content", text)
+                        else:
+                            logger.warning(f"Failed to extract text from {roa_file['FileName']}")
                     else:
-                        logger.warning(f"Failed to extract text from {roa_file['FileName']}")
-                else:
-                    logger.error(f"Failed to download {roa_file['FileName']}")
-            st.text(log_buffer.getvalue())
+                        logger.error(f"Failed to download {roa_file['FileName']}")
+            st.text(run_log.getvalue())
     else:
         with summary_tab:
             st.warning("No ROA documents found for this case ID")
 
-    # Clean up logging handler
-    logger.removeHandler(log_handler)
-
 def render_trt_parser():
     """Render the TRT Parser page (Tax Return Transcript)"""
     st.title("TRT Parser")
@@ -2093,13 +1696,6 @@ def render_trt_parser():
     # Set up Streamlit tabs
     summary_tab, log_tab = st.tabs(["Summary", "Logs"])
 
-    # Set up a string buffer for logs
-    import io as _io
-    log_buffer = _io.StringIO()
-    log_handler = logging.StreamHandler(log_buffer)
-    log_handler.setLevel(logging.INFO)
-    logger.addHandler(log_handler)
-
     trt_files = get_trt_files(case_id)
     if trt_files:
         with summary_tab:
@@ -2108,31 +1704,27 @@ def render_trt_parser():
             
         with log_tab:
             st.subheader("Log Output")
-            for trt_file in trt_files:
-                logger.info(f"Processing file: {trt_file['FileName']}")
-                pdf_bytes = download_file(trt_file["CaseDocumentID"], case_id)
-                if pdf_bytes:
-                    text = extract_text_from_pdf(pdf_bytes)
-                    if text:
-                        logger.info("Successfully extracted text from PDF")
-                        logger.info("Raw text content:")
-                        logger.info("-" * 50)
-                        logger.info(text)
-                        logger.info("-" * 50)
+            with capture_run_log(logger) as run_log:
+                for trt_file in trt_files:
+                    logger.info(f"Processing file: {trt_file['FileName']}")
+                    pdf_bytes = download_file(trt_file["CaseDocumentID"], case_id)
+                    if pdf_bytes:
+                        text = extract_text_from_pdf(pdf_bytes)
+                        if text:
+                            logger.info("Successfully extracted text from PDF")
+                            log_text_ref(logger, "Raw text content", text)
+                        else:
+                            logger.warning(f"Failed to extract text from {trt_file['FileName']}")
                     else:
-                        logger.warning(f"Failed to extract text from {trt_file['FileName']}")
-                else:
-                    logger.error(f"Failed to download {trt_file['FileName']}")
-            st.text(log_buffer.getvalue())
+                        logger.error(f"Failed to download {trt_file['FileName']}")
+            st.text(run_log.getvalue())
     else:
         with summary_tab:
             st.warning("No TRT documents found for this case ID")
 
-    # Clean up logging handler
-    logger.removeHandler(log_handler)
-
 def render_tax_summary():
     """Render the Tax Summary page combining data from all parsers"""
+    import pandas as pd
     st.title("Tax Summary")
     
     # Get case_id from session state
@@ -2184,6 +1776,7 @@ def render_tax_summary():
         
         # Create a combined summary by year
         combined_summary = {}
+        cube = get_wi_cube()
         
         for year in all_years:
             at_data = at_years_dict.get(str(year))
@@ -2192,8 +1785,8 @@ def render_tax_summary():
             combined_summary[year] = {
                 'wi_data': {
                     'forms': wi_year_data,
-                    'total_income': sum(form['Income'] for form in wi_year_data if form.get('Income') is not None),
-                    'total_withholding': sum(form['Withholding'] for form in wi_year_data if form.get('Withholding') is not None)
+                    'total_income': cube.year_total(int(year), 'income'),
+                    'total_withholding': cube.year_total(int(year), 'withholding')
                 },
                 'at_data': at_data if at_data else None,
                 'return_status': 'Filed' if at_data and any(
@@ -2254,19 +1847,9 @@ def create_tax_summary(wi_data: dict, at_data: list) -> dict:
     Returns:
         Dictionary with year-by-year analysis including discrepancies and recommendations
     """
-    
-    def calculate_wi_totals(year_forms):
-        """Calculate total income and withholding from WI forms"""
-        total_income = 0
-        total_withholding = 0
-        
-        for form in year_forms:
-            # Only count SE and Non-SE income (exclude "Neither" category)
-            if form.get('Category') in ['SE', 'Non-SE']:
-                total_income += form.get('Income', 0)
-                total_withholding += form.get('Withholding', 0)
-        
-        return total_income, total_withholding
+    import numpy as np
+    from utils.tax_engine import income_tax, standard_deduction
+    from utils.wi_cube import WICube
     
     def find_at_data_for_year(year, at_data):
         """Find AT data for a specific year"""
@@ -2288,49 +1871,6 @@ def create_tax_summary(wi_data: dict, at_data: list) -> dict:
         
         return "Not Filed"
     
-    def calculate_simple_tax(income, filing_status="Single"):
-        """Simple tax calculation for unfiled year projections"""
-        # 2024 tax brackets (simplified)
-        brackets = {
-            "Single": [
-                (0, 11600, 0.10),
-                (11600, 47150, 0.12),
-                (47150, 100525, 0.22),
-                (100525, 191950, 0.24),
-                (191950, 243725, 0.32),
-                (243725, 609350, 0.35),
-                (609350, float('inf'), 0.37)
-            ],
-            "Married Filing Joint": [
-                (0, 23200, 0.10),
-                (23200, 94300, 0.12),
-                (94300, 201050, 0.22),
-                (201050, 383900, 0.24),
-                (383900, 487450, 0.32),
-                (487450, 731200, 0.35),
-                (731200, float('inf'), 0.37)
-            ]
-        }
-        
-        # Use Single brackets as default
-        tax_brackets = brackets.get(filing_status, brackets["Single"])
-        
-        # Standard deduction
-        std_deduction = {"Single": 14600, "Married Filing Joint": 29200}.get(filing_status, 14600)
-        
-        # Calculate taxable income
-        taxable_income = max(0, income - std_deduction)
-        
-        # Calculate tax
-        tax = 0
-        for lower, upper, rate in tax_brackets:
-            if taxable_income > lower:
-                tax += (min(taxable_income, upper) - lower) * rate
-            else:
-                break
-        
-        return tax
-    
     def generate_recommendations(analysis_data):
         """Generate actionable recommendations based on analysis"""
         recommendations = []
@@ -2411,20 +1951,35 @@ def create_tax_summary(wi_data: dict, at_data: list) -> dict:
     
     all_years = sorted(wi_years.union(at_years), reverse=True)
     
+    # WI totals count SE and Non-SE income only (not "Neither")
+    cube = WICube.from_wi_data(wi_data)
+    
+    # Estimated tax for every unfiled year in one vectorized call
+    year_inputs = {}
     for year in all_years:
-        year_str = str(year)
-        
-        # Get WI data for this year
         year_forms = wi_data.get(year, [])
-        wi_total_income, wi_total_withholding = calculate_wi_totals(year_forms)
-        
-        # Get AT data for this year
-        at_record = find_at_data_for_year(year_str, at_data)
-        return_status = determine_filing_status(at_record)
+        wi_total_income = cube.year_total(year, 'income', categories=['SE', 'Non-SE'])
+        wi_total_withholding = cube.year_total(year, 'withholding', categories=['SE', 'Non-SE'])
+        at_record = find_at_data_for_year(str(year), at_data)
+        year_inputs[year] = (year_forms, wi_total_income, wi_total_withholding, at_record, determine_filing_status(at_record))
+    unfiled_years = [year for year, inputs in year_inputs.items() if inputs[4] == "Not Filed" and inputs[1] > 0]
+    estimated_taxes = {}
+    if unfiled_years:
+        statuses = [
+            year_inputs[year][3].get('filing_status', 'Single') if year_inputs[year][3] else 'Single'
+            for year in unfiled_years
+        ]
+        incomes = [year_inputs[year][1] for year in unfiled_years]
+        taxable = np.maximum(0, np.asarray(incomes, dtype=float) - standard_deduction(unfiled_years, statuses))
+        estimated_taxes = dict(zip(unfiled_years, income_tax(unfiled_years, statuses, taxable).tolist()))
+    
+    for year in all_years:
+        year_str = str(year)
+        year_forms, wi_total_income, wi_total_withholding, at_record, return_status = year_inputs[year]
         
         # Calculate income discrepancy
         at_agi = at_record.get('adjusted_gross_income', 0) if at_record else 0
-        income_discrepancy = wi_total_income - at_agi
+        income_discrepancy = to_dollars(to_cents(wi_total_income) - to_cents(at_agi))
         
         # Determine if amendment is needed
         needs_amendment = False
@@ -2433,10 +1988,8 @@ def create_tax_summary(wi_data: dict, at_data: list) -> dict:
         
         # Calculate unfiled liability
         unfiled_liability = 0
-        if return_status == "Not Filed" and wi_total_income > 0:
-            filing_status = at_record.get('filing_status', 'Single') if at_record else 'Single'
-            estimated_tax = calculate_simple_tax(wi_total_income, filing_status)
-            unfiled_liability = max(0, estimated_tax - wi_total_withholding)
+        if year in estimated_taxes:
+            unfiled_liability = max(0, estimated_taxes[year] - wi_total_withholding)
         
         # Create analysis data
         analysis_data = {
@@ -2467,6 +2020,7 @@ def create_tax_summary(wi_data: dict, at_data: list) -> dict:
 
 def render_comprehensive_analysis():
     """Render the Comprehensive Analysis page"""
+    import pandas as pd
     st.title("Comprehensive Tax Analysis")
     
     # Get case_id from session state
@@ -2607,13 +2161,10 @@ def render_comprehensive_analysis():
                 year_forms = year_data['wi_data']['forms']
                 filing_status = year_data['at_data'].get('filing_status', 'Single') if year_data['at_data'] else 'Single'
                 
-                # Aggregate by owner
+                # Generate TP/S analysis (includes the owner totals)
                 year_data_dict = {year: year_forms}
-                totals = TPSParser.aggregate_income_by_owner(year_data_dict)
-                year_totals = totals.get(year, {})
-                
-                # Generate TP/S analysis
                 tps_analysis = TPSParser.generate_tps_analysis_summary(year_data_dict, filing_status)
+                year_totals = tps_analysis['totals_by_year'].get(year, {})
                 
                 col1, col2 = st.columns(2)
                 
@@ -2792,7 +2343,7 @@ def render_comparison_tab():
     most_recent_year = str(most_recent_row['Tax Year'])
     wi_total_income = most_recent_row['Total Income']
     if isinstance(wi_total_income, str):
-        wi_total_income = float(str(wi_total_income).replace("$", "").replace(",", ""))
+        wi_total_income = to_dollars(to_cents(wi_total_income))
 
     # Find AT data for the most recent year
     at_years_dict = {str(d.get('tax_year')): d for d in at_data if d.get('tax_year')}
@@ -2801,10 +2352,8 @@ def render_comparison_tab():
     if at_for_year:
         at_agi = at_for_year.get('adjusted_gross_income')
         if at_agi is not None and isinstance(at_agi, str):
-            try:
-                at_agi = float(at_agi.replace("$", "").replace(",", ""))
-            except Exception:
-                at_agi = None
+            at_cents = parse_cents(at_agi)
+            at_agi = to_dollars(at_cents) if at_cents is not None else None
 
     # Decide which transcript value to use
     if at_agi is not None and at_agi > 0:
@@ -3160,6 +2709,7 @@ def authenticate_and_sync_cookies(username, password, headless=True, slow_mo=100
 def test_tps_connection() -> bool:
     """Test if TPS site is accessible"""
     try:
+        from playwright.sync_api import sync_playwright
         with sync_playwright() as p:
             browser = p.chromium.launch(headless=True)
             page = browser.new_page()
@@ -3250,6 +2800,7 @@ def main():
     elif page == "📊 Comprehensive Analysis":
         render_comprehensive_analysis()
     elif page == "📋 Client Profile":
+        from utils.api_client import render_client_profile_tab
         render_client_profile_tab()
     elif page == "⚙️ Settings":
         render_settings()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark
+Runs `python -X importtime` for a module in a fresh interpreter and reports
+which top-level packages dominate cold start
+
+Usage:
+    python benchmarks/import_time.py                  # app.py
+    python benchmarks/import_time.py utils.case_store --top 15
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+ARCHIVE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_imports(module: str) -> Tuple[List[Tuple[int, int, int, str]], str]:
+    """
+    Import `module` in a fresh interpreter with -X importtime
+
+    Returns:
+        (entries, error) where entries are (depth, self_us, cumulative_us, name)
+        and error is the interpreter's error output if the import failed
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ARCHIVE_DIR, capture_output=True, text=True
+    )
+    entries = []
+    errors = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            errors.append(line)
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((depth, int(parts[0]), int(parts[1]), name.strip()))
+    error = "\n".join(errors) if proc.returncode != 0 else ""
+    return entries, error
+
+
+def summarize(entries: List[Tuple[int, int, int, str]]) -> Dict[str, int]:
+    """Total import time (self time, microseconds) per top-level package"""
+    totals = defaultdict(int)
+    for _, self_us, _, name in entries:
+        totals[name.split(".")[0]] += self_us
+    return dict(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("module", nargs="?", default="app", help="Module to import (default: app)")
+    parser.add_argument("--top", type=int, default=20, help="Number of packages to show")
+    args = parser.parse_args()
+
+    entries, error = measure_imports(args.module)
+    if error:
+        print(f"⚠️ Importing {args.module} failed; timings below cover the imports before the failure")
+        print(error.strip().splitlines()[-1])
+    if not entries:
+        return 1
+
+    totals = summarize(entries)
+    total_us = sum(totals.values())
+    print(f"\n📦 Import time for '{args.module}': {total_us / 1000:.1f} ms across {len(entries)} modules")
+    print(f"{'package':<30}{'ms':>10}{'share':>8}")
+    print("-" * 48)
+    for package, us in sorted(totals.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{package:<30}{us / 1000:>10.1f}{us / total_us:>8.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
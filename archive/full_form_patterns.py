@@ -31,20 +31,20 @@ form_patterns = {
             'Payer': r'Payer:\s*([A-Z0-9 &.,\-]+)'
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Non-Employee Compensation', 0)) +
-                float(fields.get('Medical Payments', 0)) +
-                float(fields.get('Fishing Income', 0)) +
-                float(fields.get('Rents', 0)) +
-                float(fields.get('Royalties', 0)) +
-                float(fields.get('Attorney Fees', 0)) +
-                float(fields.get('Other Income', 0)) +
-                float(fields.get('Substitute for Dividends', 0))
-            ),
-            'Withholding': lambda fields: (
-                float(fields.get('Federal Withholding', 0)) +
-                float(fields.get('Tax Withheld', 0))
-            )
+            'Income': {'terms': [
+                'Non-Employee Compensation',
+                'Medical Payments',
+                'Fishing Income',
+                'Rents',
+                'Royalties',
+                'Attorney Fees',
+                'Other Income',
+                'Substitute for Dividends'
+            ]},
+            'Withholding': {'terms': [
+                'Federal Withholding',
+                'Tax Withheld'
+            ]}
         }
     },
 
@@ -63,12 +63,8 @@ form_patterns = {
             'Payer': r'Payer:\s*([A-Z0-9 &.,\-]+)'
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Non-Employee Compensation', 0))
-            ),
-            'Withholding': lambda fields: (
-                float(fields.get('Federal Withholding', 0))
-            )
+            'Income': {'terms': ['Non-Employee Compensation']},
+            'Withholding': {'terms': ['Federal Withholding']}
         }
     },
 
@@ -87,12 +83,8 @@ form_patterns = {
             'Payer': r'Payer:\s*([A-Z0-9 &.,\-]+)'
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Gross Amount', 0))
-            ),
-            'Withholding': lambda fields: (
-                float(fields.get('Federal Withholding', 0))
-            )
+            'Income': {'terms': ['Gross Amount']},
+            'Withholding': {'terms': ['Federal Withholding']}
         }
     },
 
@@ -114,15 +106,13 @@ form_patterns = {
             'Payer': r'Payer:\s*([A-Z0-9 &.,\-]+)'
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Patronage Dividends', 0)) +
-                float(fields.get('Non-Patronage Distribution', 0)) +
-                float(fields.get('Retained Allocations', 0)) +
-                float(fields.get('Redemption Amount', 0))
-            ),
-            'Withholding': lambda fields: (
-                float(fields.get('Federal Withholding', 0))
-            )
+            'Income': {'terms': [
+                'Patronage Dividends',
+                'Non-Patronage Distribution',
+                'Retained Allocations',
+                'Redemption Amount'
+            ]},
+            'Withholding': {'terms': ['Federal Withholding']}
         }
     },
 
@@ -137,12 +127,8 @@ form_patterns = {
             'Federal Withholding': r'U\.S\. federal tax withheld[:\s]*\$([\d,.]+)'
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Gross Income', 0))
-            ),
-            'Withholding': lambda fields: (
-                float(fields.get('Federal Withholding', 0))
-            )
+            'Income': {'terms': ['Gross Income']},
+            'Withholding': {'terms': ['Federal Withholding']}
         }
     },
 
@@ -163,14 +149,14 @@ form_patterns = {
             'Qualified Nonrecourse Beginning': r'Qualified nonrecourse beginning[:\s]*\$([\d,.]+)'
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Royalties', 0)) +
-                float(fields.get('Ordinary Income K-1', 0)) +
-                float(fields.get('Real Estate', 0)) +
-                float(fields.get('Other Rental', 0)) +
-                float(fields.get('Guaranteed Payments', 0))
-            ),
-            'Withholding': lambda fields: 0  # No withholdings specified
+            'Income': {'terms': [
+                'Royalties',
+                'Ordinary Income K-1',
+                'Real Estate',
+                'Other Rental',
+                'Guaranteed Payments'
+            ]},
+            'Withholding': {}  # No withholdings specified
         }
     },
 
@@ -186,11 +172,11 @@ form_patterns = {
             'Federal Withholding': None  # Explicitly stated as "None"
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Net Rental Real Estate Income', 0)) +
-                float(fields.get('Other Rental Income', 0))
-            ),
-            'Withholding': lambda fields: 0  # No withholdings specified
+            'Income': {'terms': [
+                'Net Rental Real Estate Income',
+                'Other Rental Income'
+            ]},
+            'Withholding': {}  # No withholdings specified
         }
     }
 }
@@ -201,7 +187,7 @@ form_patterns.update({
     # W-2 Form (robust pattern)
     'W-2': {
         # This pattern matches 'Form W-2 Wage and Tax Statement' with optional spaces, hyphens, and OCR quirks
-        'pattern': r'Form\s*W\s*[-–]?\s*2.*W\s*-?\s*a\s*-?\s*g\s*-?\s*e.*T\s*-?\s*a\s*-?\s*x.*S\s*-?\s*t\s*-?\s*a\s*-?\s*t\s*-?\s*e\s*-?\s*m\s*-?\s*e\s*-?\s*n\s*-?\s*t',
+        'pattern': r'Form\s*W\s*-?\s*2.{0,40}W\s*-?\s*a\s*-?\s*g\s*-?\s*e.{0,40}T\s*-?\s*a\s*-?\s*x.{0,40}S\s*-?\s*t\s*-?\s*a\s*-?\s*t\s*-?\s*e\s*-?\s*m\s*-?\s*e\s*-?\s*n\s*-?\s*t',
         'category': 'Non-SE',  # Non-Self-Employment
         'fields': {
             # Income Fields
@@ -214,12 +200,8 @@ form_patterns.update({
             'Employer': r'Employer:\s*([A-Z0-9 &.,\-]+)'
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Wages, Tips, and Other Compensation', 0))
-            ),
-            'Withholding': lambda fields: (
-                float(fields.get('Federal Withholding', 0))
-            )
+            'Income': {'terms': ['Wages, Tips, and Other Compensation']},
+            'Withholding': {'terms': ['Federal Withholding']}
         }
     },
 
@@ -234,12 +216,8 @@ form_patterns.update({
             'Federal Withholding': r'Federal income tax withheld[:\s]*\$([\d,.]+)'
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Gross Winnings', 0))
-            ),
-            'Withholding': lambda fields: (
-                float(fields.get('Federal Withholding', 0))
-            )
+            'Income': {'terms': ['Gross Winnings']},
+            'Withholding': {'terms': ['Federal Withholding']}
         }
     },
 
@@ -268,14 +246,12 @@ form_patterns.update({
         },
         'calculation': {
             # Income Calculation: Conditional logic for Distribution Codes
-            'Income': lambda fields: (
-                float(fields.get('Taxable Amount', 0)) if fields.get('Taxable Amount') else (
-                    float(fields.get('Gross Distribution', 0)) if any(fields.get(f'Distribution Code {i}') for i in range(1, 9)) else 0
-                )
-            ),
-            'Withholding': lambda fields: (
-                float(fields.get('Federal Withholding', 0))
-            )
+            'Income': {'rules': [
+                {'when': {'present': ['Taxable Amount']}, 'terms': ['Taxable Amount']},
+                {'when': {'present': ['Distribution Code 1', 'Distribution Code 2', 'Distribution Code 3', 'Distribution Code 4',
+                                      'Distribution Code 7', 'Distribution Code 8']}, 'terms': ['Gross Distribution']}
+            ]},
+            'Withholding': {'terms': ['Federal Withholding']}
         }
     }
 })
@@ -298,7 +274,7 @@ form_patterns.update({
             'Payer': r'Payer:\s*([A-Z0-9 &.,\-]+)'
         },
         'calculation': {
-            'Income': lambda fields: float(fields.get('Proceeds', 0)) - float(fields.get('Cost or Basis', 0))  # Dynamic calculation logic
+            'Income': {'terms': ['Proceeds', ['Cost or Basis', -1]]}  # Gain/loss
         }
     }
 })
@@ -319,18 +295,13 @@ form_patterns.update({
         },
         'calculation': {
             # Income Calculation: Filing status-dependent logic
-            'Income': lambda fields, filing_status, combined_income: (
-                float(fields.get('Total Benefits Paid', 0)) * 0.85 if (
-                    filing_status in ['Single', 'HOH'] and combined_income > 25000
-                ) or (
-                    filing_status in ['MFS', 'MFJ'] and combined_income > 34000
-                ) else (
-                    float(fields.get('Total Benefits Paid', 0)) * 0.85 if combined_income == 0 else 0
-                )
-            ),
-            'Withholding': lambda fields: (
-                float(fields.get('Federal Withholding', 0))
-            )
+            # combined_income is the Income of the other forms in the same file and year
+            'Income': {'rules': [
+                {'when': {'context': 'combined_income', 'above': {'Single': 25000, 'HOH': 25000, 'MFS': 34000, 'MFJ': 34000}},
+                 'terms': [['Total Benefits Paid', 0.85]]},
+                {'when': {'context': 'combined_income', 'equals': 0}, 'terms': [['Total Benefits Paid', 0.85]]}
+            ]},
+            'Withholding': {'terms': ['Federal Withholding']}
         }
     }
 })
@@ -350,14 +321,12 @@ form_patterns.update({
             'Federal Withholding': r'Tax withheld[:\s]*\$([\d,.]+)'
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Qualified Dividends', 0)) +
-                float(fields.get('Cash Liquidation Distribution', 0)) +
-                float(fields.get('Capital Gains', 0))
-            ),
-            'Withholding': lambda fields: (
-                float(fields.get('Federal Withholding', 0))
-            )
+            'Income': {'terms': [
+                'Qualified Dividends',
+                'Cash Liquidation Distribution',
+                'Capital Gains'
+            ]},
+            'Withholding': {'terms': ['Federal Withholding']}
         }
     }
 })
@@ -377,13 +346,8 @@ form_patterns.update({
             'Payer': r'Payer:\s*([A-Z0-9 &.,\-]+)'
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Interest', 0)) +
-                (float(fields.get('Savings Bonds', 0)) if float(fields.get('Savings Bonds', 0)) >= 1000 else 0)
-            ),
-            'Withholding': lambda fields: (
-                float(fields.get('Federal Withholding', 0))
-            )
+            'Income': {'terms': ['Interest', {'field': 'Savings Bonds', 'min': 1000}]},
+            'Withholding': {'terms': ['Federal Withholding']}
         }
     },
 
@@ -402,14 +366,12 @@ form_patterns.update({
             'Federal Withholding': r'Tax withheld[:\s]*\$([\d,.]+)'
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Unemployment Compensation', 0)) +
-                float(fields.get('Agricultural Subsidies', 0)) +
-                float(fields.get('Taxable Grants', 0))
-            ),
-            'Withholding': lambda fields: (
-                float(fields.get('Federal Withholding', 0))
-            )
+            'Income': {'terms': [
+                'Unemployment Compensation',
+                'Agricultural Subsidies',
+                'Taxable Grants'
+            ]},
+            'Withholding': {'terms': ['Federal Withholding']}
         }
     },
 
@@ -424,10 +386,8 @@ form_patterns.update({
             'Federal Withholding': None  # No withholdings
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Gross Proceeds', 0))
-            ),
-            'Withholding': lambda fields: 0  # No withholdings
+            'Income': {'terms': ['Gross Proceeds']},
+            'Withholding': {}  # No withholdings
         }
     },
 
@@ -443,11 +403,11 @@ form_patterns.update({
             'Federal Withholding': None  # No withholdings
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Gross Long-Term Care Benefits Paid', 0)) +
-                float(fields.get('Accelerated Death Benefits Paid', 0))
-            ),
-            'Withholding': lambda fields: 0  # No withholdings
+            'Income': {'terms': [
+                'Gross Long-Term Care Benefits Paid',
+                'Accelerated Death Benefits Paid'
+            ]},
+            'Withholding': {}  # No withholdings
         }
     },
 
@@ -464,8 +424,8 @@ form_patterns.update({
             'Federal Withholding': None  # No withholdings
         },
         'calculation': {
-            'Income': lambda fields: 0,  # ISO exercises are not income until sale; keep for cost basis reference
-            'Withholding': lambda fields: 0  # No withholdings
+            'Income': {},  # ISO exercises are not income until sale; keep for cost basis reference
+            'Withholding': {}  # No withholdings
         }
     },
 
@@ -485,15 +445,15 @@ form_patterns.update({
             'Federal Withholding': None  # No withholdings
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Dividends', 0)) +
-                float(fields.get('Interest', 0)) +
-                float(fields.get('Royalties', 0)) +
-                float(fields.get('Ordinary Income K-1', 0)) +
-                float(fields.get('Real Estate', 0)) +
-                float(fields.get('Other Rental', 0))
-            ),
-            'Withholding': lambda fields: 0  # No withholdings
+            'Income': {'terms': [
+                'Dividends',
+                'Interest',
+                'Royalties',
+                'Ordinary Income K-1',
+                'Real Estate',
+                'Other Rental'
+            ]},
+            'Withholding': {}  # No withholdings
         }
     },
 
@@ -509,13 +469,11 @@ form_patterns.update({
             'Federal Withholding': r'Tax withheld[:\s]*\$([\d,.]+)'
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Original Issue Discount', 0)) +
-                float(fields.get('Interest', 0))
-            ),
-            'Withholding': lambda fields: (
-                float(fields.get('Federal Withholding', 0))
-            )
+            'Income': {'terms': [
+                'Original Issue Discount',
+                'Interest'
+            ]},
+            'Withholding': {'terms': ['Federal Withholding']}
         }
     }
 })
@@ -532,8 +490,8 @@ form_patterns.update({
             'Federal Withholding': None  # No withholdings
         },
         'calculation': {
-            'Income': lambda fields: 0,  # Account balances are not income
-            'Withholding': lambda fields: 0  # No withholdings
+            'Income': {},  # Account balances are not income
+            'Withholding': {}  # No withholdings
         }
     },
 
@@ -545,8 +503,8 @@ form_patterns.update({
             # No explicit income or withholding fields
         },
         'calculation': {
-            'Income': lambda fields: 0,  # No income fields
-            'Withholding': lambda fields: 0  # No withholdings
+            'Income': {},  # No income fields
+            'Withholding': {}  # No withholdings
         }
     },
 
@@ -560,8 +518,8 @@ form_patterns.update({
             'Federal Withholding': None
         },
         'calculation': {
-            'Income': lambda fields: 0,  # Mortgage amounts are not income and are for deduction/reference only
-            'Withholding': lambda fields: 0
+            'Income': {},  # Mortgage amounts are not income and are for deduction/reference only
+            'Withholding': {}
         }
     },
 
@@ -573,8 +531,8 @@ form_patterns.update({
             'Received by Lender': r'Received by Lender[:\s]*\$([\d,.]+)',
         },
         'calculation': {
-            'Income': lambda fields: 0,  # Student loan interest is not income and may be deductible
-            'Withholding': lambda fields: 0
+            'Income': {},  # Student loan interest is not income and may be deductible
+            'Withholding': {}
         }
     },
 
@@ -589,8 +547,8 @@ form_patterns.update({
             'Federal Withholding': None  # No withholdings
         },
         'calculation': {
-            'Income': lambda fields: 0,  # Tuition is an expense, not income
-            'Withholding': lambda fields: 0  # No withholdings
+            'Income': {},  # Tuition is an expense, not income
+            'Withholding': {}  # No withholdings
         }
     },
 
@@ -606,10 +564,10 @@ form_patterns.update({
             'Federal Withholding': None  # No withholdings
         },
         'calculation': {
-            'Income': lambda fields: (
-                float(fields.get('Amount of Debt Discharged', 0))  # Only debt discharge is potentially taxable; property value is informational
-            ),
-            'Withholding': lambda fields: 0  # No withholdings
+            'Income': {'terms': [
+                'Amount of Debt Discharged'  # Only debt discharge is potentially taxable; property value is informational
+            ]},
+            'Withholding': {}  # No withholdings
         }
     },
 
@@ -624,8 +582,8 @@ form_patterns.update({
             'Federal Withholding': None  # No withholdings
         },
         'calculation': {
-            'Income': lambda fields: 0,  # Distributions may be non-taxable if used for qualified expenses
-            'Withholding': lambda fields: 0  # No withholdings
+            'Income': {},  # Distributions may be non-taxable if used for qualified expenses
+            'Withholding': {}  # No withholdings
         }
     },
 
@@ -640,8 +598,8 @@ form_patterns.update({
             'Federal Withholding': None  # No withholdings
         },
         'calculation': {
-            'Income': lambda fields: 0,  # Distributions may be non-taxable if used for qualified expenses
-            'Withholding': lambda fields: 0  # No withholdings
+            'Income': {},  # Distributions may be non-taxable if used for qualified expenses
+            'Withholding': {}  # No withholdings
         }
     },
 
@@ -656,8 +614,8 @@ form_patterns.update({
             'Federal Withholding': None  # No withholdings
         },
         'calculation': {
-            'Income': lambda fields: 0,  # Distributions may be non-taxable if used for qualified expenses
-            'Withholding': lambda fields: 0  # No withholdings
+            'Income': {},  # Distributions may be non-taxable if used for qualified expenses
+            'Withholding': {}  # No withholdings
         }
     }
 })
\ No newline at end of file
@@ -1,5 +1,7 @@
 """AT (Account Transcript) transaction codes and their interpretations."""
 
+from functools import lru_cache
+
 AT_CODES = [
     {
         "code": "150",
@@ -191,12 +193,204 @@ AT_CODES = [
     }
 ]
 
+# Alert categories shown on the AT Parser Alerts tab. Codes are exact codes
+# ("420") or inclusive ranges ("900-999")
+ALERT_CATEGORIES = {
+    'Audit Alerts': {
+        'codes': ['420', '424', '430'],
+        'severity': 'error',
+        'icon': '🔍'
+    },
+    'Collection Alerts': {
+        'codes': ['520', '530', '780'],
+        'severity': 'error',
+        'icon': '⚠️'
+    },
+    'Additional Tax Assessments': {
+        'codes': ['290', '300'],
+        'severity': 'error',
+        'icon': '💸'
+    },
+    'Payment Issues': {
+        'codes': ['706', '898'],
+        'severity': 'warning',
+        'icon': '💰'
+    },
+    'Account Holds': {
+        'codes': ['570', '810'],
+        'severity': 'warning',
+        'icon': '🔒'
+    },
+    'Refund Issues': {
+        'codes': ['846', '811'],
+        'severity': 'warning',
+        'icon': '💳'
+    },
+    'Amended Returns': {
+        'codes': ['320'],
+        'severity': 'info',
+        'icon': '📝'
+    },
+    'Resolution Programs': {
+        'codes': ['480', '482'],
+        'severity': 'info',
+        'icon': '✅'
+    },
+    'Bankruptcy': {
+        'codes': ['780'],
+        'severity': 'error',
+        'icon': '🏛️'
+    },
+    'Extensions': {
+        'codes': ['460'],
+        'severity': 'info',
+        'icon': '⏰'
+    },
+    'Substitute Returns': {
+        'codes': ['599'],
+        'severity': 'warning',
+        'icon': '📋'
+    },
+    'Litigation/Freezes': {
+        'codes': ['520', '571'],
+        'severity': 'warning',
+        'icon': '⚖️'
+    }
+}
+
+# Codes that close an open examination/freeze code in the same module
+CLOSING_CODES = {
+    '420': ['421', '430'],
+    '424': ['421', '430'],
+    '570': ['571', '572'],
+    '810': ['811'],
+    '520': ['521', '522']
+}
+
+# Codes summed together for penalty and interest totals
+CODE_GROUPS = {
+    'penalty': ['160', '166', '170', '176', '180', '186', '240', '270', '276'],
+    'interest': ['196', '336', '340'],
+}
+
+# Fallback meanings for codes without their own entry, by code range
+CODE_FAMILIES = [
+    {"range": "000-099", "family": "0xx", "meaning": "Entity / account establishment transaction"},
+    {"range": "100-199", "family": "1xx", "meaning": "Return or assessment transaction"},
+    {"range": "200-299", "family": "2xx", "meaning": "Penalty or additional assessment transaction"},
+    {"range": "300-399", "family": "3xx", "meaning": "Assessment or abatement transaction"},
+    {"range": "400-499", "family": "4xx", "meaning": "Examination, transfer or account status transaction"},
+    {"range": "500-599", "family": "5xx", "meaning": "Collection status or freeze transaction"},
+    {"range": "600-699", "family": "6xx", "meaning": "Payment transaction"},
+    {"range": "700-799", "family": "7xx", "meaning": "Credit transaction"},
+    {"range": "800-899", "family": "8xx", "meaning": "Refund or credit transaction"},
+    {"range": "900-999", "family": "9xx", "meaning": "Miscellaneous / IDRS status transaction"},
+]
+
+
+# Codes memoized per catalog
+RESOLVED_CACHE_SIZE = 4096
+
+
+def _code_range(spec):
+    """'420' -> (420, 420), '900-999' -> (900, 999)"""
+    low, _, high = str(spec).partition('-')
+    return int(low), int(high or low)
+
+
+class TransactionCodeCatalog:
+    """
+    Transaction codes compiled once for constant-time lookups
+
+    Exact codes resolve through a dict; codes covered only by a range (a
+    family such as 9xx, or a ranged alert entry) are resolved on first use
+    and memoized (the RESOLVED_CACHE_SIZE most recent codes, so malformed
+    codes from bad OCR cannot grow it without bound), so lookups stay O(1)
+    however many codes are loaded.
+    """
+
+    def __init__(self, codes, alert_categories=None, families=None):
+        self.by_code = {str(info["code"]): info for info in codes}
+        self.alert_categories = dict(alert_categories or {})
+        self.families = [(_code_range(f["range"]), f) for f in (families or [])]
+        self.alerts_by_code = {}
+        self.alert_ranges = []
+        for category, spec in self.alert_categories.items():
+            for entry in spec['codes']:
+                if '-' in str(entry):
+                    self.alert_ranges.append((_code_range(entry), category))
+                else:
+                    self.alerts_by_code.setdefault(str(entry), []).append(category)
+        self._resolve_key = lru_cache(maxsize=RESOLVED_CACHE_SIZE)(self._lookup)
+
+    @staticmethod
+    def _as_int(code):
+        try:
+            return int(str(code).strip())
+        except (TypeError, ValueError):
+            return None
+
+    def _resolve(self, code):
+        return self._resolve_key(str(code).strip() if code is not None else '')
+
+    def _lookup(self, key):
+        info = self.by_code.get(key)
+        number = self._as_int(key)
+        if info is None and number is not None:
+            for (low, high), family in self.families:
+                if low <= number <= high:
+                    info = {"code": key, "meaning": family["meaning"], "family": family["family"]}
+                    break
+        categories = list(self.alerts_by_code.get(key, []))
+        if number is not None:
+            for (low, high), category in self.alert_ranges:
+                if low <= number <= high and category not in categories:
+                    categories.append(category)
+        if self.alert_ranges:
+            # Keep the category order of the alert table
+            order = list(self.alert_categories)
+            categories.sort(key=order.index)
+        return info, categories
+
+    def info(self, code):
+        """Catalog entry for a code (a family entry for unlisted codes), or None"""
+        return self._resolve(code)[0]
+
+    def meaning(self, code, default=''):
+        info = self.info(code)
+        return info["meaning"] if info else default
+
+    def categories(self, code):
+        """Alert categories a code belongs to, in alert-table order"""
+        return self._resolve(code)[1]
+
+    def alerts(self, transactions):
+        """Alert dicts for the transactions whose codes are in an alert category"""
+        alerts = []
+        for trans in transactions:
+            code = trans.get('code')
+            for category in self.categories(code):
+                spec = self.alert_categories[category]
+                alerts.append({
+                    'category': category,
+                    'severity': spec['severity'],
+                    'icon': spec['icon'],
+                    'code': code,
+                    'meaning': trans.get('meaning', ''),
+                    'date': trans.get('date', ''),
+                    'description': trans.get('description', ''),
+                    'amount': trans.get('amount', 0),
+                    'tax_year': trans.get('tax_year', '')
+                })
+        return alerts
+
+
+CATALOG = TransactionCodeCatalog(AT_CODES, ALERT_CATEGORIES, CODE_FAMILIES)
+
+
 def get_code_info(code):
     """Get information about a specific transaction code."""
-    for code_info in AT_CODES:
-        if code_info["code"] == code:
-            return code_info
-    return None
+    return CATALOG.info(code)
 
 def interpret_transaction(code, description, date, amount):
     """Interpret a transaction based on its code and details."""
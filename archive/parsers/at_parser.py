@@ -0,0 +1,297 @@
+"""
+Single-pass Account Transcript (AT) parser
+Scans the transcript once for label, section and transaction-row tokens,
+fills the header/summary fields and collects transactions as it goes, and
+returns the same dict as the original per-field regex cascade (tax_year,
+financial fields, filing_status, processing_date, transactions)
+
+parse_at_transcript() drops the page header/footer lines repeated from page
+to page (parsers.boilerplate) before scanning.
+"""
+
+import hashlib
+import logging
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from parsers.boilerplate import BOILERPLATE_VERSION
+from parsers.regex_guard import MAX_ANCHORED_MATCH_CHARS
+from parsers.text_normalize import strip_boilerplate
+from utils.money import parse_cents, to_cents, to_dollars
+
+logger = logging.getLogger(__name__)
+
+# Tax year rules in priority order: (pattern, log label). The last one is a
+# fallback searched only when none of the labelled rules matched, outside the
+# page header (its request date and tracking number are not the tax year)
+TAX_YEAR_RULES = [
+    (re.compile(r'Report for Tax Period Ending:\s*\d{2}-\d{2}-(\d{4})'), 'Report for Tax Period Ending'),
+    (re.compile(r'TAX PERIOD:\s*Dec\.\s*31,\s*(\d{4})', re.IGNORECASE), 'TAX PERIOD'),
+    (re.compile(r'TAX PERIOD:\s*([A-Za-z]+\.\s*\d{1,2},?\s*\d{4})', re.IGNORECASE), 'TAX PERIOD alt'),
+    (re.compile(r'(\d{4})'), 'fallback pattern'),
+]
+FALLBACK_YEAR_RULE = len(TAX_YEAR_RULES) - 1
+
+# Summary amounts, in output order
+FINANCIAL_FIELDS = [
+    'account_balance', 'accrued_interest', 'accrued_penalty', 'total_balance', 'adjusted_gross_income',
+    'taxable_income', 'tax_per_return', 'se_tax_taxpayer', 'se_tax_spouse', 'total_se_tax'
+]
+
+# Header/summary field patterns, matched at the position of their label token
+FIELD_PATTERNS = {
+    'account_balance': re.compile(r'(?:ACCOUNT BALANCE|Account balance)[:\s]*[\$]?([\d,\.\-]+)', re.IGNORECASE),
+    'accrued_interest': re.compile(r'(?:ACCRUED INTEREST|Accrued interest)[:\s]*[\$]?([\d,\.\-]+)', re.IGNORECASE),
+    'accrued_penalty': re.compile(r'(?:ACCRUED PENALTY|Accrued penalty)[:\s]*[\$]?([\d,\.\-]+)', re.IGNORECASE),
+    'total_balance': re.compile(r'(?:ACCOUNT BALANCE PLUS ACCRUALS|Account balance plus accruals).{0,200}?:[\s]*[\$]?([\d,\.\-]+)', re.IGNORECASE),
+    'adjusted_gross_income': re.compile(r'(?:ADJUSTED GROSS INCOME|Adjusted gross income)[:\s]*[\$]?([\d,\.\-]+)', re.IGNORECASE),
+    'taxable_income': re.compile(r'(?:TAXABLE INCOME|Taxable income)[:\s]*[\$]?([\d,\.\-]+)', re.IGNORECASE),
+    'tax_per_return': re.compile(r'(?:TAX PER RETURN|Tax per return)[:\s]*[\$]?([\d,\.\-]+)', re.IGNORECASE),
+    'se_tax_taxpayer': re.compile(r'(?:SE TAXABLE INCOME TAXPAYER|SE taxable income taxpayer)[:\s]*[\$]?([\d,\.\-]+)', re.IGNORECASE),
+    'se_tax_spouse': re.compile(r'(?:SE TAXABLE INCOME SPOUSE|SE taxable income spouse)[:\s]*[\$]?([\d,\.\-]+)', re.IGNORECASE),
+    'total_se_tax': re.compile(r'(?:TOTAL SELF EMPLOYMENT TAX|Total self employment tax)[:\s]*[\$]?([\d,\.\-]+)', re.IGNORECASE),
+    'filing_status': re.compile(r'(?:FILING STATUS|Filing status)[:\s]*([^,\n]+)', re.IGNORECASE),
+    'processing_date': re.compile(r'(?:PROCESSING DATE|Processing date)[:\s]*([A-Za-z]+\.?\s+\d{1,2},?\s*\d{4})')
+}
+
+# Compact format: code, description and cycle on one line, then post date and amount
+COMPACT_TRANSACTION = re.compile(r'^(\d{3}|n/a)([^\d\n]+?)(\d{8})\s+(\d{2}-\d{2}-\d{4})\s+(-?\$?[\d,]+\.\d{2})', re.MULTILINE)
+# Spaced format: code/description line, optional extra line, date line, amount line
+SPACED_TRANSACTION = re.compile(r'^(\d{3}|n/a)\s*([^\n]+)\n(?:[\w\s]*)?(\d{2}-\d{2}-\d{4})\s*\n\$?([\d,\.-]+)', re.MULTILINE)
+
+# Lowercase label token -> what to try at that position (field keys, tax
+# year rule ranks, or the "no return filed" pseudo transaction)
+LABEL_TARGETS = {
+    'account balance': ['total_balance', 'account_balance'],
+    'accrued interest': ['accrued_interest'],
+    'accrued penalty': ['accrued_penalty'],
+    'adjusted gross income': ['adjusted_gross_income'],
+    'taxable income': ['taxable_income'],
+    'tax per return': ['tax_per_return'],
+    'se taxable income taxpayer': ['se_tax_taxpayer'],
+    'se taxable income spouse': ['se_tax_spouse'],
+    'total self employment tax': ['total_se_tax'],
+    'filing status': ['filing_status'],
+    'processing date': ['processing_date'],
+    'report for tax period ending:': [0],
+    'tax period:': [1, 2],
+}
+NO_RETURN_LABEL = 'no tax return filed'
+TRANSACTIONS_MARKER = 'TRANSACTIONS'
+
+
+@lru_cache(maxsize=256)
+def _scanner(labels: frozenset, in_transactions: bool):
+    """
+    Token pattern for the labels still being looked for
+
+    Before the transaction zone the scanner looks for labels and the
+    TRANSACTIONS marker; inside it, for labels and transaction rows. Labels
+    drop out once their fields are filled, so a multi-year bundle is scanned
+    for little more than row starts after its first summary block.
+    """
+    label_alts = sorted(labels, key=len, reverse=True)
+    first_chars = {label[0] for label in label_alts} | {label[0].upper() for label in label_alts}
+    alternatives = []
+    if in_transactions:
+        # Anchor rows on the preceding newline so digits elsewhere are cheap to skip
+        alternatives.append(r'\n(?P<row>(?=\d{3}|n/a))')
+        first_chars.add('\n')
+    else:
+        alternatives.append(f'(?P<marker>{TRANSACTIONS_MARKER})')
+        first_chars.add(TRANSACTIONS_MARKER[0])
+    if label_alts:
+        alternatives.append('(?i:(?P<label>' + '|'.join(re.escape(label) for label in label_alts) + '))')
+    prefix = '(?=[' + re.escape(''.join(sorted(first_chars))) + '])'
+    return re.compile(prefix + '(?:' + '|'.join(alternatives) + ')', re.MULTILINE)
+
+
+def _post_date(post: str) -> str:
+    """MM-DD-YYYY -> ISO date (the input unchanged if it is not a valid date)"""
+    try:
+        return date(int(post[6:]), int(post[:2]), int(post[3:5])).isoformat()
+    except ValueError:
+        return post
+
+
+def _amount(amt: str) -> float:
+    return to_dollars(to_cents(amt))
+
+
+class ATTranscriptParser:
+    """Tokenize an Account Transcript once and fill every field in the same pass"""
+
+    def __init__(self, text: str, log: Optional[logging.Logger] = None):
+        self.text = text
+        self.log = log or logger
+
+    def parse(self) -> Dict:
+        text = self.text
+        year_hits: List[Optional[re.Match]] = [None] * len(TAX_YEAR_RULES)
+        best_year_rule = len(TAX_YEAR_RULES)
+        hits: Dict[str, re.Match] = {}  # financial fields, filing_status, processing_date
+
+        in_transactions = False
+        compact, spaced, no_return = [], [], []
+        compact_done = spaced_done = 0  # offsets already consumed by a transaction
+        no_return_line = -1
+
+        pending = set(LABEL_TARGETS)
+        scanner = _scanner(frozenset(pending), in_transactions)
+        pos = 0
+        while True:
+            token = scanner.search(text, pos)
+            if token is None:
+                break
+            kind = token.lastgroup
+            start = token.start(kind)
+            pos = max(token.end(), start + 1)
+            # Anchored matches only look at a window after the token, so OCR
+            # garbage cannot make a row or label pattern scan the whole text
+            window = start + MAX_ANCHORED_MATCH_CHARS
+            if kind == 'row':
+                if start >= compact_done:
+                    match = COMPACT_TRANSACTION.match(text, start, window)
+                    if match:
+                        compact_done = match.end()
+                        compact.append(self._compact_transaction(match))
+                # The spaced layout is only used when there are no compact rows
+                if not compact and start >= spaced_done:
+                    match = SPACED_TRANSACTION.match(text, start, window)
+                    if match:
+                        spaced_done = match.end()
+                        spaced.append(self._spaced_transaction(match))
+                continue
+            if kind == 'marker':
+                in_transactions = True
+                pending.add(NO_RETURN_LABEL)
+            else:
+                label = token.group('label').lower()
+                if label == NO_RETURN_LABEL:
+                    # One entry per line mentioning it
+                    line_start = text.rfind('\n', 0, start) + 1
+                    if line_start != no_return_line:
+                        no_return_line = line_start
+                        no_return.append(self._no_return_filed())
+                    continue
+                # Header and summary labels: first occurrence anywhere wins
+                for target in LABEL_TARGETS[label]:
+                    if isinstance(target, int):
+                        if target < best_year_rule:
+                            match = TAX_YEAR_RULES[target][0].match(text, start, window)
+                            if match:
+                                year_hits[target] = match
+                                best_year_rule = target
+                    elif target not in hits:
+                        match = FIELD_PATTERNS[target].match(text, start, window)
+                        if match:
+                            hits[target] = match
+                # Stop scanning for a label once nothing it feeds can change
+                satisfied = all(
+                    target >= best_year_rule if isinstance(target, int) else target in hits
+                    for target in LABEL_TARGETS[label]
+                )
+                if not satisfied:
+                    continue
+                pending.discard(label)
+            scanner = _scanner(frozenset(pending), in_transactions)
+
+        if best_year_rule > FALLBACK_YEAR_RULE:
+            fallback = self._fallback_year(text)
+            if fallback:
+                year_hits[FALLBACK_YEAR_RULE] = fallback
+                best_year_rule = FALLBACK_YEAR_RULE
+
+        data = {'tax_year': self._tax_year(year_hits, best_year_rule)}
+        for key in FINANCIAL_FIELDS:
+            match = hits.get(key)
+            if match:
+                cents = parse_cents(match.group(1))
+                if cents is not None:
+                    amount = to_dollars(cents)
+                    data[key] = amount
+                    self.log.info(f"Found {key}: {amount}")
+                else:
+                    self.log.warning(f"Could not parse amount for {key}: {match.group(1)}")
+                    data[key] = 0.00
+            else:
+                self.log.warning(f"No match found for {key}")
+                data[key] = 0.00
+        if 'filing_status' in hits:
+            data['filing_status'] = hits['filing_status'].group(1).strip()
+        if 'processing_date' in hits:
+            data['processing_date'] = hits['processing_date'].group(1)
+            self.log.info(f"Found processing date: {data['processing_date']}")
+        else:
+            self.log.warning("No processing date found")
+        # Compact rows win; the spaced layout is only used when there are none
+        data['transactions'] = compact if compact else no_return + spaced
+        return data
+
+    @staticmethod
+    def _fallback_year(text: str) -> Optional[re.Match]:
+        """First fallback year match that is not on a page header/footer line"""
+        header = getattr(text, 'boilerplate', ())
+        for match in TAX_YEAR_RULES[FALLBACK_YEAR_RULE][0].finditer(text):
+            if not any(start <= match.start() < end for start, end in header):
+                return match
+        return None
+
+    def _tax_year(self, year_hits, best_rule: int) -> str:
+        if best_rule >= len(TAX_YEAR_RULES):
+            self.log.warning("No tax year found")
+            return 'Unknown'
+        _, label = TAX_YEAR_RULES[best_rule]
+        value = year_hits[best_rule].group(1)
+        if label == 'TAX PERIOD alt':
+            year = re.search(r'(\d{4})', value)
+            if not year:
+                return 'Unknown'
+            value = year.group(1)
+        tax_year = value.replace(',', '')
+        self.log.info(f"Found tax year from {label}: {tax_year}")
+        return tax_year
+
+    @staticmethod
+    def _no_return_filed() -> Dict:
+        return {'code': 'n/a', 'meaning': 'No tax return filed', 'cycle_date': '', 'date': '', 'amount': 0.0}
+
+    @staticmethod
+    def _compact_transaction(match) -> Dict:
+        code, desc, cyc, post, amt = match.groups()
+        return {
+            "code": code.strip(),
+            "meaning": desc.strip(),
+            "cycle_date": f"{cyc[:4]}-{cyc[4:6]}-{cyc[6:]}",
+            "date": _post_date(post),
+            "amount": _amount(amt)
+        }
+
+    @staticmethod
+    def _spaced_transaction(match) -> Dict:
+        code, desc, post, amt = match.groups()
+        return {
+            "code": code.strip(),
+            "meaning": desc.strip(),
+            "cycle_date": '',
+            "date": _post_date(post),
+            "amount": _amount(amt)
+        }
+
+
+def parse_at_transcript(text: str, log: Optional[logging.Logger] = None) -> Dict:
+    """Parse an Account Transcript text in a single pass (see ATTranscriptParser)"""
+    return ATTranscriptParser(strip_boilerplate(text), log).parse()
+
+
+@lru_cache(maxsize=1)
+def pattern_hash() -> str:
+    """Content hash of the parser's patterns and label table, stored with parsed results"""
+    parts = [
+        repr(TAX_YEAR_RULES), repr(FIELD_PATTERNS), repr(COMPACT_TRANSACTION), repr(SPACED_TRANSACTION),
+        repr(sorted(LABEL_TARGETS.items())), NO_RETURN_LABEL, TRANSACTIONS_MARKER, str(MAX_ANCHORED_MATCH_CHARS),
+        f"boilerplate={BOILERPLATE_VERSION}"
+    ]
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
@@ -0,0 +1,133 @@
+"""
+Repeated page header/footer detection
+IRS transcripts repeat the same block on every page ("This Product Contains
+Sensitive Taxpayer Data", request/response dates, SSN, tracking number, page
+numbers). The detector splits a document into pages, learns the lines that
+recur at the top or bottom of most pages and returns their spans on pages
+where the previous page had the same line, so the parsers can drop them
+while the first page (and the first page of each new tax period) keeps the
+header fields (SSN, tax period) they read.
+
+Pages are delimited by PAGE_BREAK (extract_text_from_pdf inserts it); older
+texts without it are split where the document's first FALLBACK_HEADER_LINES
+non-blank lines repeat as a block (unless the first is a form header). A
+single repeated line ("No tax return filed") is content, not a page header.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from parsers.line_index import LineIndex
+
+# Bump when the detection changes: stored parses record it (see text_normalize / at_parser)
+BOILERPLATE_VERSION = 2
+
+# Inserted between pages by extract_text_from_pdf (a line break for str.splitlines)
+PAGE_BREAK = '\f\n'
+
+# Lines looked at on each page (non-blank lines from the top / bottom)
+HEADER_LINES = 10
+FOOTER_LINES = 4
+# A line is boilerplate when it is on this share of pages (and on at least 2)
+MIN_PAGE_SHARE = 0.6
+MIN_LINE_CHARS = 6
+# Leading lines that must repeat together to start a page in a text without PAGE_BREAK
+FALLBACK_HEADER_LINES = 3
+
+_PAGE_NUMBER = re.compile(r'\bpage\s*\d+(?:\s*of\s*\d+)?\b', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+# Form headers and amounts are content even when they repeat page after page
+_CONTENT = re.compile(r'^Form\s|\$', re.IGNORECASE)
+
+
+def line_key(line: str) -> str:
+    """Line compared across pages: spacing and page numbers do not matter"""
+    return _PAGE_NUMBER.sub('Page #', _SPACES.sub(' ', line).strip())
+
+
+def _page_starts(text: str, index: LineIndex) -> List[int]:
+    """Line index of the first line of every page"""
+    starts = [0]
+    if '\f' in text:
+        pos = text.find('\f')
+        while pos != -1:
+            line = index.line_of(pos) + 1
+            # PAGE_BREAK is "\f\n": the page starts after the empty line it leaves
+            if text.startswith('\n', pos + 1):
+                line += 1
+            if line < len(index) and line > starts[-1]:
+                starts.append(line)
+            pos = text.find('\f', pos + 1)
+        return starts
+    keyed = [(i, key) for i in range(len(index)) if (key := line_key(text[index.starts[i]:index.ends[i]]))]
+    head = [key for _, key in keyed[:FALLBACK_HEADER_LINES]]
+    if len(head) < FALLBACK_HEADER_LINES or _CONTENT.search(head[0]):
+        return starts
+    for n in range(FALLBACK_HEADER_LINES, len(keyed) - FALLBACK_HEADER_LINES + 1):
+        if [key for _, key in keyed[n:n + FALLBACK_HEADER_LINES]] == head and keyed[n][0] > starts[-1]:
+            starts.append(keyed[n][0])
+    return starts
+
+
+def _edges(text: str, index: LineIndex, first: int, last: int) -> Tuple[List[Tuple[int, str]], List[Tuple[int, str]]]:
+    """(line, key) of the first HEADER_LINES and the last FOOTER_LINES non-blank lines of lines [first, last)"""
+    keyed = []
+    for i in range(first, last):
+        key = line_key(text[index.starts[i]:index.ends[i]])
+        if key:
+            keyed.append((i, key))
+    head = keyed[:HEADER_LINES]
+    return head, keyed[len(head):][-FOOTER_LINES:]
+
+
+def _run(lines: List[Tuple[int, str]], boilerplate: set) -> List[int]:
+    """Lines of the leading run whose keys are boilerplate"""
+    run = []
+    for i, key in lines:
+        if key not in boilerplate:
+            break
+        run.append(i)
+    return run
+
+
+def find_boilerplate(text: str) -> Dict:
+    """
+    Repeated header/footer lines of a document
+
+    Returns:
+        {'pages': page count, 'lines': set of line keys,
+         'remove': [(start, end)] spans of the lines repeated from the
+         previous page (each a whole line with its line break),
+         'kept': [(start, end)] the boilerplate lines left in place}
+    """
+    index = LineIndex(text)
+    starts = _page_starts(text, index)
+    result = {'pages': len(starts), 'lines': set(), 'remove': [], 'kept': []}
+    if len(starts) < 2:
+        return result
+    bounds = list(zip(starts, starts[1:] + [len(index)]))
+    edges = [_edges(text, index, first, last) for first, last in bounds]
+    counts = Counter(key for head, foot in edges for key in {key for _, key in head + foot})
+    threshold = max(2, math.ceil(MIN_PAGE_SHARE * len(bounds)))
+    boilerplate = {key for key, count in counts.items()
+                   if count >= threshold and len(key) >= MIN_LINE_CHARS and not _CONTENT.search(key)}
+    result['lines'] = boilerplate
+    previous = set()
+    for head, foot in edges:
+        # Only the runs at the very top and bottom of the page: a repeated line
+        # below the first content line is content
+        run = sorted(_run(head, boilerplate) + _run(foot[::-1], boilerplate))
+        keys = {}
+        for i in run:
+            keys[i] = line_key(text[index.starts[i]:index.ends[i]])
+            # A line is dropped when the previous page had it too, so the first
+            # page of a new block (another tax period) keeps its header
+            if keys[i] in previous:
+                end = index.starts[i + 1] if i + 1 < len(index) else index.ends[i]
+                result['remove'].append((index.starts[i], end))
+            else:
+                result['kept'].append((index.starts[i], index.ends[i]))
+        previous = set(keys.values())
+    return result
@@ -0,0 +1,188 @@
+"""
+Declarative WI form calculations
+The Income / Withholding entries of form_patterns[...]['calculation'] are data,
+evaluated for all forms at once with NumPy.
+
+A calculation spec is a dict:
+
+    {'terms': ['Wages', ['Cost or Basis', -1], {'field': 'Savings Bonds', 'min': 1000}]}
+
+Each term is a field name (weight 1), a [field, weight] pair, or a dict with
+'field', optional 'weight' and optional 'min' (the field only counts when its
+value is at least 'min'). The value is the weighted sum of the terms.
+
+Conditional specs list rules; the first rule whose 'when' holds supplies the
+terms, and 'terms' on the spec itself is the fallback (0 when absent):
+
+    {'rules': [{'when': {'present': ['Taxable Amount']}, 'terms': ['Taxable Amount']}]}
+
+Conditions:
+    {'present': [fields]}                          any of the fields is non-zero/non-empty
+    {'context': name, 'above': {status: amount}}   context value above the filing status' threshold
+    {'context': name, 'above': amount}
+    {'context': name, 'equals': amount}
+
+The only context is 'combined_income': the Income of the other forms from the
+same source file and tax year. Specs that read a context are evaluated after
+every spec that does not, so dependent forms (SSA-1099) need no special case.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.money import round_dollars
+
+MEASURES = ('Income', 'Withholding')
+
+
+def _terms(spec_terms) -> List[Tuple[str, float, Optional[float]]]:
+    """Normalize terms to (field, weight, min)"""
+    terms = []
+    for term in spec_terms or []:
+        if isinstance(term, str):
+            terms.append((term, 1.0, None))
+        elif isinstance(term, dict):
+            terms.append((term['field'], float(term.get('weight', 1)), term.get('min')))
+        else:
+            field, weight = term
+            terms.append((field, float(weight), None))
+    return terms
+
+
+def _conditions(spec) -> List[Dict]:
+    return [rule['when'] for rule in spec.get('rules', [])]
+
+
+def spec_fields(spec) -> List[str]:
+    """Every field a spec reads"""
+    fields = [t[0] for t in _terms(spec.get('terms'))]
+    for rule in spec.get('rules', []):
+        fields += [t[0] for t in _terms(rule.get('terms'))]
+        fields += rule['when'].get('present', [])
+    return list(dict.fromkeys(fields))
+
+
+def spec_contexts(spec) -> List[str]:
+    """Contexts a spec depends on"""
+    return list(dict.fromkeys(c['context'] for c in _conditions(spec) if 'context' in c))
+
+
+def _number(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return 0.0
+
+
+def _present(value) -> bool:
+    return bool(value)
+
+
+class _FieldMatrix:
+    """Field values ([form, field]) and presence for the forms being evaluated"""
+
+    def __init__(self, forms: List[Dict], fields: List[str]):
+        self.columns = {name: j for j, name in enumerate(fields)}
+        self.values = np.zeros((len(forms), len(fields)), dtype=float)
+        self.present = np.zeros((len(forms), len(fields)), dtype=bool)
+        for i, form in enumerate(forms):
+            form_fields = form.get('Fields') or {}
+            for name, value in form_fields.items():
+                j = self.columns.get(name)
+                if j is not None:
+                    self.values[i, j] = _number(value)
+                    self.present[i, j] = _present(value)
+
+
+def _weighted(matrix: _FieldMatrix, rows: np.ndarray, spec_terms) -> np.ndarray:
+    total = np.zeros(len(rows), dtype=float)
+    for field, weight, minimum in _terms(spec_terms):
+        values = matrix.values[rows, matrix.columns[field]]
+        if minimum is not None:
+            values = np.where(values >= minimum, values, 0.0)
+        total += weight * values
+    return total
+
+
+def _condition(matrix: _FieldMatrix, rows: np.ndarray, when: Dict, context: Dict[str, np.ndarray],
+               filing_status: str) -> np.ndarray:
+    if 'present' in when:
+        columns = [matrix.columns[f] for f in when['present']]
+        return matrix.present[np.ix_(rows, columns)].any(axis=1)
+    values = context[when['context']][rows]
+    if 'above' in when:
+        threshold = when['above']
+        if isinstance(threshold, dict):
+            if filing_status not in threshold:
+                return np.zeros(len(rows), dtype=bool)
+            threshold = threshold[filing_status]
+        return values > threshold
+    return values == when['equals']
+
+
+def evaluate_spec(spec: Optional[Dict], matrix: _FieldMatrix, rows: np.ndarray,
+                  context: Optional[Dict[str, np.ndarray]] = None, filing_status: str = 'Single') -> np.ndarray:
+    """Value of one spec for the given form rows"""
+    if not spec:
+        return np.zeros(len(rows), dtype=float)
+    result = _weighted(matrix, rows, spec.get('terms'))
+    decided = np.zeros(len(rows), dtype=bool)
+    chosen = np.zeros(len(rows), dtype=float)
+    for rule in spec.get('rules', []):
+        hit = _condition(matrix, rows, rule['when'], context or {}, filing_status) & ~decided
+        chosen = np.where(hit, _weighted(matrix, rows, rule.get('terms')), chosen)
+        decided |= hit
+    return np.where(decided, chosen, result)
+
+
+def evaluate_calculations(wi_data: Dict, form_patterns: Dict, filing_status: str = 'Single') -> None:
+    """
+    Set Income and Withholding on every form of `wi_data` ({year: [forms]})
+
+    Forms are evaluated per (form type, measure) as array operations, in two
+    stages: specs without a context first, then specs that read
+    'combined_income' (the stage-one Income of the other forms with the same
+    source file and year). Results are snapped to whole cents.
+    """
+    forms = [form for year_forms in wi_data.values() for form in year_forms]
+    if not forms:
+        return
+    groups = {}
+    group = np.array([
+        groups.setdefault((year, form.get('SourceFile')), len(groups))
+        for year, year_forms in wi_data.items() for form in year_forms
+    ], dtype=np.intp)
+
+    calculations = {name: info.get('calculation', {}) for name, info in form_patterns.items()}
+    fields = list(dict.fromkeys(
+        f for calc in calculations.values() for m in MEASURES if calc.get(m) for f in spec_fields(calc[m])
+    ))
+    matrix = _FieldMatrix(forms, fields)
+
+    form_types = np.array([form.get('Form') for form in forms], dtype=object)
+    values = {m: np.zeros(len(forms), dtype=float) for m in MEASURES}
+    dependent = np.zeros(len(forms), dtype=bool)
+    staged: List[Tuple[int, str, str, np.ndarray]] = []
+    for name in dict.fromkeys(form_types):
+        rows = np.flatnonzero(form_types == name)
+        calc = calculations.get(name, {})
+        for m in MEASURES:
+            stage = 1 if calc.get(m) and spec_contexts(calc[m]) else 0
+            if stage and m == 'Income':
+                dependent[rows] = True
+            staged.append((stage, name, m, rows))
+
+    context: Dict[str, np.ndarray] = {}
+    for stage in (0, 1):
+        if stage == 1:
+            independent_income = np.where(dependent, 0.0, values['Income'])
+            per_group = np.zeros(len(groups), dtype=float)
+            np.add.at(per_group, group, independent_income)
+            context['combined_income'] = per_group[group]
+        for s, name, m, rows in staged:
+            if s == stage:
+                values[m][rows] = evaluate_spec(calculations.get(name, {}).get(m), matrix, rows, context, filing_status)
+
+    for i, form in enumerate(forms):
+        form['Income'] = round_dollars(values['Income'][i])
+        form['Withholding'] = round_dollars(values['Withholding'][i])
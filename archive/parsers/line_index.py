@@ -0,0 +1,74 @@
+"""
+Line offsets of a transcript string
+Lets the parsers walk the lines of a section of one document string by
+offset instead of slicing the section out and calling splitlines() on it.
+Line breaks are the ones str.splitlines() uses, so a line read through the
+index is the same text splitlines() would return.
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+from typing import Iterator, Optional, Tuple
+
+# str.splitlines() boundaries
+LINE_BREAK = re.compile(r'\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+
+
+class LineIndex:
+    """Start and end offsets of every line of a text (ends exclude the line break), built on first use"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._starts = None
+        self._ends = None
+
+    def _build(self) -> None:
+        # 4-byte offsets unless the text is too long for them
+        typecode = 'I' if len(self.text) < 2 ** 32 else 'Q'
+        starts, ends = array(typecode, [0]), array(typecode)
+        for match in LINE_BREAK.finditer(self.text):
+            ends.append(match.start())
+            starts.append(match.end())
+        ends.append(len(self.text))
+        self._starts, self._ends = starts, ends
+
+    @property
+    def starts(self) -> array:
+        if self._starts is None:
+            self._build()
+        return self._starts
+
+    @property
+    def ends(self) -> array:
+        if self._ends is None:
+            self._build()
+        return self._ends
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def line_of(self, pos: int) -> int:
+        """Index of the line containing offset `pos`"""
+        return bisect_right(self.starts, pos) - 1
+
+    def lines(self, start: int = 0, end: Optional[int] = None, first: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """
+        (start, end) offsets of the lines of text[start:end], clipped to the range
+
+        Matches text[start:end].splitlines(); `first` starts at a later line
+        (an index from line_of).
+        """
+        end = len(self.text) if end is None else end
+        if start >= end:
+            return
+        i = self.line_of(start) if first is None else first
+        starts, ends = self.starts, self.ends
+        while i < len(starts) and starts[i] < end:
+            yield max(start, starts[i]), min(end, ends[i])
+            i += 1
+
+    def line(self, start: int, end: Optional[int], i: int) -> str:
+        """Line `i` clipped to text[start:end]"""
+        end = len(self.text) if end is None else end
+        return self.text[max(start, self.starts[i]):min(end, self.ends[i])]
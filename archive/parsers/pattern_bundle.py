@@ -0,0 +1,158 @@
+"""
+Serializable WI form pattern bundle
+Packs full_form_patterns.form_patterns (regex strings, identifiers, category
+and calculation specs) into a versioned JSON document with a content hash.
+Worker processes load the bundle instead of importing the pattern module, and
+the hashes are used as cache keys so stored results can be recognised as stale
+when the patterns change.
+
+Build a bundle file:
+    python -m parsers.pattern_bundle [path]
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+from parsers.regex_backend import RegexBackend, get_regex_backend
+from parsers.text_normalize import NORMALIZE_VERSION
+from parsers.wi_parser import WINDOWS_VERSION
+
+BUNDLE_VERSION = 1
+DEFAULT_BUNDLE_PATH = os.environ.get("TIPARSER_PATTERN_BUNDLE", "form_patterns.bundle.json")
+
+# Flags extract_form_data matches with
+PATTERN_FLAGS = re.MULTILINE
+FIELD_FLAGS = re.IGNORECASE
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(_canonical(value).encode("utf-8")).hexdigest()
+
+
+def form_hash(form_info: Dict) -> str:
+    """Content hash of one form's pattern, fields, identifiers, category and calculation"""
+    return _digest({k: v for k, v in form_info.items() if k != 'hash'})
+
+
+class PatternBundle:
+    """Form patterns as plain data, with per-form and bundle hashes and lazily compiled regexes"""
+
+    def __init__(self, data: Dict, backend: Optional[RegexBackend] = None):
+        if data.get('version') != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported pattern bundle version: {data.get('version')}")
+        self.data = data
+        # Regex engine the patterns compile with; it does not change the hashes
+        self.backend = backend or get_regex_backend()
+
+    @classmethod
+    def from_patterns(cls, form_patterns: Dict, backend: Optional[RegexBackend] = None) -> "PatternBundle":
+        """Build a bundle from a form_patterns dict (specs must be data, not callables)"""
+        forms = {}
+        for name, info in form_patterns.items():
+            # Round-trip through JSON: fails on anything that is not plain data, keeps field order
+            entry = json.loads(json.dumps(info, ensure_ascii=False))
+            # Patterns match normalized text, so a normalization change re-extracts every form
+            entry['normalize'] = NORMALIZE_VERSION
+            # Forms are filed under the year of their tax period window
+            entry['windows'] = WINDOWS_VERSION
+            entry['hash'] = form_hash(entry)
+            forms[name] = entry
+        data = {'version': BUNDLE_VERSION, 'forms': forms}
+        data['hash'] = _digest([BUNDLE_VERSION, [[name, f['hash']] for name, f in forms.items()]])
+        return cls(data, backend)
+
+    @classmethod
+    def from_json(cls, text: str, backend: Optional[RegexBackend] = None) -> "PatternBundle":
+        return cls(json.loads(text), backend)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_BUNDLE_PATH, verify: bool = True,
+             backend: Optional[RegexBackend] = None) -> "PatternBundle":
+        """Load a bundle file; with verify, per-form hashes are recomputed and checked"""
+        with open(path, "r", encoding="utf-8") as f:
+            bundle = cls.from_json(f.read(), backend)
+        if verify:
+            for name, info in bundle.forms.items():
+                if form_hash(info) != info['hash']:
+                    raise ValueError(f"Pattern bundle {path} is corrupt: hash mismatch for {name}")
+        return bundle
+
+    def to_json(self) -> str:
+        return json.dumps(self.data, ensure_ascii=False)
+
+    def save(self, path: str = DEFAULT_BUNDLE_PATH) -> str:
+        """Write the bundle atomically and return its path"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+        os.replace(tmp_path, path)
+        return path
+
+    @property
+    def hash(self) -> str:
+        return self.data['hash']
+
+    @property
+    def forms(self) -> Dict[str, Dict]:
+        return self.data['forms']
+
+    @property
+    def form_patterns(self) -> Dict[str, Dict]:
+        """The bundle in the form_patterns shape extract_form_data takes"""
+        return self.forms
+
+    def form_hashes(self) -> Dict[str, str]:
+        return {name: info['hash'] for name, info in self.forms.items()}
+
+    def pattern(self, form_name: str) -> "re.Pattern":
+        """Compiled form detection pattern"""
+        return self._compile(self.forms[form_name]['pattern'], PATTERN_FLAGS)
+
+    def field(self, form_name: str, field_name: str) -> "re.Pattern":
+        """Compiled field regex"""
+        return self._compile(self.forms[form_name]['fields'][field_name], FIELD_FLAGS)
+
+    def compile_all(self) -> int:
+        """Compile every pattern up front (e.g. at worker start); returns the number of regexes"""
+        compiled = set()
+        for name, info in self.forms.items():
+            compiled.add(id(self.pattern(name)))
+            for field_name, regex in info['fields'].items():
+                if regex:
+                    compiled.add(id(self.field(name, field_name)))
+        return len(compiled)
+
+    def _compile(self, regex: str, flags: int) -> "re.Pattern":
+        return self.backend.compile(regex, flags)
+
+    def changed_forms(self, previous_hashes: Optional[Dict[str, str]]) -> List[str]:
+        """Forms added or changed since `previous_hashes` (form -> hash)"""
+        previous_hashes = previous_hashes or {}
+        return [name for name, h in self.form_hashes().items() if previous_hashes.get(name) != h]
+
+
+_default_bundle = None
+
+
+def get_pattern_bundle() -> PatternBundle:
+    """Bundle built from full_form_patterns for this process"""
+    global _default_bundle
+    if _default_bundle is None:
+        from full_form_patterns import form_patterns
+        _default_bundle = PatternBundle.from_patterns(form_patterns)
+    return _default_bundle
+
+
+if __name__ == "__main__":
+    out_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_BUNDLE_PATH
+    bundle = get_pattern_bundle()
+    bundle.save(out_path)
+    print(f"Wrote {len(bundle.forms)} forms to {out_path} (hash {bundle.hash[:12]})")
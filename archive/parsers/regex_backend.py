@@ -0,0 +1,126 @@
+"""
+Pluggable regex engine for the WI patterns
+Python's re holds the GIL for the whole match, so threads cannot run field
+extraction in parallel. The optional third-party `regex` module releases it
+when called with concurrent=True, which lets a thread pool parse many small
+WI documents at once instead of paying for worker processes. Both backends
+compile the same pattern strings with the re-compatible flags (regex runs in
+VERSION0, its re-compatible mode), so results are identical.
+
+Select a backend with TIPARSER_REGEX_BACKEND=re|regex (default re); when the
+regex module is not installed, re is used.
+"""
+
+import logging
+import os
+import re
+from typing import Dict, Optional, Type
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = os.environ.get("TIPARSER_REGEX_BACKEND", "re")
+
+# Flags both engines interpret the same way
+PORTABLE_FLAGS = re.IGNORECASE | re.MULTILINE | re.DOTALL | re.VERBOSE | re.ASCII
+
+
+class RegexBackend:
+    """Compiles pattern strings for one regex engine (compiled patterns are cached per backend)"""
+
+    name = "re"
+    # Whether matching releases the GIL, so threads can run in parallel
+    releases_gil = False
+
+    def __init__(self):
+        self._compiled: Dict = {}
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    def compile(self, pattern: str, flags: int = 0):
+        """Compiled pattern with the re.Pattern search/match/finditer/findall(text, pos, endpos) API"""
+        key = (pattern, flags & PORTABLE_FLAGS)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = self._compiled[key] = self._compile(*key)
+        return compiled
+
+    def _compile(self, pattern: str, flags: int):
+        return re.compile(pattern, flags)
+
+
+class _ConcurrentPattern:
+    """regex-module pattern that always matches with concurrent=True (GIL released)"""
+
+    __slots__ = ('_pattern', 'pattern', 'flags')
+
+    # Calls take timeout= (seconds) and raise TimeoutError when it runs out (see RegexGuard)
+    supports_timeout = True
+
+    def __init__(self, compiled):
+        self._pattern = compiled
+        self.pattern = compiled.pattern
+        self.flags = compiled.flags
+
+    def search(self, string, pos=0, endpos=None, timeout=None):
+        return self._pattern.search(string, pos, endpos, concurrent=True, timeout=timeout)
+
+    def match(self, string, pos=0, endpos=None, timeout=None):
+        return self._pattern.match(string, pos, endpos, concurrent=True, timeout=timeout)
+
+    def finditer(self, string, pos=0, endpos=None, timeout=None):
+        return self._pattern.finditer(string, pos, endpos, concurrent=True, timeout=timeout)
+
+    def findall(self, string, pos=0, endpos=None, timeout=None):
+        return self._pattern.findall(string, pos, endpos, concurrent=True, timeout=timeout)
+
+
+class RegexModuleBackend(RegexBackend):
+    """The third-party regex module, matching with the GIL released"""
+
+    name = "regex"
+    releases_gil = True
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import regex  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _compile(self, pattern: str, flags: int):
+        import regex
+        return _ConcurrentPattern(regex.compile(pattern, flags | regex.VERSION0))
+
+
+BACKENDS: Dict[str, Type[RegexBackend]] = {
+    RegexBackend.name: RegexBackend,
+    RegexModuleBackend.name: RegexModuleBackend,
+}
+
+_backends: Dict[str, RegexBackend] = {}
+
+
+def register_backend(backend: Type[RegexBackend]) -> None:
+    """Make another engine selectable by name (e.g. a binding with the same pattern API)"""
+    BACKENDS[backend.name] = backend
+
+
+def available_backends():
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def get_regex_backend(name: Optional[str] = None) -> RegexBackend:
+    """Shared backend instance by name (default: TIPARSER_REGEX_BACKEND); falls back to re if not installed"""
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown regex backend: {name} (choose from {', '.join(BACKENDS)})")
+    if not BACKENDS[name].available():
+        logger.warning(f"Regex backend '{name}' is not installed, using re")
+        name = RegexBackend.name
+    backend = _backends.get(name)
+    if backend is None:
+        backend = _backends[name] = BACKENDS[name]()
+    return backend
@@ -0,0 +1,112 @@
+"""
+Regex runtime budget for the transcript parsers
+Every regex call is timed, and a regex that runs over its budget is switched
+off for the rest of the document (its fields come out missing). How hard
+the budget is depends on the backend:
+- with the `regex` backend the remaining budget is passed as timeout=, so a
+  runaway call is stopped mid-match;
+- Python's re cannot be interrupted, so the budget is only checked between
+  calls. A call is bounded by the text it is given instead: field and
+  identifier scans see at most MAX_SECTION_SCAN_CHARS of their section, and
+  form-pattern scans go through a window in chunks of that size (scan()),
+  but one pathological call on its chunk still runs to completion.
+utils/regex_audit.py finds the patterns that need the guard in the first place.
+"""
+
+import logging
+import re
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# CPU-time budget for one regex call, and for all calls of one regex in a document
+# (thread CPU time, so waiting for the GIL under a thread pool does not count)
+CALL_BUDGET_MS = 50.0
+DOCUMENT_BUDGET_MS = 500.0
+
+# Field and identifier regexes look near the start of their form section
+MAX_SECTION_SCAN_CHARS = 20000
+# Anchored matches (AT labels and transaction rows) never need more than this
+MAX_ANCHORED_MATCH_CHARS = 2000
+
+
+class RegexGuard:
+    """Times regex calls for one document and switches off regexes that run over budget"""
+
+    def __init__(self, call_budget_ms: float = CALL_BUDGET_MS, document_budget_ms: float = DOCUMENT_BUDGET_MS,
+                 log: Optional[logging.Logger] = None):
+        self.call_budget_ms = call_budget_ms
+        self.document_budget_ms = document_budget_ms
+        self.log = log or logger
+        self.elapsed_ms: Dict[str, float] = {}
+        self.tripped: Dict[str, str] = {}
+
+    def _run(self, pattern: re.Pattern, name: Optional[str], call):
+        name = name or pattern.pattern
+        if name in self.tripped:
+            return None
+        kwargs = {}
+        if getattr(pattern, 'supports_timeout', False):
+            remaining = min(self.call_budget_ms, self.document_budget_ms - self.elapsed_ms.get(name, 0.0))
+            kwargs['timeout'] = max(remaining, 0.0) / 1000
+        started = time.thread_time_ns()
+        try:
+            result, timed_out = call(**kwargs), False
+        except TimeoutError:
+            result, timed_out = None, True
+        elapsed = (time.thread_time_ns() - started) / 1e6
+        total = self.elapsed_ms[name] = self.elapsed_ms.get(name, 0.0) + elapsed
+        if timed_out or elapsed > self.call_budget_ms or total > self.document_budget_ms:
+            reason = f"{'timed out after ' if timed_out else ''}{elapsed:.0f} ms call, {total:.0f} ms in document"
+            self.tripped[name] = reason
+            self.log.warning(f"Regex over budget ({reason}), skipped for the rest of the document: {name[:80]}")
+        return result
+
+    def search(self, pattern: re.Pattern, text: str, pos: int = 0, endpos: Optional[int] = None,
+               name: Optional[str] = None) -> Optional[re.Match]:
+        endpos = len(text) if endpos is None else endpos
+        return self._run(pattern, name, lambda **kw: pattern.search(text, pos, endpos, **kw))
+
+    def match(self, pattern: re.Pattern, text: str, pos: int = 0, endpos: Optional[int] = None,
+              name: Optional[str] = None) -> Optional[re.Match]:
+        endpos = len(text) if endpos is None else endpos
+        return self._run(pattern, name, lambda **kw: pattern.match(text, pos, endpos, **kw))
+
+    def finditer(self, pattern: re.Pattern, text: str, pos: int = 0, endpos: Optional[int] = None,
+                 name: Optional[str] = None) -> List[re.Match]:
+        endpos = len(text) if endpos is None else endpos
+        return self._run(pattern, name, lambda **kw: list(pattern.finditer(text, pos, endpos, **kw))) or []
+
+    def findall(self, pattern: re.Pattern, text: str, pos: int = 0, endpos: Optional[int] = None,
+                name: Optional[str] = None) -> List:
+        endpos = len(text) if endpos is None else endpos
+        return self._run(pattern, name, lambda **kw: pattern.findall(text, pos, endpos, **kw)) or []
+
+    def scan(self, pattern: re.Pattern, text: str, pos: int = 0, endpos: Optional[int] = None,
+             name: Optional[str] = None, chunk_chars: int = MAX_SECTION_SCAN_CHARS,
+             max_match_chars: int = MAX_ANCHORED_MATCH_CHARS) -> List[re.Match]:
+        """
+        finditer over a long span, one timed call per chunk_chars
+
+        A regex that goes over budget stops at the end of its chunk (the
+        matches found until then are kept). Each call also sees
+        max_match_chars of the next chunk, so matches up to that long
+        are the same as from a single finditer over the span.
+        """
+        endpos = len(text) if endpos is None else endpos
+        name = name or pattern.pattern
+        matches = []
+        start = pos
+        while start < endpos:
+            chunk_end = min(endpos, start + chunk_chars)
+            found = [m for m in self.finditer(pattern, text, start, min(endpos, chunk_end + max_match_chars), name)
+                     if m.start() < chunk_end]
+            matches.extend(found)
+            if name in self.tripped:
+                break
+            start = max(chunk_end, found[-1].end()) if found else chunk_end
+        return matches
+
+    def over_budget(self) -> bool:
+        return bool(self.tripped)
@@ -0,0 +1,186 @@
+"""
+One-pass transcript text normalization with an offset map
+Folds the layout and OCR noise the WI field patterns would otherwise have to
+absorb: line breaks become \\n, runs of spaces/tabs/no-break spaces become one
+space, Unicode dashes and quotes become ASCII, and O/o/l/I/|/S misread inside
+dollar amounts become digits. The result is a NormalizedText: a str (every
+regex and slice works on it as usual) that also maps its offsets back to the
+original text, so positions in logs and snippets refer to the extracted text.
+
+Before folding, header/footer lines repeated on every page are dropped
+(parsers.boilerplate), so the offset map runs through two steps.
+
+Normalization runs once per document; TextCache.normalized() keeps the result
+next to the cached text.
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+from typing import Iterable, Optional, Sequence, Tuple
+
+from parsers.boilerplate import find_boilerplate
+
+# Bump when the output changes: it is part of every form hash (see pattern_bundle)
+NORMALIZE_VERSION = 3
+
+# One-for-one folds, applied with str.translate: offsets do not move
+_FOLD = str.maketrans({
+    **{c: ' ' for c in (0x09, 0xa0, *range(0x2000, 0x200b), 0x202f, 0x205f, 0x3000)},
+    **{c: '\n' for c in (0x0b, 0x0c, 0x1c, 0x1d, 0x1e, 0x85, 0x2028, 0x2029)},
+    **{c: '-' for c in (*range(0x2010, 0x2016), 0x2212, 0xfe58, 0xfe63, 0xff0d)},
+    **{c: "'" for c in (0x2018, 0x2019, 0x201a, 0x201b, 0x2032)},
+    **{c: '"' for c in (0x201c, 0x201d, 0x201e, 0x201f, 0x2033)},
+})
+
+_OCR_DIGITS = 'OolI|S'
+_OCR_FOLD = str.maketrans(_OCR_DIGITS, '001115')
+
+# Edits on the folded text: CRLF / CR, space runs, and dollar amounts with a misread digit
+_NORMALIZE = re.compile(
+    r'(?P<br>\r\n?)'
+    r'|(?P<space>  +)'
+    rf'|(?P<amount>\$(?=[0-9,.]*[{_OCR_DIGITS}])'
+    rf'[0-9{_OCR_DIGITS}]{{1,3}}(?:,[0-9{_OCR_DIGITS}]{{3}})*(?:\.[0-9{_OCR_DIGITS}]{{2}})?(?!\w))'
+)
+_REPLACEMENTS = {'br': '\n', 'space': ' '}
+
+
+class NormalizedText(str):
+    """
+    Text derived from `source` by replacing spans, with offsets back to it
+
+    Anchors are the (derived, source) offsets where a replacement changed the
+    length; between anchors the two texts are aligned. A NormalizedText can
+    be derived from another one; to_original() follows the chain back to the
+    extracted text.
+    """
+
+    def __new__(cls, text: str = '', source: Optional[str] = None, anchors: Iterable[Tuple[int, int]] = ()):
+        obj = super().__new__(cls, text)
+        obj.source = text if source is None else source
+        # 4-byte offsets unless the text is too long for them
+        typecode = 'I' if len(obj.source) < 2 ** 32 else 'Q'
+        obj._derived = array(typecode)
+        obj._source = array(typecode)
+        for derived, source_pos in anchors:
+            obj._derived.append(derived)
+            obj._source.append(source_pos)
+        return obj
+
+    @property
+    def original(self) -> str:
+        """The extracted text this one was derived from"""
+        source = self.source
+        return source.original if isinstance(source, NormalizedText) else source
+
+    @property
+    def anchors(self):
+        return list(zip(self._derived, self._source))
+
+    def to_source(self, pos: int) -> int:
+        """Offset in `source` of offset `pos` (positions inside a replacement map to its source span)"""
+        i = bisect_right(self._derived, pos) - 1
+        if i < 0:
+            return pos
+        mapped = self._source[i] + (pos - self._derived[i])
+        limit = self._source[i + 1] if i + 1 < len(self._source) else len(self.source)
+        return min(mapped, limit)
+
+    def to_original(self, pos: int) -> int:
+        """Offset in the extracted text of offset `pos`"""
+        pos = self.to_source(pos)
+        return self.source.to_original(pos) if isinstance(self.source, NormalizedText) else pos
+
+    def original_snippet(self, start: int, end: int) -> str:
+        """Extracted text behind text[start:end]"""
+        return self.original[self.to_original(start):self.to_original(end)]
+
+
+def rewrite(text: str, edits: Iterable[Tuple[int, int, str]]) -> NormalizedText:
+    """
+    Apply (start, end, replacement) edits to text, recording the offset map
+
+    Edits must be sorted and must not overlap.
+    """
+    pieces, anchors = [], []
+    last = 0
+    derived = 0
+    for start, end, replacement in edits:
+        if start > last:
+            pieces.append(text[last:start])
+            derived += start - last
+        pieces.append(replacement)
+        if len(replacement) != end - start:
+            anchors.append((derived, start))
+            anchors.append((derived + len(replacement), end))
+        derived += len(replacement)
+        last = end
+    pieces.append(text[last:])
+    return NormalizedText(''.join(pieces), text, anchors)
+
+
+def strip_boilerplate(text: str, removed: Optional[Sequence[Tuple[int, int]]] = None) -> NormalizedText:
+    """
+    Text without the page header/footer lines repeated from page to page
+
+    `removed` replays spans found earlier (stored with a cached text) instead
+    of detecting them. The result's `removed` and `boilerplate` attributes
+    hold the dropped spans (offsets in `text`) and the header/footer lines
+    left in place (offsets in the result).
+    """
+    kept = []
+    if removed is None:
+        found = find_boilerplate(text)
+        removed, kept = found['remove'], found['kept']
+    stripped = rewrite(text, ((start, end, '') for start, end in removed))
+    stripped.removed = [tuple(span) for span in removed]
+    # Kept lines never overlap a dropped one: shift them by what was dropped before them
+    shifted, dropped, i = [], 0, 0
+    for start, end in kept:
+        while i < len(removed) and removed[i][0] < start:
+            dropped += removed[i][1] - removed[i][0]
+            i += 1
+        shifted.append((start - dropped, end - dropped))
+    stripped.boilerplate = shifted
+    return stripped
+
+
+def normalize_text(text: str, removed: Optional[Sequence[Tuple[int, int]]] = None) -> NormalizedText:
+    """
+    Normalized copy of a transcript text (a NormalizedText is returned as is)
+
+    Repeated page headers/footers are stripped first (see strip_boilerplate;
+    `removed` replays stored spans).
+    """
+    if isinstance(text, NormalizedText):
+        return text
+    stripped = strip_boilerplate(text, removed)
+    source = stripped if stripped.removed else text
+    folded = source.translate(_FOLD)
+    # rewrite() inlined: documents have tens of thousands of space runs
+    pieces, anchors = [], []
+    append, anchor = pieces.append, anchors.append
+    last = derived = 0
+    for match in _NORMALIZE.finditer(folded):
+        kind = match.lastgroup
+        if kind == 'amount':
+            found = match.group()
+            # Only amounts that have real digits next to the misread ones
+            if not any(c.isdigit() for c in found):
+                continue
+            replacement = found.translate(_OCR_FOLD)
+        else:
+            replacement = _REPLACEMENTS[kind]
+        start, end = match.span()
+        if start > last:
+            append(folded[last:start])
+            derived += start - last
+        append(replacement)
+        if len(replacement) != end - start:
+            anchor((derived, start))
+            anchor((derived + len(replacement), end))
+        derived += len(replacement)
+        last = end
+    append(folded[last:])
+    return NormalizedText(''.join(pieces), source, anchors)
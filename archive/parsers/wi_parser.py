@@ -0,0 +1,418 @@
+"""
+Wage & Income (WI) transcript parser
+Header info and per-form field extraction for WI transcripts. Form matching
+is driven by the form pattern table (full_form_patterns / PatternBundle);
+Income and Withholding come from its declarative calculation specs
+"""
+
+import contextvars
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from parsers.line_index import LineIndex
+from parsers.regex_backend import RegexBackend, get_regex_backend
+from parsers.regex_guard import MAX_SECTION_SCAN_CHARS, RegexGuard
+from parsers.text_normalize import normalize_text
+from utils.money import to_cents, to_dollars
+
+logger = logging.getLogger(__name__)
+
+# "Tax Period Requested: Month, YYYY" (one per period of a combined packet)
+TAX_PERIOD_PATTERN = re.compile(r'Tax\s+Period\s+Requested:\s*([A-Za-z]+),\s*(\d{4})', re.IGNORECASE)
+# Bump when the year windows change: it is part of every form hash (see pattern_bundle)
+WINDOWS_VERSION = 1
+# Year windows of packets this long are parsed on a thread pool
+PARALLEL_PACKET_CHARS = 200_000
+
+
+def parse_wi_header(text: str, log: Optional[logging.Logger] = None) -> Tuple[str, List[str], int]:
+    """SSN, requested tax periods and the first requested tax year of a WI transcript"""
+    log = log or logger
+    log.info("Extracting header information")
+    
+    # Updated SSN pattern to match "SSN Provided: XXX-XX-XXXX"
+    ssn_match = re.search(r'SSN\s+Provided:\s*([\d\-Xx]{9,})', text, re.IGNORECASE)
+    ssn = ssn_match.group(1) if ssn_match else 'UNKNOWN'
+    
+    # Updated tax period pattern to match "Tax Period Requested: Month, YYYY"
+    tax_period_matches = TAX_PERIOD_PATTERN.findall(text)
+    tax_periods = [f"{month} {year}" for month, year in tax_period_matches]
+    tax_year = int(tax_period_matches[0][1]) if tax_period_matches else 0
+    
+    log.info(f"Found SSN: {ssn} | Tax Periods: {', '.join(tax_periods)}")
+    
+    return ssn, tax_periods, tax_year
+
+
+# Payer / employer identifiers
+EIN_PATTERN = re.compile(r'Employer Identification Number \(EIN\):\s*([\d\-]+)')
+EMPLOYER_PATTERN = re.compile(r'Employer:\s*([A-Z0-9 &.,\-]+)')
+FIN_PATTERN = re.compile(r"Payer's Federal Identification Number \(FIN\):\s*([\d\-]+)")
+PAYER_PATTERN = re.compile(r'Payer:\s*([A-Z0-9 &.,\-]+)')
+
+FORM_HEADER = re.compile(r'(^|\n)\s*Form [A-Z0-9\-]+', re.IGNORECASE)
+# Lines that mention a form without starting one (check boxes, instructions)
+NOT_A_FORM_HEADER = re.compile(r'check box|applicable|transactions that do not flow|indicator', re.IGNORECASE)
+
+
+def find_form_headers(text: str) -> List[Tuple[str, int, int]]:
+    """'Form ...' headers in a transcript as (label, start, end)"""
+    headers = []
+    for match in FORM_HEADER.finditer(text):
+        line_start = text.rfind('\n', 0, match.start()) + 1
+        line_end = text.find('\n', match.end())
+        if line_end == -1:
+            line_end = len(text)
+        if NOT_A_FORM_HEADER.search(text, line_start, line_end):
+            continue
+        headers.append((match.group(0).strip(), match.start(), match.end()))
+    return headers
+
+
+def unmatched_form_headers(text: str, form_patterns: Dict,
+                           headers: Optional[List[Tuple[str, int, int]]] = None,
+                           matched_spans: Optional[List[Tuple[int, int]]] = None) -> List[Tuple[str, int, int]]:
+    """Form headers not inside any form pattern match (`matched_spans` reuses matches already found)"""
+    headers = find_form_headers(text) if headers is None else headers
+    if not headers:
+        return []
+    if matched_spans is None:
+        matched_spans = [
+            (m.start(), m.end())
+            for pattern_info in form_patterns.values()
+            for m in re.finditer(pattern_info['pattern'], text, re.MULTILINE)
+        ]
+    return [h for h in headers if not any(ms <= h[1] < me for ms, me in matched_spans)]
+
+
+def _payer_blurb(text: str, line_index: LineIndex, start: int, end: int, label: str,
+                 strip_first: bool = True) -> Optional[str]:
+    """The section line holding `label` plus up to 3 following lines, stopping at Recipient: or a blank line"""
+    pos = text.find(label, start, end)
+    if pos == -1:
+        return None
+    first = line_index.line_of(pos)
+    blurb_lines = []
+    for i, (line_start, line_end) in enumerate(line_index.lines(start, end, first)):
+        line = text[line_start:line_end]
+        line = line.strip() if i or strip_first else line
+        if i and (not line or line.startswith('Recipient:')):
+            break
+        blurb_lines.append(line)
+        if i == 3:
+            break
+    return '\n'.join(blurb_lines).strip()
+
+
+def parse_wi_forms(text: str, form_patterns: Dict, tax_year: int, filing_status: str = 'Single',
+                   output_buffer=None, filename: Optional[str] = None, log: Optional[logging.Logger] = None,
+                   only_forms: Optional[Iterable[str]] = None, calculate: bool = True,
+                   guard: Optional[RegexGuard] = None, backend: Optional[RegexBackend] = None,
+                   workers: Optional[int] = None) -> Dict[int, List[Dict]]:
+    """
+    Extract WI forms from a transcript text
+
+    A combined multi-year packet is split at its "Tax Period Requested"
+    headers (see tax_period_windows); each window is parsed on its own and
+    its forms are filed under the window's year.
+
+    Args:
+        text: Transcript text; it is normalized first (see parsers/text_normalize.py)
+            unless it already is a NormalizedText (e.g. from TextCache.normalized)
+        form_patterns: Form name -> pattern info (full_form_patterns or a PatternBundle)
+        tax_year: Tax year of the forms when the text has no tax period
+            header; otherwise unused (forms before the first header are
+            filed under that header's year)
+        filing_status: Filing status for the SSA-1099 calculation
+        output_buffer: Optional stream that receives a copy of the log
+        filename: Source file name, for log messages
+        only_forms: Restrict extraction to these forms (incremental re-parse)
+        calculate: Evaluate Income/Withholding; without it both stay 0 and
+            the caller evaluates the calculations itself
+        guard: Regex runtime budget (default: a fresh RegexGuard per call).
+            Field and identifier regexes only scan the first
+            MAX_SECTION_SCAN_CHARS of a form section, and form patterns
+            scan a window in chunks of that size
+        backend: Regex engine (default: get_regex_backend())
+        workers: Threads for the year windows of packets of PARALLEL_PACKET_CHARS
+            or more (default: 8 with a GIL-releasing backend, else 1)
+
+    Returns:
+        {tax_year: [form dicts]}
+    """
+    log = log or logger
+    text = normalize_text(text)
+    guard = guard or RegexGuard(log=log)
+    backend = backend or get_regex_backend()
+    workers = workers or (8 if backend.releases_gil else 1)
+    if only_forms is not None:
+        only_forms = set(only_forms)
+    def write_out(msg):
+        log.info(msg)
+        if output_buffer:
+            output_buffer.write(msg + "\n")
+    write_out("Starting form pattern matching")
+    line_index = LineIndex(text)
+    windows = tax_period_windows(text, tax_year)
+    if len(windows) > 1:
+        write_out(f"Tax period windows: {', '.join(f'{year} [{start}:{end}]' for year, start, end in windows)}")
+
+    def parse(window):
+        year, start, end = window
+        messages = []
+        forms, spans = _parse_window(text, line_index, form_patterns, year, start, end, only_forms,
+                                     messages.append, guard, backend)
+        return year, forms, spans, messages
+
+    if workers > 1 and len(windows) > 1 and len(text) >= PARALLEL_PACKET_CHARS:
+        line_index.starts  # built once, before the threads share it
+        with ThreadPoolExecutor(max_workers=min(workers, len(windows))) as pool:
+            parsed = list(_map_in_context(pool, parse, windows))
+    else:
+        parsed = map(parse, windows)
+    results = {}
+    matched_spans = []
+    for year, forms, spans, messages in parsed:
+        # Window logs are replayed in text order, whichever thread ran them
+        for msg in messages:
+            write_out(msg)
+        if forms:
+            results.setdefault(year, []).extend(forms)
+        matched_spans.extend(spans)
+    # Unmatched "Form ..." lines are only meaningful against the full pattern set
+    form_like_sections = find_form_headers(text) if only_forms is None else []
+    for form_label, start, end in unmatched_form_headers(text, form_patterns, form_like_sections, matched_spans):
+        # Position and snippet refer to the extracted text, which the critical tab shows
+        start, end = text.to_original(start), text.to_original(end)
+        snippet = text.original[start-30:end+70] if start > 30 else text.original[start:end+70]
+        fname = filename if filename else "UNKNOWN"
+        write_out(f"Potential form detected in text but no pattern matched: '{form_label}' at position {start}. [FILENAME: {fname}] Snippet: {snippet}")
+    if calculate:
+        calculate_forms(results, form_patterns, filing_status, write_out)
+    write_out("Form processing completed")
+    return results
+
+
+def _map_in_context(pool: ThreadPoolExecutor, fn, items):
+    """
+    pool.map running each call in a copy of the caller's context, so context
+    variables such as the run log capture (utils/run_log.py) reach the threads
+    """
+    items = list(items)
+    contexts = [contextvars.copy_context() for _ in items]
+    return pool.map(lambda context, item: context.run(fn, item), contexts, items)
+
+
+def tax_period_windows(text: str, tax_year: int = 0) -> List[Tuple[int, int, int]]:
+    """
+    (year, start, end) spans of a transcript, one per requested tax period
+
+    A window starts at the line of a "Tax Period Requested" header whose year
+    differs from the previous one (repeated page headers of the same period
+    stay in one window). Text before the first header belongs to the first
+    window; `tax_year` is the year of a text without headers.
+    """
+    windows = []
+    for match in TAX_PERIOD_PATTERN.finditer(text):
+        year = int(match.group(2))
+        if windows and windows[-1][0] == year:
+            continue
+        start = text.rfind('\n', 0, match.start()) + 1 if windows else 0
+        if windows:
+            windows[-1][2] = start
+        windows.append([year, start, len(text)])
+    return [tuple(window) for window in windows] or [(tax_year, 0, len(text))]
+
+
+def _parse_window(text: str, line_index: LineIndex, form_patterns: Dict, tax_year: int,
+                  window_start: int, window_end: int, only_forms: Optional[set], write_out,
+                  guard: RegexGuard, backend: RegexBackend) -> Tuple[List[Dict], List[Tuple[int, int]]]:
+    """Forms of text[window_start:window_end], filed under tax_year, and the spans of their pattern matches"""
+    forms = []
+    matched_spans = []
+    for form_name, pattern_info in form_patterns.items():
+        if only_forms is not None and form_name not in only_forms:
+            continue
+        write_out(f"Processing form: {form_name}")
+        matches = guard.scan(backend.compile(pattern_info['pattern'], re.MULTILINE), text, window_start, window_end,
+                             name=f"{form_name} pattern")
+        if not matches:
+            write_out(f"Form {form_name}: No pattern match found")
+            continue
+        matched_spans.extend((m.start(), m.end()) for m in matches)
+        for idx, match in enumerate(matches):
+            start = match.start()
+            end = matches[idx + 1].start() if idx + 1 < len(matches) else window_end
+            # The section is text[start:end]; regexes scan it in place through pos/endpos
+            scan_end = min(end, start + MAX_SECTION_SCAN_CHARS)
+            # Extract unique identifiers
+            unique_id = None
+            unique_label = None
+            # Improved: Only grab the FIN line and next 1-3 lines (payer name/address), stop at Recipient: or blank
+            payer_blurb = _payer_blurb(text, line_index, start, end, "Payer's Federal Identification Number (FIN):",
+                                       strip_first=False)
+            if not payer_blurb:
+                # Fallback: try to grab lines after 'Payer:' up to 3 lines
+                payer_blurb = _payer_blurb(text, line_index, start, end, 'Payer:')
+            if form_name == 'W-2':
+                ein_match = guard.search(backend.compile(EIN_PATTERN.pattern), text, start, scan_end)
+                unique_id = ein_match.group(1) if ein_match else 'UNKNOWN'
+                employer_match = guard.search(backend.compile(EMPLOYER_PATTERN.pattern), text, start, scan_end)
+                unique_label = employer_match.group(1).strip() if employer_match else 'UNKNOWN'
+            elif form_name == '1099-INT':
+                fin_match = guard.search(backend.compile(FIN_PATTERN.pattern), text, start, scan_end)
+                unique_id = fin_match.group(1) if fin_match else 'UNKNOWN'
+                payer_match = guard.search(backend.compile(PAYER_PATTERN.pattern), text, start, scan_end)
+                unique_label = payer_match.group(1).strip() if payer_match else 'UNKNOWN'
+            elif form_name.startswith('1099'):
+                payer_match = guard.search(backend.compile(PAYER_PATTERN.pattern), text, start, scan_end)
+                unique_label = payer_match.group(1).strip() if payer_match else None
+            if form_name == 'W-2':
+                label_str = f" (EIN: {unique_id}, Employer: {unique_label})"
+            elif form_name == '1099-INT':
+                label_str = f" (FIN: {unique_id}, Payer: {unique_label})"
+            elif form_name.startswith('1099') and unique_label:
+                label_str = f", Payer: {unique_label}"
+            else:
+                label_str = ""
+            write_out(f"Form {form_name} #{idx+1}{label_str}:")
+            write_out("Pattern matched successfully")
+            write_out(f"Using tax year {tax_year}")
+            fields_data = {}
+            write_out("Starting field extraction")
+            for field_name, regex in pattern_info['fields'].items():
+                if regex:
+                    if field_name == 'TY Payments':
+                        all_ty = guard.findall(backend.compile(regex, re.IGNORECASE), text, start, scan_end, name=f"{form_name}.{field_name}")
+                        if all_ty:
+                            fields_data[field_name] = all_ty
+                            write_out(f"Field {field_name} = {all_ty}")
+                        else:
+                            write_out(f"Field {field_name} - No match found (Regex: {regex})")
+                            write_out(f"Raw snippet: {text[start:min(end, start + 200)]}...")
+                    else:
+                        field_match = guard.search(backend.compile(regex, re.IGNORECASE), text, start, scan_end, name=f"{form_name}.{field_name}")
+                        if field_match:
+                            value = to_dollars(to_cents(field_match.group(1)))
+                            fields_data[field_name] = value
+                            write_out(f"Field {field_name} = {value}")
+                            write_out(f"Matched text for {field_name}: {field_match.group(0)}")
+                        else:
+                            write_out(f"Field {field_name} - No match found (Regex: {regex})")
+                            write_out(f"Raw snippet: {text[start:min(end, start + 200)]}...")
+            write_out(f"All extracted fields for {form_name}: {fields_data}")
+            if not fields_data:
+                write_out(f"Form {form_name} matched but no fields were captured. Fields attempted: {list(pattern_info['fields'].keys())}")
+                write_out(f"Raw form text snippet: {text[start:min(end, start + 300)]}...")
+                continue
+            category = pattern_info.get('category', 'Neither')
+            write_out(f"Form {form_name} captured, Category: {category}")
+            forms.append({
+                'Form': form_name,
+                'UniqueID': unique_id if unique_id else None,
+                'Label': unique_label if unique_label else None,
+                'Income': 0.0,
+                'Withholding': 0.0,
+                'Category': category,
+                'Fields': fields_data,
+                'PayerBlurb': payer_blurb
+            })
+    return forms, matched_spans
+
+
+def calculate_forms(results: Dict[int, List[Dict]], form_patterns: Dict, filing_status: str = 'Single',
+                    write_out=None) -> None:
+    """Income / Withholding for every form of one file's results, in one batch (see parsers/form_calc.py)"""
+    from parsers.form_calc import evaluate_calculations
+    write_out = write_out or logger.info
+    evaluate_calculations(results, form_patterns, filing_status)
+    for year_forms in results.values():
+        for form in year_forms:
+            write_out(f"Calculated values for {form['Form']} - Income: {form['Income']}, Withholding: {form['Withholding']}, "
+                      f"Category: {form['Category']}, Fields: {form['Fields']}")
+
+
+def parse_wi_text(text: str, form_patterns: Dict, filing_status: str = 'Single', filename: Optional[str] = None,
+                  workers: Optional[int] = None, backend: Optional[RegexBackend] = None,
+                  log: Optional[logging.Logger] = None) -> Dict:
+    """
+    Header and forms of one WI transcript text
+
+    Returns:
+        {'ssn', 'tax_periods', 'tax_year', 'forms': {tax_year: [form dicts]},
+         'error' (None, or why the file could not be parsed; its forms are then empty)}
+    """
+    log = log or logger
+    try:
+        ssn, tax_periods, tax_year = parse_wi_header(text, log=log)
+        forms = parse_wi_forms(text, form_patterns, tax_year, filing_status=filing_status, filename=filename,
+                               log=log, backend=backend, workers=workers)
+    except Exception as e:
+        log.error(f"Failed to parse {filename}: {e}")
+        return {'ssn': None, 'tax_periods': [], 'tax_year': 0, 'forms': {}, 'error': str(e)}
+    return {'ssn': ssn, 'tax_periods': tax_periods, 'tax_year': tax_year, 'forms': forms, 'error': None}
+
+
+def iter_wi_texts(texts: Iterable[Tuple[str, str]], form_patterns: Dict, filing_status: str = 'Single',
+                  workers: Optional[int] = None, backend: Optional[RegexBackend] = None,
+                  log: Optional[logging.Logger] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Parse WI texts as they arrive, yielding (filename, parse_wi_text result) as each file is done
+
+    `texts` is read lazily, so it can be a generator that downloads and
+    extracts the files. With one worker each file is parsed as soon as its
+    text is produced; with more, files are parsed on a thread pool while the
+    next text is produced and are yielded in the order they finish.
+    Threads only run in parallel with a backend that releases the GIL
+    (TIPARSER_REGEX_BACKEND=regex); with re they take turns, so the pool
+    defaults to one thread there.
+
+    Args:
+        texts: (filename, transcript text) pairs
+        workers: Threads (default: 8 with a GIL-releasing backend, else 1)
+    """
+    backend = backend or get_regex_backend()
+    workers = workers or (8 if backend.releases_gil else 1)
+    if workers <= 1:
+        for filename, text in texts:
+            yield filename, parse_wi_text(text, form_patterns, filing_status, filename, 1, backend, log)
+        return
+
+    def parse(filename, text):
+        # One pool: the year windows of each file are parsed serially
+        return filename, parse_wi_text(text, form_patterns, filing_status, filename, 1, backend, log)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for filename, text in texts:
+            # Each task runs in a copy of this context (run log capture)
+            pending.append(pool.submit(contextvars.copy_context().run, parse, filename, text))
+            for future in [f for f in pending if f.done()]:
+                pending.remove(future)
+                yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def parse_wi_texts(texts: Dict[str, str], form_patterns: Dict, filing_status: str = 'Single',
+                   workers: Optional[int] = None, backend: Optional[RegexBackend] = None,
+                   log: Optional[logging.Logger] = None) -> Dict[str, Dict]:
+    """
+    Parse many WI transcript texts on a thread pool (see iter_wi_texts)
+
+    Args:
+        texts: {filename: transcript text}
+        workers: Threads (default: 8 with a GIL-releasing backend, else 1)
+
+    Returns:
+        {filename: parse_wi_text result}, in the order of `texts`
+    """
+    backend = backend or get_regex_backend()
+    if len(texts) == 1:
+        # A single packet can use the threads for its year windows instead
+        (filename, text), = texts.items()
+        return {filename: parse_wi_text(text, form_patterns, filing_status, filename, workers, backend, log)}
+    results = dict(iter_wi_texts(texts.items(), form_patterns, filing_status, workers, backend, log))
+    return {filename: results[filename] for filename in texts}
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-session artifact store
+"""
+
+import os
+import time
+
+import pytest
+
+from utils.artifact_store import SessionArtifactStore
+
+
+def test_spill_and_load_round_trip(tmp_path):
+    store = SessionArtifactStore(str(tmp_path))
+    session = store.new_session_id()
+    text = store.put(session, 'wi_log', "line 1\nline 2\n")
+    data = store.put(session, 'wi_texts', {'WI 22': "Form W-2", 'count': 2})
+    assert text == {'session': session, 'name': 'wi_log', 'kind': 'text', 'bytes': 14}
+    assert data['kind'] == 'json'
+    assert store.get(text) == "line 1\nline 2\n"
+    assert store.get(data) == {'WI 22': "Form W-2", 'count': 2}
+    assert store.get(None, default='none') == 'none'
+    assert store.usage(session) == 14 + data['bytes']
+    store.delete_session(session)
+    assert store.get(text, default='gone') == 'gone' and store.usage(session) == 0
+
+
+def test_quota_evicts_least_recently_used_artifacts(tmp_path):
+    store = SessionArtifactStore(str(tmp_path), quota_bytes=25)
+    session = store.new_session_id()
+    old = store.put(session, 'old', "a" * 10)
+    used = store.put(session, 'used', "b" * 10)
+    # 'old' was written first but read since, so 'used' is now the least recently used
+    stamp = time.time() - 60
+    os.utime(store._path(session, 'used'), (stamp, stamp))
+    os.utime(store._path(session, 'old'), (stamp + 30, stamp + 30))
+    new = store.put(session, 'new', "c" * 10)
+    assert store.get(used) is None
+    assert store.get(old) == "a" * 10 and store.get(new) == "c" * 10
+    assert store.usage(session) == 20
+    with pytest.raises(ValueError):
+        store.put(session, 'huge', "d" * 26)
+
+
+def test_cleanup_removes_idle_sessions(tmp_path):
+    store = SessionArtifactStore(str(tmp_path), ttl_seconds=3600)
+    idle, active = store.new_session_id(), store.new_session_id()
+    idle_handle = store.put(idle, 'wi_log', "idle")
+    active_handle = store.put(active, 'wi_log', "active")
+    now = time.time()
+    os.utime(os.path.join(tmp_path, idle, '.last_seen'), (now - 7200, now - 7200))
+    assert store.cleanup_expired(now) == 1
+    assert store.get(idle_handle) is None and not os.path.exists(os.path.join(tmp_path, idle))
+    assert store.get(active_handle) == "active"
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Tests for the transaction code catalog
+"""
+
+from parsers import at_codes
+from parsers.at_codes import (ALERT_CATEGORIES, AT_CODES, CATALOG, CLOSING_CODES, CODE_FAMILIES,
+                              TransactionCodeCatalog)
+
+
+def test_codes_resolve_to_entries_and_alert_categories():
+    assert CATALOG.meaning('420') == "Examination (audit) opened"
+    assert CATALOG.meaning(' 420 ') == CATALOG.meaning(420)
+    assert CATALOG.categories('420') == ['Audit Alerts']
+    assert CATALOG.categories('150') == []
+    assert CATALOG.info(None) is None and CATALOG.meaning('n/a', default='?') == '?'
+    alerts = CATALOG.alerts([{'code': '420', 'date': '2023-01-09', 'tax_year': '2021'}, {'code': '150'}])
+    assert [(a['category'], a['severity'], a['tax_year']) for a in alerts] == [('Audit Alerts', 'error', '2021')]
+
+
+def test_unlisted_codes_fall_back_to_their_family():
+    listed = {str(info['code']) for info in AT_CODES}
+    for family in CODE_FAMILIES:
+        low, high = (int(part) for part in family['range'].split('-'))
+        code = next(f"{n:03d}" for n in range(low, high + 1) if f"{n:03d}" not in listed)
+        assert CATALOG.info(code) == {'code': code, 'meaning': family['meaning'], 'family': family['family']}
+
+
+def test_closing_codes_close_alerted_openers():
+    for opener, closers in CLOSING_CODES.items():
+        assert CATALOG.categories(opener), opener
+        assert closers and all(CATALOG.meaning(code) for code in closers)
+
+
+def test_ranged_alerts_and_bounded_memo(monkeypatch):
+    monkeypatch.setattr(at_codes, 'RESOLVED_CACHE_SIZE', 8)
+    categories = {**ALERT_CATEGORIES, 'Status': {'codes': ['970-979'], 'severity': 'info', 'icon': 'i'}}
+    catalog = TransactionCodeCatalog(AT_CODES, categories, CODE_FAMILIES)
+    assert catalog.categories('971') == ['Status'] and catalog.categories('980') == []
+    for code in range(1000, 1100):
+        catalog.categories(str(code))
+    assert catalog._resolve_key.cache_info().currsize == 8
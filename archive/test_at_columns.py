@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar AT store
+"""
+
+from utils.at_columns import ATColumns
+
+AT_DATA = [
+    {
+        'tax_year': '2020', 'account_balance': 5000.0, 'accrued_interest': 120.5, 'accrued_penalty': 80.0,
+        'total_balance': 5200.5, 'adjusted_gross_income': 45000.0, 'taxable_income': 32600.0,
+        'tax_per_return': 3900.0, 'se_tax_taxpayer': 0.0, 'se_tax_spouse': 0.0, 'total_se_tax': 0.0,
+        'filing_status': 'Single', 'processing_date': 'Jun. 07, 2021',
+        'transactions': [
+            {'code': '150', 'meaning': 'Tax return filed', 'cycle_date': '2021-22-05', 'date': '2021-06-07', 'amount': 3900.0},
+            {'code': '420', 'meaning': 'Examination', 'cycle_date': '', 'date': '06-07-2021', 'amount': 0.0},
+            {'code': '196', 'meaning': 'Interest charged', 'cycle_date': '', 'date': '2021-06-07', 'amount': 12.3},
+        ],
+        'owner': 'TP', 'source_file': 'AT 20 TP.pdf'
+    },
+    {
+        'tax_year': '2019', 'account_balance': 1234.0, 'accrued_interest': 0.0, 'accrued_penalty': 0.0,
+        'total_balance': 0.0, 'adjusted_gross_income': 0.0, 'taxable_income': 0.0, 'tax_per_return': 0.0,
+        'se_tax_taxpayer': 0.0, 'se_tax_spouse': 0.0, 'total_se_tax': 0.0,
+        'transactions': [
+            {'code': 'n/a', 'meaning': 'No tax return filed', 'cycle_date': '', 'date': '', 'amount': 0.0},
+            {'code': '520', 'meaning': 'Litigation', 'cycle_date': '', 'date': '2020-03-01', 'amount': 0.0},
+        ],
+        'owner': 'S', 'source_file': 'AT 19 S.pdf'
+    },
+]
+
+
+def test_round_trip():
+    assert ATColumns.from_records(AT_DATA).to_records() == AT_DATA
+
+
+def test_totals_and_filters():
+    columns = ATColumns.from_records(AT_DATA)
+    assert columns.totals_by_year()['2020']['account_balance'] == 5000.0
+    assert columns.group_total('interest') == 12.3
+    assert columns.amount_total(columns.mask(years=['2020'], owners=['TP'])) == 3912.3
+    assert columns.mask(codes=['420', '520']).sum() == 2
+
+
+def test_alerts():
+    alerts = ATColumns.from_records(AT_DATA).alerts()
+    assert [(a['code'], a['category'], a['tax_year']) for a in alerts] == [
+        ('420', 'Audit Alerts', '2020'),
+        ('520', 'Collection Alerts', '2019'),
+        ('520', 'Litigation/Freezes', '2019'),
+    ]
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass Account Transcript parser
+"""
+
+from parsers.at_parser import parse_at_transcript
+
+COMPACT_TRANSCRIPT = """Account Transcript
+FORM NUMBER: 1040
+TAX PERIOD: Dec. 31, 2020
+ACCOUNT BALANCE: 5,000.00
+ACCRUED INTEREST: 120.50 AS OF: Apr. 24, 2023
+ACCRUED PENALTY: 80.00 AS OF: Apr. 24, 2023
+ACCOUNT BALANCE PLUS ACCRUALS (this is not a payoff amount): 5,200.50
+FILING STATUS: Single
+ADJUSTED GROSS INCOME:
+45,000.00
+TAXABLE INCOME: 32,600.00
+TAX PER RETURN: 3,900.00
+SE TAXABLE INCOME TAXPAYER: 0.00
+PROCESSING DATE: Jun. 07, 2021
+TRANSACTIONS
+CODE EXPLANATION OF TRANSACTION CYCLE DATE AMOUNT
+150 Tax return filed 20212205 06-07-2021 $3,900.00
+806 W-2 or 1099 withholding 04-15-2021 -$1,000.00
+196 Interest charged for late payment 20212205 06-07-2021
+$12.30
+"""
+
+SPACED_TRANSCRIPT = """Account Transcript
+Report for Tax Period Ending: 12-31-2019
+Account balance: $1,234.00
+Filing status: Married Filing Jointly, something
+TRANSACTIONS
+No tax return filed
+806 Withholding
+04-15-2020
+-500.00
+"""
+
+
+def test_compact_transcript():
+    data = parse_at_transcript(COMPACT_TRANSCRIPT)
+    assert data['tax_year'] == '2020'
+    assert data['account_balance'] == 5000.0
+    assert data['total_balance'] == 5200.5
+    assert data['adjusted_gross_income'] == 45000.0
+    assert data['taxable_income'] == 32600.0
+    assert data['se_tax_taxpayer'] == 0.0
+    assert data['se_tax_spouse'] == 0.0  # missing -> 0
+    assert data['filing_status'] == 'Single'
+    assert data['processing_date'] == 'Jun. 07, 2021'
+    # The 806 line has no cycle, so it is not a compact row
+    assert data['transactions'] == [
+        {'code': '150', 'meaning': 'Tax return filed', 'cycle_date': '2021-22-05', 'date': '2021-06-07', 'amount': 3900.0},
+        {'code': '196', 'meaning': 'Interest charged for late payment', 'cycle_date': '2021-22-05',
+         'date': '2021-06-07', 'amount': 12.3},
+    ]
+
+
+def test_spaced_transcript():
+    data = parse_at_transcript(SPACED_TRANSCRIPT)
+    assert data['tax_year'] == '2019'
+    assert data['account_balance'] == 1234.0
+    assert data['filing_status'] == 'Married Filing Jointly'
+    assert 'processing_date' not in data
+    assert data['transactions'] == [
+        {'code': 'n/a', 'meaning': 'No tax return filed', 'cycle_date': '', 'date': '', 'amount': 0.0},
+        {'code': '806', 'meaning': 'Withholding', 'cycle_date': '', 'date': '2020-04-15', 'amount': -500.0},
+    ]
+
+
+def test_field_order_and_unknown_year():
+    data = parse_at_transcript("no labels here")
+    assert data['tax_year'] == 'Unknown'
+    assert list(data)[:3] == ['tax_year', 'account_balance', 'accrued_interest']
+    assert data['transactions'] == []
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for repeated page header/footer stripping
+"""
+
+import io
+
+from full_form_patterns import form_patterns
+from parsers.at_parser import parse_at_transcript
+from parsers.boilerplate import PAGE_BREAK, find_boilerplate
+from parsers.text_normalize import NORMALIZE_VERSION, normalize_text
+from parsers.wi_parser import parse_wi_forms, parse_wi_header
+from utils.text_cache import TextCache
+
+HEADER = ("This Product Contains Sensitive Taxpayer Data\n"
+          "Wage and Income Transcript\n"
+          "Request Date: 03-14-2024\n"
+          "Tracking Number: 108012345678\n"
+          "SSN Provided: XXX-XX-1234\n"
+          "Tax Period Requested: December, 2022\n")
+FORM = ("Form W-2 Wage and Tax Statement\n"
+        "Employer Identification Number (EIN): 12-34567{n:02d}\n"
+        "Employer: ACME CORP {n}\n"
+        "Wages, tips, and other compensation: $1,000.00\n")
+
+
+def packet(pages: int, separator: str = PAGE_BREAK) -> str:
+    return separator.join(HEADER + FORM.format(n=page) + f"Page {page + 1} of {pages}\n" for page in range(pages))
+
+
+def test_repeated_header_and_footer_are_found_after_the_first_page():
+    found = find_boilerplate(packet(4))
+    assert found['pages'] == 4
+    assert 'Page #' in found['lines'] and 'Tracking Number: 108012345678' in found['lines']
+    # Form headers are content even though every page starts with one
+    assert not any(key.startswith('Form') for key in found['lines'])
+    assert len(found['kept']) == 7 and len(found['remove']) == 3 * 7
+
+
+def test_pages_are_inferred_from_the_first_line_without_page_breaks():
+    assert len(find_boilerplate(packet(4, '\n'))['remove']) == 3 * 7
+    assert find_boilerplate(FORM.format(n=1) * 3)['remove'] == []
+
+
+def test_a_repeated_content_line_is_not_a_page_header():
+    # No page breaks and the first line repeats on its own: one page, nothing stripped
+    text = "".join(f"No tax return filed\nTax period {year}\nACCOUNT BALANCE: $0.00\n" for year in (2019, 2020, 2021))
+    assert find_boilerplate(text)['pages'] == 1
+    assert normalize_text(text) == text
+
+
+def test_single_page_text_is_unchanged():
+    text = HEADER + FORM.format(n=1)
+    assert normalize_text(text) == text
+
+
+def test_a_new_tax_period_keeps_its_header():
+    text = packet(2) + PAGE_BREAK + packet(4).replace('December, 2022', 'December, 2023')
+    normalized = normalize_text(text)
+    # The 2023 line is boilerplate (4 of 6 pages) but stays on the first page that has it
+    assert normalized.count('December, 2023') == 1
+    assert parse_wi_header(normalized)[1][-1] == 'December 2023'
+
+
+def test_forms_and_header_survive_stripping():
+    text = packet(5)
+    normalized = normalize_text(text)
+    assert len(normalized) < 0.8 * len(text)
+    assert normalized.count('This Product Contains') == 1
+    assert parse_wi_header(normalized) == ('XXX-XX-1234', ['December 2022'], 2022)
+    forms = parse_wi_forms(text, form_patterns, 2022, output_buffer=io.StringIO())[2022]
+    assert [f['UniqueID'] for f in forms] == [f"12-34567{n:02d}" for n in range(5)]
+    # Offsets still point at the extracted text
+    start = normalized.index('Employer: ACME CORP 3')
+    assert normalized.original_snippet(start, start + 21) == 'Employer: ACME CORP 3'
+
+
+def test_cache_replays_the_stripped_spans(tmp_path):
+    cache = TextCache(str(tmp_path), memory_items=0)
+    text = packet(3)
+    key = cache.put(text)
+    first = cache.normalized(key)
+    again = cache.normalized(key)
+    assert (tmp_path / key[:2] / f"{key}.norm{NORMALIZE_VERSION}.json").exists()
+    assert again == first == normalize_text(text)
+    start = again.index('ACME CORP 2')
+    assert again.original_snippet(start, start + 11) == 'ACME CORP 2'
+
+
+def test_at_fallback_year_skips_the_page_header():
+    page = ("This Product Contains Sensitive Taxpayer Data\n"
+            "Account Transcript\n"
+            "Request Date: 03-14-2024\n"
+            "Tracking Number: 108012345678\n")
+    text = PAGE_BREAK.join([page + "ACCOUNT BALANCE: $0.00\nTaxpayer notes for 2019\n", page + "continued 2020\n"])
+    record = parse_at_transcript(text)
+    assert record['tax_year'] == '2019'
+    assert record['account_balance'] == 0.0
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite case result store
+"""
+
+import sqlite3
+
+from utils.case_store import CaseStore
+
+W2 = {'Form': 'W-2', 'UniqueID': '12-3456789', 'Label': 'ACME CORP', 'Income': 30000.0, 'Withholding': 3000.0,
+      'Category': 'Non-SE', 'Fields': {'Wages, Tips, and Other Compensation': 30000.0}, 'PayerBlurb': None,
+      'Owner': 'TP', 'SourceFile': 'WI 22 TP'}
+
+
+def transaction(code, posted, amount=0.0):
+    return {'code': code, 'meaning': '', 'cycle_date': '', 'date': posted, 'amount': amount}
+
+
+def at_record(tax_year, *transactions, owner='TP'):
+    return {'tax_year': tax_year, 'owner': owner, 'source_file': f'AT {tax_year[2:]} {owner}',
+            'account_balance': 100.0, 'transactions': list(transactions)}
+
+
+def test_save_and_load_round_trip_and_upsert(tmp_path):
+    store = CaseStore(str(tmp_path / 'cases.db'))
+    assert store.load_case('1') is None
+    store.save_case('1', wi_data={2022: [W2]}, at_data=[at_record('2022', transaction('150', '2023-04-17', 500.0))],
+                    wi_summary=[{'Tax Year': 2022}], pattern_hash='p1', form_hashes={'W-2': 'h'},
+                    wi_filing_status='MFJ', text_keys={'WI': {'WI 22 TP': 'k1'}})
+    case = store.load_case('1')
+    assert case['wi_data'] == {2022: [W2]}
+    assert case['at_data'][0]['transactions'] == [transaction('150', '2023-04-17', 500.0)]
+    assert case['at_data'][0]['account_balance'] == 100.0
+    assert (case['pattern_hash'], case['form_hashes'], case['wi_filing_status']) == ('p1', {'W-2': 'h'}, 'MFJ')
+    assert case['text_keys'] == {'WI': {'WI 22 TP': 'k1'}}
+    assert case['wi_summary'] == [{'Tax Year': 2022}]
+
+    # Saving again replaces everything stored for the case
+    store.save_case('1', wi_data={2023: [{**W2, 'Income': 31000.0}]}, pattern_hash='p2')
+    case = store.load_case('1')
+    assert list(case['wi_data']) == [2023] and case['wi_data'][2023][0]['Income'] == 31000.0
+    assert case['at_data'] == [] and case['text_keys'] == {} and case['pattern_hash'] == 'p2'
+    assert store.forms_by_identifier('12-3456789') == [{
+        'case_id': '1', 'tax_year': 2023, 'form': 'W-2', 'payer': 'ACME CORP', 'income': 31000.0,
+        'withholding': 3000.0, 'owner': 'TP'}]
+    store.delete_case('1')
+    assert store.load_case('1') is None
+
+
+def test_cases_with_transaction_open_and_closed(tmp_path):
+    store = CaseStore(str(tmp_path / 'cases.db'))
+    # Case 1: exam opened and closed; case 2: still open; case 3: closed before a new exam opened
+    store.save_case('1', at_data=[at_record('2021', transaction('420', '2023-01-09'), transaction('421', '2023-06-12'))])
+    store.save_case('2', at_data=[at_record('2020', transaction('420', '2022-03-14'))])
+    store.save_case('3', at_data=[at_record('2019', transaction('421', '2021-05-03'), transaction('420', '2022-08-01'))])
+    # A closing code on another record (the spouse's module) does not close this one
+    store.save_case('4', at_data=[at_record('2022', transaction('420', '2024-02-05')),
+                                  at_record('2022', transaction('430', '2024-09-30'), owner='S')])
+
+    every = store.cases_with_transaction('420')
+    assert [(row['case_id'], row['tax_year'], row['posted_date']) for row in every] == [
+        ('1', '2021', '2023-01-09'), ('2', '2020', '2022-03-14'), ('3', '2019', '2022-08-01'), ('4', '2022', '2024-02-05')]
+    assert every[0]['owner'] == 'TP'
+    assert [row['case_id'] for row in store.cases_with_transaction('420', open_only=True)] == ['2', '3', '4']
+    assert [row['case_id'] for row in store.cases_with_transaction('420', open_only=True, tax_year='2020')] == ['2']
+    # Codes without closing codes are never filtered
+    assert [row['case_id'] for row in store.cases_with_transaction('421', open_only=True)] == ['1', '3']
+
+
+def test_us_posted_dates_are_ordered_across_years(tmp_path):
+    path = str(tmp_path / 'cases.db')
+    store = CaseStore(path)
+    # As strings "01-15-2024" < "11-20-2023", so the exam would look closed before it opened
+    store.save_case('1', at_data=[at_record('2022', transaction('420', '11-20-2023'), transaction('421', '01-15-2024'))])
+    store.save_case('2', at_data=[at_record('2022', transaction('421', '11-20-2023'), transaction('420', '01-15-2024'))])
+    assert [row['case_id'] for row in store.cases_with_transaction('420', open_only=True)] == ['2']
+    assert store.load_case('1')['at_data'][0]['transactions'][0]['date'] == '2023-11-20'
+
+    # Rows written before dates were normalized are converted when the store is opened
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE at_transactions SET posted_date = '01-15-2024' WHERE posted_date = '2024-01-15'")
+    assert [row['posted_date'] for row in CaseStore(path).cases_with_transaction('421')] == ['2024-01-15', '2023-11-20']
+
+
+def test_forms_by_identifier_across_cases(tmp_path):
+    store = CaseStore(str(tmp_path / 'cases.db'))
+    store.save_case('2', wi_data={2021: [W2]})
+    store.save_case('1', wi_data={2022: [W2, {**W2, 'UniqueID': '98-7654321', 'Label': 'OTHER'}]})
+    assert [(row['case_id'], row['tax_year']) for row in store.forms_by_identifier('12-3456789')] == [
+        ('1', 2022), ('2', 2021)]
+    assert store.forms_by_identifier('00-0000000') == []
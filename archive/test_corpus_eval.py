@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the corpus pattern evaluator
+"""
+
+import copy
+
+from full_form_patterns import form_patterns
+from parsers.pattern_bundle import PatternBundle
+from utils.case_store import CaseStore
+from utils.corpus_eval import compare_reports, evaluate_corpus, evaluate_store
+from utils.text_cache import TextCache
+
+W2_TEXT = """Form W-2 Wage and Tax Statement
+Employer: ACME CORP
+Wages, tips, and other compensation: $30,000.00
+Federal income tax withheld: $3,000.00
+Form 1099-ZZ Unknown Statement
+"""
+INT_TEXT = """Form 1099-INT Interest Income
+Payer: FIRST BANK
+Interest income: $12.00
+"""
+
+
+def _corpus(tmp_path):
+    root = str(tmp_path / 'texts')
+    texts = TextCache(root)
+    return root, [texts.put(W2_TEXT), texts.put(INT_TEXT), 'f' * 64]
+
+
+def test_rates_and_unmatched_headers(tmp_path):
+    root, keys = _corpus(tmp_path)
+    report = evaluate_corpus(keys, workers=1, cache_root=root)
+    assert report['documents'] == 2 and report['missing_texts'] == 1
+    w2 = report['forms']['W-2']
+    assert (w2['match_rate'], w2['sections']) == (0.5, 1)
+    assert w2['fields']['Federal Withholding']['capture_rate'] == 1.0
+    assert report['unmatched_headers'] == {'Form 1099-ZZ': 1}
+
+    parallel = evaluate_corpus(keys, workers=2, cache_root=root)
+    assert parallel['forms']['W-2']['sections'] == 1
+    assert parallel['unmatched_headers'] == report['unmatched_headers']
+
+
+def test_candidate_comparison_and_storage(tmp_path):
+    root, keys = _corpus(tmp_path)
+    store = CaseStore(str(tmp_path / 'cases.db'))
+    store.save_case('1', wi_data={}, text_keys={'WI': {'a': keys[0], 'b': keys[1]}})
+    baseline = evaluate_store(store, PatternBundle.from_patterns(form_patterns), workers=1, cache_root=root)
+
+    patterns = copy.deepcopy(form_patterns)
+    patterns['W-2']['fields']['Federal Withholding'] = r'Federal tax withheld[:\s]*\$?([\d,.]+)'
+    candidate = evaluate_store(store, PatternBundle.from_patterns(patterns), workers=1, cache_root=root, save=False)
+    changes = compare_reports(baseline, candidate)
+    assert [(c['form'], c['field'], c['delta']) for c in changes] == [('W-2', 'Federal Withholding', -1.0)]
+
+    assert store.load_pattern_evaluation(baseline['pattern_hash'])['documents'] == 2
+    assert len(store.pattern_evaluations()) == 1
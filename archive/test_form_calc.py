@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the declarative WI form calculations
+"""
+
+from full_form_patterns import form_patterns
+from parsers.form_calc import evaluate_calculations, spec_contexts, spec_fields
+
+
+def _form(name, fields, source='a.pdf'):
+    return {'Form': name, 'Fields': fields, 'SourceFile': source}
+
+
+def test_patterns_are_data():
+    for name, info in form_patterns.items():
+        for measure, spec in info['calculation'].items():
+            assert isinstance(spec, dict), (name, measure)
+            assert all(f in info['fields'] for f in spec_fields(spec)), (name, measure)
+    assert spec_contexts(form_patterns['SSA-1099']['calculation']['Income']) == ['combined_income']
+
+
+def test_sums_and_rules():
+    wi_data = {2022: [
+        _form('1099-MISC', {'Rents': 1000.10, 'Royalties': 200.20, 'Federal Withholding': 5.0, 'Tax Withheld': 1.0}),
+        _form('1099-B', {'Proceeds': 5000.0, 'Cost or Basis': 6200.0}),
+        _form('1099-INT', {'Interest': 50.0, 'Savings Bonds': 999.0}),
+        _form('1099-INT', {'Interest': 50.0, 'Savings Bonds': 1000.0}),
+        _form('1099-R', {'Taxable Amount': 800.0, 'Gross Distribution': 1000.0}),
+        _form('1099-R', {'Taxable Amount': 0.0, 'Gross Distribution': 1000.0, 'Distribution Code 7': 1000.0}),
+        _form('1099-R', {'Gross Distribution': 1000.0}),
+        _form('3922', {'Exercise Price': 10.0}),
+    ]}
+    evaluate_calculations(wi_data, form_patterns)
+    forms = wi_data[2022]
+    assert (forms[0]['Income'], forms[0]['Withholding']) == (1200.3, 6.0)
+    assert (forms[1]['Income'], forms[1]['Withholding']) == (-1200.0, 0.0)
+    assert [f['Income'] for f in forms[2:4]] == [50.0, 1050.0]
+    assert [f['Income'] for f in forms[4:7]] == [800.0, 1000.0, 0.0]
+    assert forms[7]['Income'] == 0.0
+
+
+def test_ssa_uses_combined_income_of_same_file_and_year():
+    wi_data = {
+        2022: [
+            _form('W-2', {'Wages, Tips, and Other Compensation': 30000.0}),
+            _form('SSA-1099', {'Total Benefits Paid': 10000.0, 'TY Payments': [('2022', '10,000.00')]}),
+            _form('SSA-1099', {'Total Benefits Paid': 10000.0}, source='b.pdf'),
+        ],
+        2021: [
+            _form('W-2', {'Wages, Tips, and Other Compensation': 30000.0}),
+            _form('SSA-1099', {'Total Benefits Paid': 10000.0}),
+        ],
+    }
+    evaluate_calculations(wi_data, form_patterns, filing_status='MFJ')
+    # MFJ threshold is 34,000; a file with no other income counts the benefits
+    assert [f['Income'] for f in wi_data[2022]] == [30000.0, 0.0, 8500.0]
+    assert wi_data[2021][1]['Income'] == 0.0
+
+    evaluate_calculations(wi_data, form_patterns, filing_status='Single')
+    assert wi_data[2022][1]['Income'] == 8500.0
+    assert wi_data[2021][1]['Income'] == 8500.0
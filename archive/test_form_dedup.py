@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for cross-file duplicate WI form detection
+"""
+
+import copy
+
+from utils.form_dedup import FormIndex, dedupe_wi_data, form_key
+from utils.tp_s_parser import TPSParser
+
+W2 = {'Form': 'W-2', 'UniqueID': '12-3456789', 'Label': 'ACME CORP', 'Income': 30000.0, 'Withholding': 3000.0,
+      'Category': 'Non-SE', 'Fields': {'Wages, Tips, and Other Compensation': 30000.0,
+                                        'Federal Income Tax Withheld': 3000.0}}
+
+
+def form(source: str, owner: str = 'TP', **changes) -> dict:
+    return {**copy.deepcopy(W2), 'SourceFile': source, 'Owner': owner, **changes}
+
+
+def test_key_ignores_source_and_float_noise():
+    assert form_key(2022, form('WI 22 TP')) == form_key(2022, form('WI 22', owner='S'))
+    noisy = form('WI 22', Fields={'Wages, Tips, and Other Compensation': 30000.000001,
+                                  'Federal Income Tax Withheld': 3000.0})
+    assert form_key(2022, noisy) == form_key(2022, form('WI 22 TP'))
+    assert form_key(2021, form('WI 22 TP')) != form_key(2022, form('WI 22 TP'))
+    assert form_key(2022, form('WI 22', UniqueID='98-7654321')) != form_key(2022, form('WI 22 TP'))
+
+
+def test_only_repeats_from_another_file_are_duplicates():
+    index = FormIndex()
+    first = form('WI 22 TP')
+    assert index.add(2022, first) is None
+    assert index.add(2022, form('WI 22 TP')) is None  # same file: a second copy on the transcript
+    assert index.add(2022, form('WI 22')) is first
+    assert len(index) == 1
+
+
+def test_duplicates_are_counted_once():
+    wi_data = {2022: [form('WI 22 TP'), form('WI 22'), form('WI 22', Income=5.0, UniqueID='98-7654321')]}
+    assert TPSParser.aggregate_income_by_owner(wi_data)[2022]['combined']['income'] == 60005.0
+    result = dedupe_wi_data(wi_data)
+    kept = result['wi_data'][2022]
+    assert [f['SourceFile'] for f in kept] == ['WI 22 TP', 'WI 22']
+    assert kept[0]['Duplicates'] == ['WI 22']
+    assert TPSParser.aggregate_income_by_owner(result['wi_data'])[2022]['combined']['income'] == 30005.0
+    assert result['duplicates'] == [{
+        'tax_year': 2022, 'form': 'W-2', 'unique_id': '12-3456789', 'source_file': 'WI 22', 'owner': 'TP',
+        'kept_source_file': 'WI 22 TP', 'kept_owner': 'TP', 'income': 30000.0,
+    }]
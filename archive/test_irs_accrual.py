@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the IRS interest and penalty accrual engine
+"""
+
+from datetime import date
+
+import numpy as np
+
+from utils.irs_accrual import InterestFactorTable, accrue_account, get_interest_table, months_or_part
+
+RECORD = {
+    'tax_year': '2021', 'owner': 'TP',
+    'transactions': [
+        {'code': '150', 'meaning': 'Tax return filed', 'cycle_date': '', 'date': '2023-03-01', 'amount': 10000.0},
+        {'code': '806', 'meaning': 'W-2 or 1099 withholding', 'cycle_date': '', 'date': '2022-04-18', 'amount': -2000.0},
+        {'code': '670', 'meaning': 'Payment', 'cycle_date': '', 'date': '06-01-2023', 'amount': -3000.0},
+        {'code': '196', 'meaning': 'Interest charged', 'cycle_date': '', 'date': '2023-06-01', 'amount': 50.0},
+    ]
+}
+
+
+def test_interest_factors_compound_daily():
+    table = get_interest_table()
+    # 8% for all of 2024 (leap year): (1 + 0.08/366) ** 366
+    assert np.isclose(table.growth(date(2024, 1, 1), date(2025, 1, 1)), (1 + 0.08 / 366) ** 366)
+    assert table.interest(-100, date(2024, 1, 1), date(2025, 1, 1)) == 0.0
+    assert months_or_part(date(2022, 4, 18), date(2022, 4, 19)) == 1
+    assert months_or_part(date(2022, 4, 18), date(2022, 6, 18)) == 2
+
+
+def test_underpayment_rates_by_quarter():
+    table = InterestFactorTable()
+    known = {
+        date(2011, 5, 1): 0.04, date(2011, 11, 1): 0.03, date(2016, 2, 1): 0.03, date(2016, 5, 1): 0.04,
+        date(2018, 5, 1): 0.05, date(2019, 2, 1): 0.06, date(2019, 8, 1): 0.05, date(2020, 8, 1): 0.03,
+        date(2023, 11, 1): 0.08, date(2025, 2, 1): 0.07,
+    }
+    for day, rate in known.items():
+        days_in_year = 366 if day.year % 4 == 0 else 365
+        next_day = date.fromordinal(day.toordinal() + 1)
+        assert np.isclose(table.growth(day, next_day), 1 + rate / days_in_year), day
+
+
+def test_penalties_and_running_balance():
+    result = accrue_account(RECORD, as_of=date(2026, 10, 19))
+    assert result['due_date'] == '2022-04-18'
+    assert result['filed_date'] == '2023-03-01'
+    # 8,000 unpaid at the due date: 5 months of FTF at 5% less 0.5% FTP
+    assert result['ftf_penalty'] == 1800.0
+    # FTP 40/month until the June 2023 payment, 25/month after, capped at 50 months
+    assert result['ftp_penalty'] == 14 * 40 + 36 * 25
+    running = result['running']
+    assert running[-1]['event'] == 'as_of'
+    assert running[-1]['balance'] == result['balance']
+    expected = 10000 - 2000 - 3000 + result['ftf_penalty'] + result['ftp_penalty'] + result['interest']
+    assert np.isclose(result['balance'], expected, atol=0.05)
+
+
+def test_minimum_late_filing_penalty():
+    record = {'tax_year': '2023', 'transactions': [
+        {'code': '150', 'date': '2024-08-01', 'amount': 300.0},
+    ]}
+    # 5 x 4.5% of 300 is below the minimum, which is capped at the tax due
+    assert accrue_account(record, as_of=date(2024, 8, 1))['ftf_penalty'] == 300.0
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for the line offset index and in-place section scanning
+"""
+
+import random
+
+from full_form_patterns import form_patterns
+from parsers.line_index import LineIndex
+from parsers.wi_parser import parse_wi_forms
+
+
+def test_lines_match_splitlines_of_the_slice():
+    rng = random.Random(7)
+    for _ in range(2000):
+        text = ''.join(rng.choice('ab \n\r\x0c ') for _ in range(rng.randint(0, 40)))
+        index = LineIndex(text)
+        start = rng.randint(0, len(text))
+        end = rng.randint(start, len(text))
+        if text[start - 1:start + 1] == '\r\n':
+            continue  # a slice cannot start inside a \r\n pair in the parser (sections start at "Form")
+        assert [text[a:b] for a, b in index.lines(start, end)] == text[start:end].splitlines()
+
+
+def test_line_of_and_clipped_line():
+    index = LineIndex("Form A\r\nPayer: X\n\nRecipient: Y")
+    assert [index.line_of(pos) for pos in (0, 6, 8, 16, 17, 18)] == [0, 0, 1, 1, 2, 3]
+    assert index.line(10, 14, 1) == 'yer:'
+
+
+def test_payer_blurb_is_read_in_place():
+    text = ("Form 1099-MISC Miscellaneous Income\r\n"
+            "Payer's Federal Identification Number (FIN): 11-2223333  \n"
+            "  SOME PAYER  \n"
+            "ADDR 1\x0c\n"
+            "Recipient: X\n"
+            "Rents: $1,200.00\n"
+            "Form 1099-NEC Nonemployee Compensation\n"
+            "Payer: ACME\n"
+            "\n"
+            "Non-Employee Compensation: $500.00\n")
+    forms = {f['Form']: f for f in parse_wi_forms(text, form_patterns, 2022)[2022]}
+    # Text is normalized first: the trailing space run on the FIN line is one space
+    assert forms['1099-MISC']['PayerBlurb'] == ("Payer's Federal Identification Number (FIN): 11-2223333 \n"
+                                                "SOME PAYER\nADDR 1")
+    assert forms['1099-NEC']['PayerBlurb'] == 'Payer: ACME'
+    assert forms['1099-MISC']['Fields']['Rents'] == 1200.0
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Tests for the integer-cents money helpers
+"""
+
+from utils.money import format_cents, parse_cents, parse_cents_array, round_dollars, sum_cents, sum_dollars, to_cents
+
+
+def test_parse_cents():
+    assert parse_cents('$1,234.56') == 123456
+    assert parse_cents('-$5.00') == parse_cents('$-5') == parse_cents('(5)') == -500
+    assert parse_cents('12.') == 1200
+    assert parse_cents('.5') == 50
+    assert parse_cents('1.005') == 101
+    assert parse_cents('abc') is None
+    assert parse_cents('1.2.3') is None
+    assert to_cents('n/a') == 0
+    assert to_cents(None) == 0
+    assert parse_cents_array(['$1.10', '2', 'bad']).tolist() == [110, 200, 0]
+
+
+def test_exact_sums():
+    assert 0.1 + 0.2 != 0.3
+    assert sum_cents([0.1, 0.2]) == 30
+    assert sum_dollars([0.1] * 10) == 1.0
+    assert round_dollars(1234.5649999) == 1234.56
+    assert format_cents(-123456) == '$-1,234.56'
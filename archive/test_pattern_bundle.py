@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for the serializable form pattern bundle
+"""
+
+import copy
+
+import pytest
+
+from full_form_patterns import form_patterns
+from parsers.pattern_bundle import PatternBundle, get_pattern_bundle
+from utils.case_store import CaseStore
+
+
+def test_round_trip_keeps_hash_and_order(tmp_path):
+    bundle = get_pattern_bundle()
+    assert list(bundle.forms) == list(form_patterns)
+    path = bundle.save(str(tmp_path / 'bundle.json'))
+    loaded = PatternBundle.load(path)
+    assert loaded.hash == bundle.hash
+    assert loaded.form_patterns['W-2']['calculation'] == form_patterns['W-2']['calculation']
+    assert loaded.pattern('W-2').search('Form W-2 Wage and Tax Statement')
+    assert loaded.compile_all() > len(loaded.forms)
+
+
+def test_hash_tracks_changed_forms():
+    patterns = copy.deepcopy(form_patterns)
+    patterns['W-2']['fields']['Federal Withholding'] = r'Federal income tax withheld:\s*\$([\d,.]+)'
+    before, after = get_pattern_bundle(), PatternBundle.from_patterns(patterns)
+    assert after.hash != before.hash
+    assert after.changed_forms(before.form_hashes()) == ['W-2']
+
+
+def test_rejects_callables_and_tampering(tmp_path):
+    with pytest.raises(TypeError):
+        PatternBundle.from_patterns({'X': {'pattern': 'Form X', 'fields': {}, 'calculation': {'Income': lambda f: 0}}})
+    bundle = get_pattern_bundle()
+    path = tmp_path / 'bundle.json'
+    path.write_text(bundle.to_json().replace('Form W-2', 'Form W-3', 1), encoding='utf-8')
+    with pytest.raises(ValueError):
+        PatternBundle.load(str(path))
+
+
+def test_case_store_keeps_pattern_hashes(tmp_path):
+    store = CaseStore(str(tmp_path / 'cases.db'))
+    bundle = get_pattern_bundle()
+    store.save_case('1', wi_data={}, pattern_hash=bundle.hash, form_hashes=bundle.form_hashes())
+    store.save_case('2', wi_data={})
+    stored = store.load_case('1')
+    assert stored['pattern_hash'] == bundle.hash
+    assert bundle.changed_forms(stored['form_hashes']) == []
+    assert store.cases_parsed_with_other_patterns(bundle.hash) == ['2']
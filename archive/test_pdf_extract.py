@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the PDF extraction engine registry and its learned routing
+"""
+
+import json
+
+import pytest
+
+import utils.pdf_extract as pdf_extract
+from parsers.boilerplate import PAGE_BREAK
+from utils.pdf_extract import ExtractionRouter, PdfEngine, is_text_readable, pdf_fingerprint
+
+READABLE = "Form W-2 Wage and Tax Statement Employer Identification Number wages tips other compensation " * 3
+TDS_PDF = b"%PDF-1.4\n1 0 obj << /Producer (IRS TDS 2.1.0) /Creator (Transcript Delivery) >> endobj\n"
+SCAN_PDF = b"%PDF-1.4\n1 0 obj << /Producer (ScanSnap Manager 6.5) >> endobj\n"
+calls = []
+
+
+class _FakeEngine(PdfEngine):
+    readable_for = b''
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    def pages(self, pdf_bytes, on_page=None):
+        calls.append(self.name)
+        if self.readable_for and self.readable_for in pdf_bytes:
+            return [READABLE, READABLE]
+        return ["(cid:12)" * 20]
+
+
+class TextEngine(_FakeEngine):
+    name = 'pypdf'
+    readable_for = b'IRS TDS'
+
+
+class LayoutEngine(_FakeEngine):
+    name = 'pdfplumber'
+
+
+class ScanEngine(_FakeEngine):
+    name = 'ocr'
+    readable_for = b'%PDF'
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    monkeypatch.setattr(pdf_extract, 'ENGINES', {e.name: e for e in (TextEngine, LayoutEngine, ScanEngine)})
+    calls.clear()
+    return calls
+
+
+def test_readability_and_fingerprint():
+    assert is_text_readable(READABLE) and not is_text_readable("(cid:3)" * 40)
+    assert pdf_fingerprint(TDS_PDF) == 'IRS TDS # | Transcript Delivery'
+    assert pdf_fingerprint(SCAN_PDF) == 'ScanSnap Manager # | '
+    assert pdf_fingerprint(b"%PDF-1.4\n") == ''
+
+
+def test_router_learns_the_engine_per_producer(tmp_path, engines):
+    path = str(tmp_path / 'routes.json')
+    router = ExtractionRouter(path)
+    first = router.extract(SCAN_PDF)
+    assert first['engine'] == 'ocr' and engines == ['pypdf', 'pdfplumber', 'ocr']
+    assert first['text'] == PAGE_BREAK.join([READABLE, READABLE])
+    assert [a['readable'] for a in first['attempts']] == [False, False, True]
+
+    # Next scan from the same producer goes straight to OCR, also after a restart
+    engines.clear()
+    assert ExtractionRouter(path).extract(SCAN_PDF)['engine'] == 'ocr'
+    assert engines == ['ocr']
+
+    # Another producer still starts with the default order
+    engines.clear()
+    assert router.extract(TDS_PDF)['engine'] == 'pypdf' and engines == ['pypdf']
+    stored = json.load(open(path))
+    assert stored['ScanSnap Manager # | ']['pypdf'] == {'ok': 0, 'failed': 1, 'seconds': 0.0}
+
+
+def test_no_engine_readable(tmp_path, engines, monkeypatch):
+    monkeypatch.setattr(ScanEngine, 'readable_for', b'never')
+    result = ExtractionRouter(str(tmp_path / 'routes.json')).extract(b"%PDF-1.4\n")
+    assert result['text'] == '' and result['engine'] is None and len(result['attempts']) == 3
+    # No producer: nothing learned
+    assert not (tmp_path / 'routes.json').exists()
+
+
+def test_unwritable_routes_file_keeps_the_text(tmp_path, engines):
+    router = ExtractionRouter(str(tmp_path / 'missing-dir' / 'routes.json'))
+    result = router.extract(SCAN_PDF)
+    assert result['engine'] == 'ocr' and result['text'] == PAGE_BREAK.join([READABLE, READABLE])
+    # Still learned for this process
+    assert router.order('ScanSnap Manager # | ')[0] == 'ocr'
+
+
+def test_routes_file_is_written_once_per_document(tmp_path, engines, monkeypatch):
+    router = ExtractionRouter(str(tmp_path / 'routes.json'))
+    saves = []
+    save = router._save
+    monkeypatch.setattr(router, '_save', lambda: saves.append(1) or save())
+    assert router.extract(SCAN_PDF)['engine'] == 'ocr' and len(engines) == 3
+    assert len(saves) == 1
+    assert sum(s['failed'] for s in json.load(open(tmp_path / 'routes.json'))['ScanSnap Manager # | '].values()) == 2
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Tests for per-document progress events
+"""
+
+from utils import progress
+from utils.progress import (RUN_COMPLETE, STAGE_DONE, STAGE_EXTRACTING, ProgressBus, close_run, describe_event,
+                            document_fraction, get_run, open_run)
+
+
+def test_bus_fans_out_events_to_subscribers():
+    bus = ProgressBus('run-1')
+    seen, late = [], []
+    bus.subscribe(seen.append)
+    bus.publish('WI', 'WI 22', STAGE_EXTRACTING, engine='pypdf', page=1, pages=4, message=None)
+    bus.subscribe(late.append)
+    bus.publish('WI', 'WI 22', STAGE_DONE, result=[])
+    bus.close()
+    bus.close()
+    assert [e['stage'] for e in seen] == [STAGE_EXTRACTING, STAGE_DONE, RUN_COMPLETE]
+    assert [e['stage'] for e in late] == [STAGE_DONE, RUN_COMPLETE]
+    assert bus.events == seen and bus.closed
+    assert 'message' not in seen[0] and seen[0]['engine'] == 'pypdf'
+    assert abs(document_fraction(seen[0]) - 0.3625) < 1e-9
+    assert describe_event(seen[0]) == "WI 22: extracting (pypdf) page 1 of 4"
+
+
+def test_closed_runs_stay_available_for_the_grace_period(monkeypatch):
+    bus = open_run('run-3')
+    close_run('run-3')
+    assert get_run('run-3') is bus and bus.closed
+    monkeypatch.setattr(progress, 'CLOSED_RUN_TTL', 0.0)
+    assert get_run('run-3') is None
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the regex audit and the runtime regex guard
+"""
+
+import logging
+import re
+
+from full_form_patterns import form_patterns
+from parsers.regex_guard import RegexGuard
+from parsers.wi_parser import parse_wi_forms
+from utils.regex_audit import audit, parser_regexes, static_findings
+
+SMALL = (250, 500, 1000, 2000)
+
+
+def test_audit_flags_backtracking_patterns():
+    rows = audit([
+        ('nested', re.compile(r'(a+)+b')),
+        ('gaps', re.compile(r'Form.*Wage.*Tax.*Statement')),
+        ('bounded', re.compile(r'Form.{0,40}Wage.{0,40}Tax.{0,40}Statement')),
+        ('plain', re.compile(r'Wages[:\s]*\$?([\d,.]+)')),
+    ], sizes=SMALL)
+    flagged = {row['name']: row['flagged'] for row in rows}
+    assert flagged == {'nested': True, 'gaps': True, 'bounded': False, 'plain': False}
+    assert static_findings(re.compile(r'(a+)+b')) == ["nested unbounded quantifier (exponential)"]
+
+
+def test_parser_regexes_have_no_static_hazards():
+    assert [(name, findings) for name, regex in parser_regexes() if (findings := static_findings(regex))] == []
+
+
+def test_guard_skips_regex_after_it_runs_over_budget():
+    guard = RegexGuard(call_budget_ms=0.0, log=logging.getLogger('test'))
+    pattern = re.compile(r'Wages[:\s]*\$?([\d,.]+)')
+    assert guard.search(pattern, 'Wages: $10.00', name='W-2.Wages').group(1) == '10.00'
+    assert guard.over_budget() and 'W-2.Wages' in guard.tripped
+    assert guard.search(pattern, 'Wages: $10.00', name='W-2.Wages') is None
+    assert guard.finditer(pattern, 'Wages: $10.00', name='W-2.Wages') == []
+
+
+def test_guarded_parse_matches_unguarded_parse():
+    text = ("Form W-2 Wage and Tax Statement\n"
+            "Employer Identification Number (EIN): 12-3456789\n"
+            "Wages, tips, and other compensation: $30,000.00\n"
+            "Federal income tax withheld: $3,000.00\n")
+    plain = parse_wi_forms(text, form_patterns, 2022)
+    guarded = parse_wi_forms(text, form_patterns, 2022, guard=RegexGuard())
+    assert guarded == plain
+    assert [(f['Form'], f['Income'], f['Withholding']) for f in plain[2022]] == [('W-2', 30000.0, 3000.0)]
+
+
+def test_scan_in_chunks_matches_a_single_finditer():
+    text = "".join(f"line {i}\nForm W-2 Wage and Tax Statement\n" for i in range(200))
+    pattern = re.compile(form_patterns['W-2']['pattern'], re.MULTILINE)
+    scanned = RegexGuard().scan(pattern, text, chunk_chars=97, max_match_chars=60)
+    assert [m.span() for m in scanned] == [m.span() for m in pattern.finditer(text)]
+
+
+class _SlowPattern:
+    """Stands in for a regex-module pattern whose call runs out of time"""
+
+    pattern = 'slow'
+    supports_timeout = True
+
+    def __init__(self):
+        self.timeouts = []
+
+    def search(self, string, pos=0, endpos=None, timeout=None):
+        self.timeouts.append(timeout)
+        raise TimeoutError("regex timed out")
+
+
+def test_guard_passes_the_remaining_budget_as_timeout():
+    guard = RegexGuard(call_budget_ms=50.0, log=logging.getLogger('test'))
+    pattern = _SlowPattern()
+    assert guard.search(pattern, 'text', name='slow') is None
+    assert pattern.timeouts == [0.05]
+    assert guard.tripped['slow'].startswith('timed out')
+    assert guard.search(pattern, 'text', name='slow') is None and len(pattern.timeouts) == 1
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the pluggable regex backends and threaded WI parsing
+"""
+
+import logging
+import re
+
+import pytest
+
+from full_form_patterns import form_patterns
+from parsers import regex_backend
+from parsers.pattern_bundle import PatternBundle
+from parsers.regex_backend import RegexBackend, available_backends, get_regex_backend
+from parsers.wi_parser import iter_wi_texts, parse_wi_texts
+from utils.regex_bench import benchmark, synthetic_texts
+from utils.run_log import capture_run_log
+
+
+def test_backend_caches_compiled_patterns():
+    backend = RegexBackend()
+    assert backend.compile(r'Wages\s*(\d+)', re.IGNORECASE) is backend.compile(r'Wages\s*(\d+)', re.IGNORECASE)
+    assert backend.compile(r'x', re.IGNORECASE).flags & re.IGNORECASE
+
+
+def test_unknown_backend_is_rejected_and_missing_one_falls_back(monkeypatch):
+    with pytest.raises(ValueError):
+        get_regex_backend('pcre')
+    monkeypatch.setattr(regex_backend.RegexModuleBackend, 'available', classmethod(lambda cls: False))
+    assert get_regex_backend('regex').name == 're'
+
+
+@pytest.mark.parametrize('name', available_backends())
+def test_backends_extract_what_re_extracts(name):
+    texts = synthetic_texts(12)
+    expected = parse_wi_texts(texts, form_patterns, backend=get_regex_backend('re'), workers=1)
+    assert parse_wi_texts(texts, form_patterns, backend=get_regex_backend(name), workers=4) == expected
+    bundle = PatternBundle.from_patterns(form_patterns, backend=get_regex_backend(name))
+    assert bundle.hash == PatternBundle.from_patterns(form_patterns).hash
+    assert bundle.field('W-2', 'Wages, Tips, and Other Compensation').search('wages, tips, and other compensation: $5.00')
+
+
+def test_threaded_parse_returns_every_document():
+    texts = synthetic_texts(6)
+    results = parse_wi_texts(texts, form_patterns, workers=3)
+    assert list(results) == list(texts)
+    first = results['WI 20 TP 0']
+    assert first['tax_year'] == 2020 and first['error'] is None
+    assert [(f['Form'], f['Income']) for f in first['forms'][2020]] == [('W-2', 20000.0), ('1099-INT', 10.0)]
+
+
+def test_a_file_that_fails_does_not_stop_the_others():
+    texts = {**synthetic_texts(2), 'broken': None}
+    results = parse_wi_texts(texts, form_patterns, workers=2)
+    assert results['broken']['error'] and results['broken']['forms'] == {}
+    assert all(results[name]['error'] is None and results[name]['forms'] for name in synthetic_texts(2))
+
+
+def test_benchmark_checks_output_against_re():
+    rows = benchmark(synthetic_texts(4), [1, 2], backends=['re'], repeat=1)
+    assert [(row['threads'], row['matches_re']) for row in rows] == [(1, True), (2, True)]
+
+
+class _ThreadedRe(RegexBackend):
+    """re under another name that asks for thread pools like a GIL-releasing engine"""
+
+    name = "threaded-re"
+    releases_gil = True
+
+
+def test_threaded_parse_logs_to_the_callers_run_log():
+    logger = logging.getLogger('test_threaded_parse')
+    logger.setLevel(logging.INFO)
+    texts = synthetic_texts(4)
+    with capture_run_log(logger) as serial_log:
+        parse_wi_texts(texts, form_patterns, workers=1, log=logger)
+    with capture_run_log(logger) as threaded_log:
+        parse_wi_texts(texts, form_patterns, backend=_ThreadedRe(), log=logger)
+    lines = threaded_log.getvalue().splitlines()
+    assert lines and sorted(lines) == sorted(serial_log.getvalue().splitlines())
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_files_are_delivered_as_they_are_parsed(workers):
+    texts = synthetic_texts(3)
+    produced = []
+
+    def extracted():
+        for filename, text in texts.items():
+            produced.append(filename)
+            yield filename, text
+
+    delivered = []
+    for filename, result in iter_wi_texts(extracted(), form_patterns, workers=workers, backend=_ThreadedRe()):
+        delivered.append((filename, len(produced)))
+        assert result['error'] is None and result['forms']
+    assert sorted(name for name, _ in delivered) == sorted(texts)
+    if workers == 1:
+        # Each file is delivered before the next one is extracted
+        assert delivered == [(name, i) for i, name in enumerate(texts, 1)]
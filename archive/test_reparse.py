@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental re-parse over cached texts
+"""
+
+import copy
+
+from full_form_patterns import form_patterns
+from parsers.pattern_bundle import PatternBundle
+from parsers.wi_parser import parse_wi_forms, parse_wi_header
+from utils.case_store import CaseStore
+from utils.form_dedup import dedupe_wi_data
+from utils.reparse import reparse_case, reparse_store
+from utils.text_cache import TextCache
+
+WI_TEXT = """Tax Period Requested: December, 2022
+SSN Provided: XXX-XX-1234
+Form W-2 Wage and Tax Statement
+Employer Identification Number (EIN): 12-3456789
+Employer: ACME CORP
+Wages, tips, and other compensation: $30,000.00
+Federal income tax withheld: $3,000.00
+Form SSA-1099 Social Security Benefit Statement
+Pensions and Annuities (Total Benefits Paid): $10,000.00
+Tax Withheld: $500.00
+"""
+
+
+def _store_case(tmp_path, bundle):
+    texts = TextCache(str(tmp_path / 'texts'))
+    store = CaseStore(str(tmp_path / 'cases.db'))
+    _, _, year = parse_wi_header(WI_TEXT)
+    wi_data = parse_wi_forms(WI_TEXT, bundle.form_patterns, year, filing_status='Single')
+    for form in wi_data[year]:
+        form['Owner'], form['SourceFile'] = 'TP', 'WI 22 TP'
+    store.save_case('7', wi_data=wi_data, pattern_hash=bundle.hash, form_hashes=bundle.form_hashes(),
+                    wi_filing_status='Single', text_keys={'WI': {'WI 22 TP': texts.put(WI_TEXT)}})
+    return store, texts
+
+
+def test_unchanged_patterns_reparse_nothing(tmp_path):
+    bundle = PatternBundle.from_patterns(form_patterns)
+    store, texts = _store_case(tmp_path, bundle)
+    result = reparse_case(store.load_case('7'), bundle, texts=texts)
+    assert result['changed_forms'] == []
+    assert result['form_changes'] == [] and result['total_changes'] == []
+    assert [f['Income'] for f in result['wi_data'][2022]] == [30000.0, 8500.0]
+
+
+def test_changed_pattern_reextracts_form_and_recalculates_file(tmp_path):
+    bundle = PatternBundle.from_patterns(form_patterns)
+    store, texts = _store_case(tmp_path, bundle)
+
+    # A wage regex "fix" that picks up the withholding line instead: W-2 income
+    # drops below the SSA threshold, so the SSA-1099 in the same file changes too
+    patterns = copy.deepcopy(form_patterns)
+    patterns['W-2']['fields']['Wages, Tips, and Other Compensation'] = r'Federal income tax withheld[:\s]*\$?([\d,.]+)'
+    fixed = PatternBundle.from_patterns(patterns)
+
+    result = reparse_case(store.load_case('7'), fixed, texts=texts)
+    assert result['changed_forms'] == ['W-2']
+    assert result['reparsed_files']['WI'] == ['WI 22 TP']
+    forms = result['wi_data'][2022]
+    assert [(f['Form'], f['Income'], f['Owner']) for f in forms] == [('W-2', 3000.0, 'TP'), ('SSA-1099', 0.0, 'TP')]
+    assert {(c['form'], c['change']) for c in result['form_changes']} == {('W-2', 'changed'), ('SSA-1099', 'changed')}
+    assert result['total_changes'] == [{
+        'tax_year': 2022, 'old_income': 38500.0, 'new_income': 3000.0,
+        'old_withholding': 3500.0, 'new_withholding': 3500.0
+    }]
+
+    assert list(reparse_store(store, fixed, save=True, texts=texts)) == ['7']
+    assert reparse_store(store, fixed, texts=texts) == {}
+
+
+def test_missing_text_keeps_stored_forms(tmp_path):
+    bundle = PatternBundle.from_patterns(form_patterns)
+    store, _ = _store_case(tmp_path, bundle)
+    patterns = copy.deepcopy(form_patterns)
+    patterns['W-2']['category'] = 'Neither'
+    result = reparse_case(store.load_case('7'), PatternBundle.from_patterns(patterns),
+                          texts=TextCache(str(tmp_path / 'empty')))
+    assert result['missing_texts']['WI'] == ['WI 22 TP']
+    assert result['form_changes'] == []
+
+
+def test_reparse_recalculates_files_with_their_collapsed_duplicates(tmp_path):
+    # The TP file and the joint file both list the W-2; only the joint file has the SSA-1099
+    bundle = PatternBundle.from_patterns(form_patterns)
+    texts = TextCache(str(tmp_path / 'texts'))
+    store = CaseStore(str(tmp_path / 'cases.db'))
+    tp_text = WI_TEXT[:WI_TEXT.index('Form SSA-1099')]
+    files = {'WI 22 TP': tp_text, 'WI 22': WI_TEXT}
+    wi_data = {}
+    for filename, text in files.items():
+        for year, forms in parse_wi_forms(text, bundle.form_patterns, 2022, filing_status='MFJ').items():
+            for form in forms:
+                form['Owner'], form['SourceFile'] = 'TP', filename
+            wi_data.setdefault(year, []).extend(forms)
+    deduped = dedupe_wi_data(wi_data)['wi_data']
+    assert [(f['Form'], f['SourceFile'], f['Income']) for f in deduped[2022]] == [
+        ('W-2', 'WI 22 TP', 30000.0), ('SSA-1099', 'WI 22', 0.0)]
+    store.save_case('8', wi_data=deduped, pattern_hash=bundle.hash, form_hashes=bundle.form_hashes(),
+                    wi_filing_status='MFJ', text_keys={'WI': {name: texts.put(text) for name, text in files.items()}})
+
+    # A no-op change to the SSA-1099 pattern re-extracts it from the joint file
+    patterns = copy.deepcopy(form_patterns)
+    patterns['SSA-1099']['pattern'] += '(?:)'
+    result = reparse_case(store.load_case('8'), PatternBundle.from_patterns(patterns), texts=texts)
+    assert result['changed_forms'] == ['SSA-1099']
+    assert [(f['Form'], f['SourceFile'], f['Income']) for f in result['wi_data'][2022]] == [
+        ('W-2', 'WI 22 TP', 30000.0), ('SSA-1099', 'WI 22', 0.0)]
+    assert result['wi_data'][2022][0]['Duplicates'] == ['WI 22']
+    assert result['total_changes'] == []
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Tests for the SFR scenario grid
+"""
+
+from datetime import date
+
+import numpy as np
+
+from utils.irs_accrual import get_interest_table
+from utils.sfr_scenarios import sfr_scenario_grid
+from utils.tax_engine import sfr_base_tax
+
+
+def test_grid_matches_single_scenario():
+    grid = sfr_scenario_grid([2021, 2022], [30000, 0], [40000, 10000], [2000, 5000], as_of=date(2025, 4, 15))
+    assert grid.values['total_owed'].shape == (2, 5, 61)
+
+    base = sfr_base_tax(2021, "Head of Household", 30000, 40000)
+    owed = float(base['se_tax'] + base['fed_tax']) - 2000
+    cell = grid.cell(2021, "Head of Household", 10)
+    assert np.isclose(cell['base_tax_owed'], owed)
+    assert np.isclose(cell['ftf_penalty'], owed * 0.225)  # 5 months of 4.5% (FTF net of FTP)
+    assert np.isclose(cell['ftp_penalty'], owed * 0.05)
+    growth = get_interest_table().growth(date(2022, 4, 18), date(2025, 4, 15))
+    assert np.isclose(cell['interest'], (owed + cell['ftf_penalty']) * (growth - 1))
+    assert np.isclose(cell['total_owed'], owed + cell['ftf_penalty'] + cell['ftp_penalty'] + cell['interest'])
+
+
+def test_no_penalties_on_refund_and_select():
+    grid = sfr_scenario_grid([2021, 2022], [30000, 0], [40000, 10000], [2000, 5000], as_of=date(2025, 4, 15))
+    cell = grid.cell(2022, "Single", 24)
+    assert cell['base_tax_owed'] < 0
+    assert cell['ftf_penalty'] == cell['interest'] == 0
+    assert cell['total_owed'] == cell['base_tax_owed']
+
+    picked = grid.select(["Married Filing Jointly", "Single"], [12, 24])
+    assert picked['total_owed'][0] == grid.cell(2021, "Married Filing Jointly", 12)['total_owed']
+    assert picked['total_owed'][1] == cell['total_owed']
+    assert grid.compare(2021).shape == (5, 61)
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Tests for the year-indexed tax tables and vectorized tax engine
+"""
+
+import numpy as np
+
+from utils.tax_engine import income_tax, se_tax, sfr_base_tax, standard_deduction
+
+
+def test_income_tax_by_year_and_status():
+    assert round(float(income_tax(2017, "Single", 100000)), 2) == 20981.75
+    taxes = income_tax([2023, 2023], ["Single", "MFJ"], [50000, 50000])
+    assert np.allclose(taxes, [6307.5, 5560.0])
+
+
+def test_standard_deduction_and_clamping():
+    assert standard_deduction([2024, 2024, 2024], ["Single", "Qualifying Widow(er)", "Head of Household"]).tolist() == [
+        14600, 29200, 21900
+    ]
+    # Years outside the tables use the nearest covered year
+    assert standard_deduction(2010, "Single") == standard_deduction(2015, "Single")
+
+
+def test_sfr_base_tax():
+    result = sfr_base_tax([2023], ["Single"], [200000], [0])
+    assert result['taxable_income'][0] == 200000 - 13850
+    assert np.isclose(result['ss_tax'][0], 160200 * 0.124)
+    assert np.isclose(se_tax(2023, 200000)['medicare_tax'], 200000 * 0.029)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for splitting multi-year WI packets into tax period windows
+"""
+
+import io
+
+import parsers.wi_parser as wi_parser
+from full_form_patterns import form_patterns
+from parsers.wi_parser import parse_wi_forms, tax_period_windows
+
+FORM = ("Form W-2 Wage and Tax Statement\n"
+        "Employer Identification Number (EIN): 12-34567{n:02d}\n"
+        "Employer: ACME CORP {n}\n"
+        "Wages, tips, and other compensation: ${wages:,}.00\n")
+
+
+def period(year: int, *forms: int) -> str:
+    body = ''.join(FORM.format(n=n, wages=1000 * n) for n in forms)
+    return f"Tax Period Requested: December, {year}\n{body}"
+
+
+PACKET = "Wage and Income Transcript\n" + period(2021, 1, 2) + period(2021, 3) + period(2022, 4) + period(2023, 5, 6)
+
+
+def test_windows_start_at_each_new_period():
+    windows = tax_period_windows(PACKET)
+    assert [year for year, _, _ in windows] == [2021, 2022, 2023]
+    assert windows[0][1] == 0 and windows[-1][2] == len(PACKET)
+    assert all(end == next_start for (_, _, end), (_, next_start, _) in zip(windows, windows[1:]))
+    assert PACKET[windows[1][1]:].startswith("Tax Period Requested: December, 2022")
+    assert tax_period_windows("Form W-2\n", 2020) == [(2020, 0, 9)]
+
+
+def test_forms_are_filed_under_their_period():
+    forms = parse_wi_forms(PACKET, form_patterns, 2021)
+    by_year = {year: [f['UniqueID'][-2:] for f in year_forms] for year, year_forms in forms.items()}
+    assert by_year == {2021: ['01', '02', '03'], 2022: ['04'], 2023: ['05', '06']}
+    assert forms[2023][1]['Income'] == 6000.0
+
+
+def test_parallel_windows_match_serial(monkeypatch):
+    serial_log, parallel_log = io.StringIO(), io.StringIO()
+    serial = parse_wi_forms(PACKET, form_patterns, 2021, output_buffer=serial_log, workers=1)
+    monkeypatch.setattr(wi_parser, 'PARALLEL_PACKET_CHARS', 0)
+    parallel = parse_wi_forms(PACKET, form_patterns, 2021, output_buffer=parallel_log, workers=4)
+    assert parallel == serial
+    # Window logs are replayed in text order
+    assert parallel_log.getvalue() == serial_log.getvalue()
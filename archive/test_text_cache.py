@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the extracted text cache and per-run log capture
+"""
+
+import logging
+import os
+import threading
+
+from utils.run_log import capture_run_log
+from utils.text_cache import TextCache, text_key
+
+TEXT = "Form W-2 Wage and Tax Statement\r\nEmployer Identification Number (EIN):12-3456789\r\n"
+
+
+def test_put_get_round_trip_keeps_line_breaks(tmp_path):
+    cache = TextCache(str(tmp_path), memory_items=0)
+    key = cache.put(TEXT)
+    assert key == text_key(TEXT) and cache.put(TEXT) == key
+    assert key in cache
+    assert cache.get(key) == TEXT
+    assert cache.get('0' * 64) is None
+
+
+def test_normalized_is_stored_next_to_the_text(tmp_path):
+    cache = TextCache(str(tmp_path), memory_items=0)
+    key = cache.put(TEXT)
+    first = cache.normalized(key)
+    sidecars = [name for name in os.listdir(tmp_path / key[:2]) if '.norm' in name]
+    assert len(sidecars) == 1
+    again = cache.normalized(key)
+    assert str(again) == str(first) and again.anchors == first.anchors
+    assert cache.normalized('0' * 64) is None
+
+
+def test_cleanup_removes_expired_and_least_recently_used_texts(tmp_path):
+    cache = TextCache(str(tmp_path), memory_items=0, ttl_seconds=3600)
+    old, recent = cache.put(TEXT), cache.put(TEXT + "more")
+    cache.normalized(old)
+    now = os.path.getmtime(cache._path(recent))
+    os.utime(cache._path(old), (now - 7200, now - 7200))
+    assert cache.cleanup(now) == 1
+    assert old not in cache and cache.get(old) is None
+    assert not [name for name in os.listdir(tmp_path / old[:2]) if name.startswith(old)]
+    assert cache.get(recent) == TEXT + "more"
+
+    cache.max_bytes = 0
+    assert cache.cleanup(now) == 1 and recent not in cache
+    cache.put(TEXT)
+    assert cache.purge() == 1 and cache.get(old) is None
+
+
+def test_run_logs_are_isolated_per_thread():
+    logger = logging.getLogger('test_run_log')
+    logger.setLevel(logging.INFO)
+    logs = {}
+
+    def run(name):
+        with capture_run_log(logger) as run_log:
+            for i in range(50):
+                logger.info(f"{name} {i}")
+        logs[name] = run_log.getvalue().splitlines()
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert logs['a'] == [f"a {i}" for i in range(50)]
+    assert logs['b'] == [f"b {i}" for i in range(50)]
+
+    # Nothing is captured outside a run, and a full buffer drops the oldest lines
+    logger.info("outside")
+    with capture_run_log(logger, max_lines=2) as run_log:
+        for i in range(3):
+            logger.info(f"line {i}")
+    assert run_log.getvalue() == "[1 earlier log lines dropped]\nline 1\nline 2\n"
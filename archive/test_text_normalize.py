@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for transcript normalization and its offset map
+"""
+
+import io
+import random
+
+from full_form_patterns import form_patterns
+from parsers.pattern_bundle import PatternBundle
+from parsers.text_normalize import NORMALIZE_VERSION, normalize_text, rewrite
+from parsers.wi_parser import parse_wi_forms
+from utils.text_cache import TextCache
+
+
+def test_normalizes_layout_and_ocr_noise():
+    text = "Form 1099–MISC\r\nRents:  \t$1,2O0.00\x0cPayer’s   X $SEE $l00 “q”\r"
+    assert normalize_text(text) == "Form 1099-MISC\nRents: $1,200.00\nPayer's X $SEE $100 \"q\"\n"
+
+
+def test_offsets_map_back_to_the_original():
+    rng = random.Random(5)
+    for _ in range(300):
+        text = ''.join(rng.choice(['a', ' ', '  ', '\r\n', '\t', '–', '$1,O0', '\n']) for _ in range(30))
+        normalized = normalize_text(text)
+        positions = [normalized.to_original(i) for i in range(len(normalized) + 1)]
+        assert positions == sorted(positions) and positions[-1] == len(text)
+        for i, char in enumerate(normalized):
+            if char not in ' \n0':  # unchanged characters sit at their mapped offset
+                assert normalize_text(text[positions[i]]) == char
+
+
+def test_derived_text_maps_through_both_steps():
+    normalized = normalize_text("A  B\r\nHEADER\nC")
+    stripped = rewrite(normalized, [(4, 11, '')])
+    assert stripped == "A B\nC"
+    assert stripped.original_snippet(4, 5) == "C"
+    assert stripped.to_original(2) == 3
+
+
+def test_cache_keeps_normalized_text_with_its_offsets(tmp_path):
+    cache = TextCache(str(tmp_path), memory_items=0)
+    key = cache.put("Wages:   $5.0O\r\n")
+    first = cache.normalized(key)
+    assert (tmp_path / key[:2] / f"{key}.norm{NORMALIZE_VERSION}.json").exists()
+    again = cache.normalized(key)
+    assert again == first == "Wages: $5.00\n"
+    assert again.anchors == first.anchors and again.original == "Wages:   $5.0O\r\n"
+    assert cache.normalized('0' * 64) is None
+
+
+def test_parse_reads_normalized_text_and_logs_original_positions():
+    text = ("Form W–2 Wage and Tax Statement\r\n"
+            "Employer Identification Number (EIN):   12-3456789\r\n"
+            "Wages, tips, and other compensation:   $3O,000.00\r\n"
+            "Form 8888 Something Else\r\n")
+    log = io.StringIO()
+    forms = parse_wi_forms(text, form_patterns, 2022, output_buffer=log)[2022]
+    assert [(f['Form'], f['UniqueID'], f['Income']) for f in forms] == [('W-2', '12-3456789', 30000.0)]
+    # The header match starts at the line break before it: \r\n in the extracted text
+    position = text.index('\r\nForm 8888')
+    assert f"at position {position}." in log.getvalue()
+
+
+def test_normalizer_version_is_part_of_the_form_hashes():
+    bundle = PatternBundle.from_patterns(form_patterns)
+    assert all(info['normalize'] == NORMALIZE_VERSION for info in bundle.forms.values())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for the WI aggregation cube
+"""
+
+from utils.tp_s_parser import TPSParser
+from utils.wi_cube import WICube
+
+WI_DATA = {
+    2021: [
+        {'Form': 'W-2', 'Income': 50000.10, 'Withholding': 5000.0, 'Category': 'Non-SE', 'Owner': 'TP'},
+        {'Form': '1099-NEC', 'Income': 12000.0, 'Withholding': 0.0, 'Category': 'SE', 'Owner': 'S'},
+        {'Form': '1099-INT', 'Income': 0.2, 'Withholding': None, 'Category': 'Neither', 'Owner': None},
+    ],
+    2020: [
+        {'Form': 'W-2', 'Income': 40000.0, 'Withholding': 4000.0, 'Category': 'Non-SE', 'Owner': 'TP'},
+    ],
+}
+
+
+def test_summary_and_projection_rows():
+    cube = WICube.from_wi_data(WI_DATA)
+    summary = cube.summary_rows()
+    assert [row['Tax Year'] for row in summary] == ['2021', '2020']
+    assert summary[0]['Number of Forms'] == 3
+    assert summary[0]['SE Income'] == 12000.0
+    assert summary[0]['Non-SE Withholding'] == 5000.0
+    assert summary[0]['Other Income'] == 0.2
+    assert summary[0]['Total Income'] == 62000.3
+    assert cube.projection_rows()[1] == {
+        'Tax Year': '2020', 'SE Income': 0.0, 'SE Withholding': 0.0,
+        'Non-SE Income': 40000.0, 'Non-SE Withholding': 4000.0, 'Other Income': 0.0
+    }
+
+
+def test_owner_totals_and_slices():
+    cube = WICube.from_wi_data(WI_DATA)
+    totals = cube.owner_totals(2021)
+    assert totals['taxpayer']['income'] == 50000.1
+    assert totals['spouse']['se_income'] == 12000.0
+    assert totals['joint']['income'] == 0.2
+    assert totals['combined']['non_se_income'] == 50000.1
+    assert TPSParser.aggregate_income_by_owner(WI_DATA)[2021] == totals
+    assert cube.year_total(2021, 'income', categories=['SE', 'Non-SE']) == 62000.1
+    assert cube.total('income', owners=['taxpayer']) == 90000.1
+    assert cube.total('forms') == 4
+    assert cube.owner_totals(1999)['combined']['income'] == 0.0
@@ -0,0 +1,162 @@
+"""
+Disk-backed store for large per-session artifacts
+Session state keeps only small handles; the texts, logs and JSON they point
+to live on disk under a per-session directory with a byte quota, and
+directories of sessions idle longer than the TTL are removed
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARTIFACT_DIR = os.environ.get("TIPARSER_ARTIFACT_DIR", ".session_artifacts")
+DEFAULT_SESSION_QUOTA = int(os.environ.get("TIPARSER_SESSION_QUOTA_MB", "200")) * 1024 * 1024
+DEFAULT_SESSION_TTL = int(os.environ.get("TIPARSER_SESSION_TTL_HOURS", "6")) * 3600
+
+# How often (seconds) put() sweeps expired sessions
+CLEANUP_INTERVAL = 600
+
+_LAST_SEEN = ".last_seen"
+
+
+class SessionArtifactStore:
+    """Per-session artifact files with quotas and idle expiry"""
+
+    def __init__(self, root: str = DEFAULT_ARTIFACT_DIR, quota_bytes: int = DEFAULT_SESSION_QUOTA,
+                 ttl_seconds: int = DEFAULT_SESSION_TTL):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def new_session_id() -> str:
+        return uuid.uuid4().hex
+
+    def _session_dir(self, session_id: str) -> str:
+        return os.path.join(self.root, session_id)
+
+    def _path(self, session_id: str, name: str) -> str:
+        return os.path.join(self._session_dir(session_id), f"{name}.artifact")
+
+    def _touch(self, session_id: str) -> None:
+        path = os.path.join(self._session_dir(session_id), _LAST_SEEN)
+        with open(path, "a"):
+            os.utime(path, None)
+
+    def put(self, session_id: str, name: str, value: Any) -> Dict:
+        """
+        Store an artifact and return its handle
+
+        Strings are stored as-is, anything else as JSON. If the session is
+        over quota afterwards, its least recently used artifacts are evicted.
+
+        Returns:
+            Dict: {'session': ..., 'name': ..., 'kind': 'text'|'json', 'bytes': ...}
+        """
+        kind = "text" if isinstance(value, str) else "json"
+        data = value if kind == "text" else json.dumps(value, default=str)
+        encoded = data.encode("utf-8")
+        if len(encoded) > self.quota_bytes:
+            raise ValueError(f"Artifact {name} ({len(encoded)} bytes) exceeds the session quota")
+
+        session_dir = self._session_dir(session_id)
+        os.makedirs(session_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=session_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(encoded)
+        os.replace(tmp_path, self._path(session_id, name))
+        self._touch(session_id)
+        self._enforce_quota(session_id, keep=name)
+        self._maybe_cleanup()
+        return {'session': session_id, 'name': name, 'kind': kind, 'bytes': len(encoded)}
+
+    def get(self, handle: Optional[Dict], default: Any = None) -> Any:
+        """Load the artifact a handle points to, or `default` if it is gone"""
+        if not handle:
+            return default
+        path = self._path(handle['session'], handle['name'])
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = f.read()
+            os.utime(path, None)
+            self._touch(handle['session'])
+        except FileNotFoundError:
+            return default
+        return data if handle.get('kind') == "text" else json.loads(data)
+
+    def usage(self, session_id: str) -> int:
+        """Bytes currently stored for a session"""
+        session_dir = self._session_dir(session_id)
+        if not os.path.isdir(session_dir):
+            return 0
+        return sum(
+            os.path.getsize(os.path.join(session_dir, f))
+            for f in os.listdir(session_dir) if f.endswith(".artifact")
+        )
+
+    def delete_session(self, session_id: str) -> None:
+        shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+
+    def _enforce_quota(self, session_id: str, keep: str) -> None:
+        session_dir = self._session_dir(session_id)
+        with self._lock:
+            entries = []
+            for f in os.listdir(session_dir):
+                if f.endswith(".artifact") and f != f"{keep}.artifact":
+                    path = os.path.join(session_dir, f)
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            total = self.usage(session_id)
+            for _, size, path in sorted(entries):
+                if total <= self.quota_bytes:
+                    break
+                os.remove(path)
+                total -= size
+                logger.info(f"Evicted session artifact {os.path.basename(path)} (session over quota)")
+
+    def _maybe_cleanup(self) -> None:
+        now = time.time()
+        if now - self._last_cleanup < CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = now
+        self.cleanup_expired(now)
+
+    def cleanup_expired(self, now: Optional[float] = None) -> int:
+        """Remove sessions idle longer than the TTL; returns how many were removed"""
+        now = now or time.time()
+        removed = 0
+        for session_id in os.listdir(self.root):
+            session_dir = self._session_dir(session_id)
+            if not os.path.isdir(session_dir):
+                continue
+            marker = os.path.join(session_dir, _LAST_SEEN)
+            try:
+                last_seen = os.path.getmtime(marker)
+            except FileNotFoundError:
+                last_seen = os.path.getmtime(session_dir)
+            if now - last_seen > self.ttl_seconds:
+                shutil.rmtree(session_dir, ignore_errors=True)
+                removed += 1
+        return removed
+
+
+_default_store = None
+
+
+def get_artifact_store() -> SessionArtifactStore:
+    """Shared SessionArtifactStore for the default directory"""
+    global _default_store
+    if _default_store is None:
+        _default_store = SessionArtifactStore()
+    return _default_store
@@ -0,0 +1,221 @@
+"""
+Columnar store for Account Transcript data
+Holds AT records and their transactions as NumPy columns so totals, code
+filters and alert evaluation run as array operations, and converts back to
+the list-of-dicts format the UI and session state use
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from parsers.at_codes import CATALOG, CODE_GROUPS
+from utils.money import to_cents, to_dollars
+
+# Record-level amount fields stored as int64 cents
+RECORD_AMOUNT_FIELDS = [
+    'account_balance', 'accrued_interest', 'accrued_penalty', 'total_balance',
+    'adjusted_gross_income', 'taxable_income', 'tax_per_return',
+    'se_tax_taxpayer', 'se_tax_spouse', 'total_se_tax'
+]
+
+NO_CODE = -1   # code column value for 'n/a' and other non-numeric codes
+NO_CYCLE = 0   # cycle column value when the transcript has no cycle
+
+
+class _Categories:
+    """Category values <-> small integer codes"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        if value not in self.index:
+            self.index[value] = len(self.values)
+            self.values.append(value)
+        return self.index[value]
+
+    def codes(self, values: Iterable[str]) -> List[int]:
+        return [self.index[v] for v in values if v in self.index]
+
+
+class ATColumns:
+    """AT records and transactions as NumPy columns"""
+
+    def __init__(self):
+        self.years = _Categories()
+        self.owners = _Categories()
+        # Per record
+        self.record_year = np.zeros(0, dtype=np.int32)
+        self.record_owner = np.zeros(0, dtype=np.int32)
+        self.record_amounts: Dict[str, np.ndarray] = {f: np.zeros(0, dtype=np.int64) for f in RECORD_AMOUNT_FIELDS}
+        self.record_extras: List[Dict] = []
+        # Per transaction
+        self.record = np.zeros(0, dtype=np.int32)
+        self.code = np.zeros(0, dtype=np.int16)
+        self.cycle = np.zeros(0, dtype=np.int64)
+        self.posted = np.zeros(0, dtype='datetime64[D]')
+        self.amount = np.zeros(0, dtype=np.int64)
+        self.code_text = np.zeros(0, dtype=object)
+        self.meaning = np.zeros(0, dtype=object)
+        self.raw_dates: Dict[int, str] = {}  # non-ISO post dates kept verbatim
+
+    @classmethod
+    def from_records(cls, at_data: List[Dict]) -> "ATColumns":
+        """Build the columns from the `at_data` list kept in session state"""
+        store = cls()
+        record_year, record_owner = [], []
+        record_amounts = {f: [] for f in RECORD_AMOUNT_FIELDS}
+        record, code, cycle, posted, amount, code_text, meaning = [], [], [], [], [], [], []
+
+        for r, data in enumerate(at_data):
+            record_year.append(store.years.code(str(data.get('tax_year', 'Unknown'))))
+            record_owner.append(store.owners.code(str(data.get('owner', 'Unknown'))))
+            for f in RECORD_AMOUNT_FIELDS:
+                record_amounts[f].append(to_cents(data.get(f, 0)))
+            store.record_extras.append({
+                k: v for k, v in data.items()
+                if k not in RECORD_AMOUNT_FIELDS and k not in ('tax_year', 'owner', 'transactions')
+            })
+            for trans in data.get('transactions', []):
+                text = str(trans.get('code', ''))
+                record.append(r)
+                code_text.append(text)
+                code.append(int(text) if text.isdigit() else NO_CODE)
+                cycle_digits = str(trans.get('cycle_date', '')).replace('-', '')
+                cycle.append(int(cycle_digits) if cycle_digits.isdigit() else NO_CYCLE)
+                date = trans.get('date', '')
+                try:
+                    posted.append(np.datetime64(date, 'D') if date else np.datetime64('NaT'))
+                except ValueError:
+                    store.raw_dates[len(posted)] = date
+                    posted.append(np.datetime64('NaT'))
+                amount.append(to_cents(trans.get('amount', 0)))
+                meaning.append(trans.get('meaning', ''))
+
+        store.record_year = np.array(record_year, dtype=np.int32)
+        store.record_owner = np.array(record_owner, dtype=np.int32)
+        store.record_amounts = {f: np.array(v, dtype=np.int64) for f, v in record_amounts.items()}
+        store.record = np.array(record, dtype=np.int32)
+        store.code = np.array(code, dtype=np.int16)
+        store.cycle = np.array(cycle, dtype=np.int64)
+        store.posted = np.array(posted, dtype='datetime64[D]')
+        store.amount = np.array(amount, dtype=np.int64)
+        store.code_text = np.array(code_text, dtype=object)
+        store.meaning = np.array(meaning, dtype=object)
+        return store
+
+    def __len__(self) -> int:
+        return len(self.code)
+
+    @property
+    def year(self) -> np.ndarray:
+        """Tax year category code of every transaction"""
+        return self.record_year[self.record]
+
+    @property
+    def owner(self) -> np.ndarray:
+        """Owner category code of every transaction"""
+        return self.record_owner[self.record]
+
+    def to_records(self) -> List[Dict]:
+        """Convert back to the `at_data` list-of-dicts format"""
+        records = []
+        for r in range(len(self.record_year)):
+            data = {'tax_year': self.years.values[self.record_year[r]]}
+            for f in RECORD_AMOUNT_FIELDS:
+                data[f] = to_dollars(self.record_amounts[f][r])
+            data.update(self.record_extras[r])
+            data['owner'] = self.owners.values[self.record_owner[r]]
+            data['transactions'] = []
+            records.append(data)
+        for i in range(len(self)):
+            cycle = int(self.cycle[i])
+            cycle_text = str(cycle)
+            posted = self.posted[i]
+            records[self.record[i]]['transactions'].append({
+                'code': self.code_text[i],
+                'meaning': self.meaning[i],
+                'cycle_date': f"{cycle_text[:4]}-{cycle_text[4:6]}-{cycle_text[6:]}" if cycle != NO_CYCLE else '',
+                'date': self.raw_dates.get(i, '' if np.isnat(posted) else str(posted)),
+                'amount': to_dollars(self.amount[i])
+            })
+        return records
+
+    def mask(self, codes: Optional[Iterable] = None, years: Optional[Iterable[str]] = None,
+             owners: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Boolean transaction mask for the given codes, tax years and owners"""
+        selected = np.ones(len(self), dtype=bool)
+        if codes is not None:
+            selected &= np.isin(self.code, [int(c) for c in codes if str(c).isdigit()])
+        if years is not None:
+            selected &= np.isin(self.year, self.years.codes(str(y) for y in years))
+        if owners is not None:
+            selected &= np.isin(self.owner, self.owners.codes(owners))
+        return selected
+
+    def amount_total(self, selected: Optional[np.ndarray] = None) -> float:
+        """Sum of transaction amounts (dollars), optionally over a mask"""
+        amounts = self.amount if selected is None else self.amount[selected]
+        return to_dollars(amounts.sum())
+
+    def group_total(self, group: str, selected: Optional[np.ndarray] = None) -> float:
+        """Total of a CODE_GROUPS group (e.g. 'penalty', 'interest'), in dollars"""
+        group_mask = self.mask(codes=CODE_GROUPS[group])
+        if selected is not None:
+            group_mask &= selected
+        return self.amount_total(group_mask)
+
+    def totals_by_year(self, fields: Iterable[str] = ('account_balance', 'accrued_interest', 'accrued_penalty')) -> Dict[str, Dict[str, float]]:
+        """Record amount fields summed per tax year, in dollars"""
+        fields = list(fields)
+        n_years = len(self.years.values)
+        totals = {}
+        for f in fields:
+            sums = np.zeros(n_years, dtype=np.int64)
+            np.add.at(sums, self.record_year, self.record_amounts[f])
+            totals[f] = sums
+        return {
+            year: {f: to_dollars(totals[f][y]) for f in fields}
+            for y, year in enumerate(self.years.values)
+        }
+
+    def totals_by_code(self, selected: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """Transaction amounts summed per code, in dollars"""
+        codes = self.code if selected is None else self.code[selected]
+        amounts = self.amount if selected is None else self.amount[selected]
+        unique, inverse = np.unique(codes, return_inverse=True)
+        sums = np.zeros(len(unique), dtype=np.int64)
+        np.add.at(sums, inverse, amounts)
+        return {('n/a' if c == NO_CODE else f"{c:03d}"): to_dollars(s) for c, s in zip(unique, sums)}
+
+    def alerts(self, catalog=CATALOG) -> List[Dict]:
+        """
+        Transaction alerts in transaction order (what get_transaction_alerts shows)
+
+        Codes are matched against each alert category with one vectorized
+        membership test per category; tax_year is taken from the record.
+        """
+        present = [int(c) for c in np.unique(self.code) if c != NO_CODE]
+        hits = []  # (transaction index, category order, category)
+        for order, category in enumerate(catalog.alert_categories):
+            category_codes = [c for c in present if category in catalog.categories(f"{c:03d}")]
+            for i in np.flatnonzero(np.isin(self.code, category_codes)):
+                hits.append((i, order, category))
+        hits.sort()
+        alerts = []
+        for i, _, category in hits:
+            spec = catalog.alert_categories[category]
+            alerts.append({
+                'category': category,
+                'severity': spec['severity'],
+                'icon': spec['icon'],
+                'code': self.code_text[i],
+                'meaning': self.meaning[i],
+                'date': self.raw_dates.get(i, '' if np.isnat(self.posted[i]) else str(self.posted[i])),
+                'description': '',
+                'amount': to_dollars(self.amount[i]),
+                'tax_year': self.years.values[self.record_year[self.record[i]]]
+            })
+        return alerts
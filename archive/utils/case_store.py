@@ -0,0 +1,512 @@
+"""
+Persistent case result store (SQLite)
+Keeps parsed WI/AT results in normalized, indexed tables so a case can be
+re-opened without reprocessing PDFs and cross-case questions
+(e.g. "all cases with an open TC 420") are answered by index lookups
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from parsers.at_codes import CLOSING_CODES
+
+DEFAULT_DB_PATH = os.environ.get("TIPARSER_CASE_DB", "case_store.db")
+
+# AT record scalar fields stored as columns
+AT_AMOUNT_FIELDS = [
+    'account_balance', 'accrued_interest', 'accrued_penalty', 'total_balance',
+    'adjusted_gross_income', 'taxable_income', 'tax_per_return',
+    'se_tax_taxpayer', 'se_tax_spouse', 'total_se_tax'
+]
+
+# Columns added after the first release; created on open for older databases
+MIGRATIONS = {
+    'cases': [('pattern_hash', 'TEXT'), ('form_hashes', 'TEXT'), ('at_pattern_hash', 'TEXT'), ('wi_filing_status', 'TEXT')],
+    'documents': [('text_key', 'TEXT')],
+    'forms': [('duplicates', 'TEXT')],
+}
+
+# Posted dates are stored as ISO (YYYY-MM-DD) so they compare as strings;
+# MM-DD-YYYY dates (kept verbatim by the AT parser when not a valid date)
+# are rearranged on write and in older databases on open
+_US_DATE = re.compile(r'(\d{2})[-/](\d{2})[-/](\d{4})')
+_US_DATE_GLOB = "'[0-9][0-9][-/][0-9][0-9][-/][0-9][0-9][0-9][0-9]'"
+_US_TO_ISO_SQL = "substr(posted_date, 7, 4) || '-' || substr(posted_date, 1, 2) || '-' || substr(posted_date, 4, 2)"
+
+
+def _iso_date(value: Optional[str]) -> Optional[str]:
+    """MM-DD-YYYY or MM/DD/YYYY -> YYYY-MM-DD (other values unchanged)"""
+    match = _US_DATE.fullmatch(value.strip()) if isinstance(value, str) else None
+    return f"{match[3]}-{match[1]}-{match[2]}" if match else value
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    case_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    wi_summary TEXT,
+    wi_projection TEXT,
+    pattern_hash TEXT,
+    form_hashes TEXT,
+    at_pattern_hash TEXT,
+    wi_filing_status TEXT
+);
+
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_id TEXT NOT NULL REFERENCES cases(case_id) ON DELETE CASCADE,
+    doc_type TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    owner TEXT,
+    ssn TEXT,
+    tax_periods TEXT,
+    form_matches TEXT,
+    text_key TEXT,
+    UNIQUE (case_id, doc_type, filename)
+);
+
+CREATE TABLE IF NOT EXISTS forms (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_id TEXT NOT NULL REFERENCES cases(case_id) ON DELETE CASCADE,
+    document_id INTEGER REFERENCES documents(id) ON DELETE CASCADE,
+    tax_year INTEGER NOT NULL,
+    form TEXT NOT NULL,
+    unique_id TEXT,
+    payer TEXT,
+    income REAL,
+    withholding REAL,
+    category TEXT,
+    owner TEXT,
+    source_file TEXT,
+    payer_blurb TEXT,
+    fields TEXT,
+    duplicates TEXT
+);
+
+CREATE TABLE IF NOT EXISTS at_records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_id TEXT NOT NULL REFERENCES cases(case_id) ON DELETE CASCADE,
+    document_id INTEGER REFERENCES documents(id) ON DELETE CASCADE,
+    tax_year TEXT,
+    owner TEXT,
+    source_file TEXT,
+    filing_status TEXT,
+    processing_date TEXT,
+    account_balance REAL,
+    accrued_interest REAL,
+    accrued_penalty REAL,
+    total_balance REAL,
+    adjusted_gross_income REAL,
+    taxable_income REAL,
+    tax_per_return REAL,
+    se_tax_taxpayer REAL,
+    se_tax_spouse REAL,
+    total_se_tax REAL
+);
+
+CREATE TABLE IF NOT EXISTS at_transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_id TEXT NOT NULL REFERENCES cases(case_id) ON DELETE CASCADE,
+    at_record_id INTEGER NOT NULL REFERENCES at_records(id) ON DELETE CASCADE,
+    tax_year TEXT,
+    code TEXT,
+    meaning TEXT,
+    cycle_date TEXT,
+    posted_date TEXT,
+    amount REAL
+);
+
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_id TEXT NOT NULL REFERENCES cases(case_id) ON DELETE CASCADE,
+    tax_year TEXT,
+    category TEXT,
+    severity TEXT,
+    icon TEXT,
+    code TEXT,
+    meaning TEXT,
+    posted_date TEXT,
+    description TEXT,
+    amount REAL
+);
+
+CREATE TABLE IF NOT EXISTS pattern_evaluations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pattern_hash TEXT NOT NULL,
+    label TEXT,
+    created_at TEXT NOT NULL,
+    documents INTEGER NOT NULL,
+    report TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_documents_case ON documents(case_id);
+CREATE INDEX IF NOT EXISTS idx_documents_text ON documents(doc_type, text_key);
+CREATE INDEX IF NOT EXISTS idx_pattern_evaluations_hash ON pattern_evaluations(pattern_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_cases_pattern_hash ON cases(pattern_hash);
+CREATE INDEX IF NOT EXISTS idx_forms_case_year ON forms(case_id, tax_year);
+CREATE INDEX IF NOT EXISTS idx_forms_year ON forms(tax_year);
+CREATE INDEX IF NOT EXISTS idx_forms_form ON forms(form, tax_year);
+CREATE INDEX IF NOT EXISTS idx_forms_unique_id ON forms(unique_id);
+CREATE INDEX IF NOT EXISTS idx_at_records_case_year ON at_records(case_id, tax_year);
+CREATE INDEX IF NOT EXISTS idx_at_tx_code ON at_transactions(code, case_id, tax_year);
+CREATE INDEX IF NOT EXISTS idx_at_tx_record ON at_transactions(at_record_id, code);
+CREATE INDEX IF NOT EXISTS idx_at_tx_case_year ON at_transactions(case_id, tax_year);
+CREATE INDEX IF NOT EXISTS idx_alerts_case ON alerts(case_id, tax_year);
+CREATE INDEX IF NOT EXISTS idx_alerts_code ON alerts(code);
+"""
+
+
+class CaseStore:
+    """Read and write parsed case results in a local SQLite database"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            for table, columns in MIGRATIONS.items():
+                existing = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if existing:
+                    for column, column_type in columns:
+                        if column not in existing:
+                            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+            conn.executescript(SCHEMA)
+            for table in ('at_transactions', 'alerts'):
+                conn.execute(f"UPDATE {table} SET posted_date = {_US_TO_ISO_SQL} "
+                             f"WHERE posted_date GLOB {_US_DATE_GLOB}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def has_case(self, case_id: str) -> bool:
+        """Check whether results for a case are stored"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT 1 FROM cases WHERE case_id = ?", (str(case_id),)).fetchone()
+        return row is not None
+
+    def save_case(self, case_id: str, wi_data: Optional[Dict] = None, at_data: Optional[List] = None,
+                  wi_summary: Optional[List] = None, wi_projection: Optional[List] = None,
+                  at_alerts: Optional[List] = None, wi_form_matching: Optional[List] = None,
+                  pattern_hash: Optional[str] = None, form_hashes: Optional[Dict[str, str]] = None,
+                  at_pattern_hash: Optional[str] = None, wi_filing_status: Optional[str] = None,
+                  text_keys: Optional[Dict[str, Dict[str, str]]] = None) -> None:
+        """
+        Replace all stored results for a case
+
+        Args:
+            case_id: TPS case ID
+            wi_data: {tax_year: [form dicts]} as built by process_wi_documents
+            at_data: List of AT record dicts as built by process_at_documents
+            wi_summary: Per-year WI summary rows
+            wi_projection: Per-year WI projection rows
+            at_alerts: Alerts from get_transaction_alerts
+            wi_form_matching: Per-file form matching results
+            pattern_hash: Hash of the pattern bundle the WI results were parsed with
+            form_hashes: Per-form pattern hashes of that bundle
+            at_pattern_hash: at_parser.pattern_hash() the AT results were parsed with
+            wi_filing_status: Filing status the WI calculations were evaluated with
+            text_keys: {doc_type: {filename: text cache key}} of the extracted texts,
+                so results can be re-parsed without downloading the PDFs again
+        """
+        case_id = str(case_id)
+        now = datetime.now().isoformat()
+        with self._lock, self._connect() as conn:
+            existing = conn.execute("SELECT created_at FROM cases WHERE case_id = ?", (case_id,)).fetchone()
+            created_at = existing['created_at'] if existing else now
+            conn.execute("DELETE FROM cases WHERE case_id = ?", (case_id,))
+            conn.execute(
+                "INSERT INTO cases (case_id, created_at, updated_at, wi_summary, wi_projection, pattern_hash, form_hashes, "
+                "at_pattern_hash, wi_filing_status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (case_id, created_at, now, json.dumps(wi_summary or []), json.dumps(wi_projection or []),
+                 pattern_hash, json.dumps(form_hashes) if form_hashes is not None else None,
+                 at_pattern_hash, wi_filing_status)
+            )
+
+            doc_ids = {}
+
+            def document_id(doc_type, filename, **values):
+                key = (doc_type, filename)
+                if key not in doc_ids:
+                    cur = conn.execute(
+                        "INSERT INTO documents (case_id, doc_type, filename, owner, ssn, tax_periods, form_matches) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (case_id, doc_type, filename, values.get('owner'), values.get('ssn'),
+                         json.dumps(values.get('tax_periods')) if values.get('tax_periods') is not None else None,
+                         json.dumps(values.get('form_matches')) if values.get('form_matches') is not None else None)
+                    )
+                    doc_ids[key] = cur.lastrowid
+                return doc_ids[key]
+
+            for result in wi_form_matching or []:
+                document_id('WI', result.get('filename'), owner=result.get('owner'), ssn=result.get('ssn'),
+                            tax_periods=result.get('tax_period'), form_matches=result.get('form_matches'))
+
+            for year, forms in (wi_data or {}).items():
+                for form in forms:
+                    source_file = form.get('SourceFile')
+                    doc_id = document_id('WI', source_file, owner=form.get('Owner')) if source_file else None
+                    conn.execute(
+                        "INSERT INTO forms (case_id, document_id, tax_year, form, unique_id, payer, income, withholding, "
+                        "category, owner, source_file, payer_blurb, fields, duplicates) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (case_id, doc_id, int(year), form.get('Form'), form.get('UniqueID'), form.get('Label'),
+                         form.get('Income'), form.get('Withholding'), form.get('Category'), form.get('Owner'),
+                         source_file, form.get('PayerBlurb'), json.dumps(form.get('Fields', {})),
+                         json.dumps(form['Duplicates']) if form.get('Duplicates') else None)
+                    )
+
+            for record in at_data or []:
+                source_file = record.get('source_file')
+                doc_id = document_id('AT', source_file, owner=record.get('owner')) if source_file else None
+                columns = ['case_id', 'document_id', 'tax_year', 'owner', 'source_file', 'filing_status',
+                           'processing_date'] + AT_AMOUNT_FIELDS
+                values = [case_id, doc_id, record.get('tax_year'), record.get('owner'), source_file,
+                          record.get('filing_status'), record.get('processing_date')]
+                values += [record.get(field) for field in AT_AMOUNT_FIELDS]
+                cur = conn.execute(
+                    f"INSERT INTO at_records ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    values
+                )
+                record_id = cur.lastrowid
+                conn.executemany(
+                    "INSERT INTO at_transactions (case_id, at_record_id, tax_year, code, meaning, cycle_date, "
+                    "posted_date, amount) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(case_id, record_id, record.get('tax_year'), t.get('code'), t.get('meaning'),
+                      t.get('cycle_date'), _iso_date(t.get('date')), t.get('amount'))
+                     for t in record.get('transactions', [])]
+                )
+
+            for doc_type, keys in (text_keys or {}).items():
+                for filename, text_key in keys.items():
+                    conn.execute("UPDATE documents SET text_key = ? WHERE id = ?",
+                                 (text_key, document_id(doc_type, filename)))
+
+            conn.executemany(
+                "INSERT INTO alerts (case_id, tax_year, category, severity, icon, code, meaning, posted_date, "
+                "description, amount) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(case_id, a.get('tax_year'), a.get('category'), a.get('severity'), a.get('icon'), a.get('code'),
+                  a.get('meaning'), _iso_date(a.get('date')), a.get('description'), a.get('amount'))
+                 for a in at_alerts or []]
+            )
+
+    def load_case(self, case_id: str) -> Optional[Dict]:
+        """
+        Load stored results for a case
+
+        Returns:
+            Dict with the session keys wi_data, at_data, wi_summary,
+            wi_projection, at_alerts and wi_form_matching, plus
+            updated_at, the pattern hashes, wi_filing_status and
+            text_keys, or None if the case has not been stored
+        """
+        case_id = str(case_id)
+        with self._connect() as conn:
+            case_row = conn.execute("SELECT * FROM cases WHERE case_id = ?", (case_id,)).fetchone()
+            if case_row is None:
+                return None
+
+            wi_data = {}
+            for row in conn.execute("SELECT * FROM forms WHERE case_id = ? ORDER BY id", (case_id,)):
+                form = {
+                    'Form': row['form'],
+                    'UniqueID': row['unique_id'],
+                    'Label': row['payer'],
+                    'Income': row['income'],
+                    'Withholding': row['withholding'],
+                    'Category': row['category'],
+                    'Fields': json.loads(row['fields'] or '{}'),
+                    'PayerBlurb': row['payer_blurb'],
+                    'Owner': row['owner'],
+                    'SourceFile': row['source_file']
+                }
+                # Files the form was collapsed from (see utils.form_dedup)
+                if row['duplicates']:
+                    form['Duplicates'] = json.loads(row['duplicates'])
+                wi_data.setdefault(row['tax_year'], []).append(form)
+
+            transactions = {}
+            for row in conn.execute("SELECT * FROM at_transactions WHERE case_id = ? ORDER BY id", (case_id,)):
+                transactions.setdefault(row['at_record_id'], []).append({
+                    'code': row['code'],
+                    'meaning': row['meaning'],
+                    'cycle_date': row['cycle_date'],
+                    'date': row['posted_date'],
+                    'amount': row['amount']
+                })
+
+            at_data = []
+            for row in conn.execute("SELECT * FROM at_records WHERE case_id = ? ORDER BY id", (case_id,)):
+                record = {'tax_year': row['tax_year']}
+                for field in AT_AMOUNT_FIELDS:
+                    record[field] = row[field]
+                if row['filing_status'] is not None:
+                    record['filing_status'] = row['filing_status']
+                if row['processing_date'] is not None:
+                    record['processing_date'] = row['processing_date']
+                record['transactions'] = transactions.get(row['id'], [])
+                record['owner'] = row['owner']
+                record['source_file'] = row['source_file']
+                at_data.append(record)
+
+            at_alerts = [{
+                'category': row['category'],
+                'severity': row['severity'],
+                'icon': row['icon'],
+                'code': row['code'],
+                'meaning': row['meaning'],
+                'date': row['posted_date'],
+                'description': row['description'],
+                'amount': row['amount'],
+                'tax_year': row['tax_year']
+            } for row in conn.execute("SELECT * FROM alerts WHERE case_id = ? ORDER BY id", (case_id,))]
+
+            wi_form_matching = [{
+                'filename': row['filename'],
+                'owner': row['owner'],
+                'ssn': row['ssn'],
+                'tax_period': json.loads(row['tax_periods']) if row['tax_periods'] else [],
+                'form_matches': json.loads(row['form_matches'])
+            } for row in conn.execute(
+                "SELECT * FROM documents WHERE case_id = ? AND doc_type = 'WI' AND form_matches IS NOT NULL ORDER BY id",
+                (case_id,)
+            )]
+
+            text_keys = {}
+            for row in conn.execute(
+                "SELECT doc_type, filename, text_key FROM documents WHERE case_id = ? AND text_key IS NOT NULL ORDER BY id",
+                (case_id,)
+            ):
+                text_keys.setdefault(row['doc_type'], {})[row['filename']] = row['text_key']
+
+        return {
+            'wi_data': wi_data,
+            'at_data': at_data,
+            'wi_summary': json.loads(case_row['wi_summary'] or '[]'),
+            'wi_projection': json.loads(case_row['wi_projection'] or '[]'),
+            'at_alerts': at_alerts,
+            'wi_form_matching': wi_form_matching,
+            'updated_at': case_row['updated_at'],
+            'pattern_hash': case_row['pattern_hash'],
+            'form_hashes': json.loads(case_row['form_hashes']) if case_row['form_hashes'] else {},
+            'at_pattern_hash': case_row['at_pattern_hash'],
+            'wi_filing_status': case_row['wi_filing_status'],
+            'text_keys': text_keys
+        }
+
+    def delete_case(self, case_id: str) -> None:
+        """Remove all stored results for a case"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM cases WHERE case_id = ?", (str(case_id),))
+
+    def cases_with_transaction(self, code: str, open_only: bool = False,
+                               tax_year: Optional[str] = None) -> List[Dict]:
+        """
+        Find cases whose account transcripts contain a transaction code
+
+        Args:
+            code: IRS transaction code, e.g. "420"
+            open_only: Only return modules where no closing code (see
+                CLOSING_CODES) was posted after the opening transaction
+            tax_year: Restrict to one tax year
+
+        Returns:
+            List of {case_id, tax_year, owner, posted_date, amount}
+        """
+        closing = CLOSING_CODES.get(str(code), [])
+        sql = (
+            "SELECT t.case_id, t.tax_year, r.owner, t.posted_date, t.amount "
+            "FROM at_transactions t JOIN at_records r ON r.id = t.at_record_id "
+            "WHERE t.code = ?"
+        )
+        params = [str(code)]
+        if tax_year is not None:
+            sql += " AND t.tax_year = ?"
+            params.append(str(tax_year))
+        if open_only and closing:
+            sql += (
+                " AND NOT EXISTS (SELECT 1 FROM at_transactions c WHERE c.at_record_id = t.at_record_id"
+                f" AND c.code IN ({', '.join('?' * len(closing))}) AND c.posted_date >= t.posted_date)"
+            )
+            params.extend(closing)
+        sql += " ORDER BY t.case_id, t.tax_year"
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def cases_parsed_with_other_patterns(self, pattern_hash: str, at_pattern_hash: Optional[str] = None) -> List[str]:
+        """Cases whose WI (or, if given, AT) results were parsed with different or unknown patterns"""
+        sql = "SELECT case_id FROM cases WHERE pattern_hash IS NULL OR pattern_hash != ?"
+        params = [pattern_hash]
+        if at_pattern_hash is not None:
+            sql += " OR at_pattern_hash IS NULL OR at_pattern_hash != ?"
+            params.append(at_pattern_hash)
+        with self._connect() as conn:
+            return [row['case_id'] for row in conn.execute(sql + " ORDER BY case_id", params)]
+
+    def document_texts(self, doc_type: str = 'WI') -> List[Dict]:
+        """Cached-text references of every stored document of a type: {case_id, filename, text_key}"""
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(
+                "SELECT case_id, filename, text_key FROM documents WHERE doc_type = ? AND text_key IS NOT NULL "
+                "ORDER BY case_id, id", (doc_type,)
+            )]
+
+    def save_pattern_evaluation(self, report: Dict, label: Optional[str] = None) -> int:
+        """Store a corpus evaluation report (see utils/corpus_eval.py); returns its id"""
+        with self._lock, self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO pattern_evaluations (pattern_hash, label, created_at, documents, report) VALUES (?, ?, ?, ?, ?)",
+                (report['pattern_hash'], label, datetime.now().isoformat(), report['documents'], json.dumps(report))
+            )
+            return cur.lastrowid
+
+    def pattern_evaluations(self) -> List[Dict]:
+        """Stored evaluations, newest first (without the reports)"""
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(
+                "SELECT id, pattern_hash, label, created_at, documents FROM pattern_evaluations ORDER BY id DESC"
+            )]
+
+    def load_pattern_evaluation(self, pattern_hash: str) -> Optional[Dict]:
+        """Latest stored evaluation report for a pattern bundle hash"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT report FROM pattern_evaluations WHERE pattern_hash = ? ORDER BY id DESC LIMIT 1", (pattern_hash,)
+            ).fetchone()
+        return json.loads(row['report']) if row else None
+
+    def forms_by_identifier(self, unique_id: str) -> List[Dict]:
+        """Find stored WI forms by payer/employer EIN or FIN across all cases"""
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(
+                "SELECT case_id, tax_year, form, payer, income, withholding, owner FROM forms "
+                "WHERE unique_id = ? ORDER BY case_id, tax_year", (unique_id,)
+            )]
+
+
+_default_store = None
+
+
+def get_case_store() -> CaseStore:
+    """Shared CaseStore for the default database path"""
+    global _default_store
+    if _default_store is None:
+        _default_store = CaseStore()
+    return _default_store
@@ -0,0 +1,243 @@
+"""
+Corpus-wide WI pattern evaluation
+Runs a pattern bundle over every cached WI transcript text in the case store
+and reports, per form and field, how often the pattern matches and the field
+captures, which "Form ..." headers no pattern covers, and the CPU time spent
+in each regex. Reports are stored per bundle hash so pattern versions can be
+compared, and a candidate bundle can be scored against the corpus before it
+ships.
+
+Usage:
+    python -m utils.corpus_eval                              # current patterns, stored
+    python -m utils.corpus_eval --candidate bundle.json      # compare a candidate with the current patterns
+    python -m utils.corpus_eval --workers 8 --no-save
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from parsers.pattern_bundle import PatternBundle, get_pattern_bundle
+from parsers.regex_backend import get_regex_backend
+from parsers.regex_guard import MAX_SECTION_SCAN_CHARS
+from parsers.text_normalize import normalize_text
+from parsers.wi_parser import find_form_headers
+from utils.case_store import CaseStore, get_case_store
+from utils.text_cache import DEFAULT_CACHE_DIR, TextCache
+
+# Worker-process state, set by _init_worker
+_worker_bundle: Optional[PatternBundle] = None
+_worker_texts: Optional[TextCache] = None
+
+
+def evaluate_text(text: str, bundle: PatternBundle) -> Dict:
+    """
+    Pattern statistics for one transcript text
+
+    The text is normalized and sections are split and scanned the way
+    parse_wi_forms does it (from one match of a form pattern to the next, at
+    most MAX_SECTION_SCAN_CHARS).
+    Times are CPU nanoseconds.
+
+    Returns:
+        {'forms': {form: {'sections', 'pattern_ns', 'fields': {field: {'captures', 'ns'}}}},
+         'unmatched_headers': [label, ...]}
+    """
+    text = normalize_text(text)
+    forms = {}
+    spans = []
+    for name, info in bundle.forms.items():
+        start_ns = time.thread_time_ns()
+        matches = list(bundle.pattern(name).finditer(text))
+        stats = {'sections': len(matches), 'pattern_ns': time.thread_time_ns() - start_ns, 'fields': {}}
+        spans.extend((m.start(), m.end()) for m in matches)
+        # Sections as (start, end) offsets, scanned in place like parse_wi_forms does
+        sections = [(m.start(), min(matches[i + 1].start() if i + 1 < len(matches) else len(text),
+                                    m.start() + MAX_SECTION_SCAN_CHARS))
+                    for i, m in enumerate(matches)]
+        for field_name, regex in info['fields'].items():
+            if not regex:
+                continue
+            field = bundle.field(name, field_name)
+            captures, elapsed = 0, 0
+            for start, end in sections:
+                start_ns = time.thread_time_ns()
+                hit = field.search(text, start, end)
+                elapsed += time.thread_time_ns() - start_ns
+                captures += hit is not None
+            stats['fields'][field_name] = {'captures': captures, 'ns': elapsed}
+        forms[name] = stats
+    unmatched = [label for label, start, _ in find_form_headers(text)
+                 if not any(ms <= start < me for ms, me in spans)]
+    return {'forms': forms, 'unmatched_headers': unmatched}
+
+
+def _init_worker(bundle_json: str, cache_root: str, backend_name: Optional[str] = None) -> None:
+    global _worker_bundle, _worker_texts
+    _worker_bundle = PatternBundle.from_json(bundle_json, get_regex_backend(backend_name))
+    _worker_bundle.compile_all()
+    _worker_texts = TextCache(cache_root, memory_items=0)
+
+
+def _evaluate_key(text_key: str) -> Optional[Dict]:
+    text = _worker_texts.normalized(text_key)
+    return None if text is None else evaluate_text(text, _worker_bundle)
+
+
+def aggregate(results: Iterable[Dict], bundle: PatternBundle) -> Dict:
+    """Combine per-text statistics into a corpus report"""
+    report_forms = {
+        name: {'documents_matched': 0, 'sections': 0, 'pattern_ms': 0.0,
+               'fields': {f: {'captures': 0, 'ms': 0.0} for f, regex in info['fields'].items() if regex}}
+        for name, info in bundle.forms.items()
+    }
+    unmatched = Counter()
+    documents = 0
+    for result in results:
+        documents += 1
+        unmatched.update(result['unmatched_headers'])
+        for name, stats in result['forms'].items():
+            form = report_forms[name]
+            form['documents_matched'] += stats['sections'] > 0
+            form['sections'] += stats['sections']
+            form['pattern_ms'] += stats['pattern_ns'] / 1e6
+            for field_name, field_stats in stats['fields'].items():
+                form['fields'][field_name]['captures'] += field_stats['captures']
+                form['fields'][field_name]['ms'] += field_stats['ns'] / 1e6
+
+    for form in report_forms.values():
+        form['match_rate'] = form['documents_matched'] / documents if documents else 0.0
+        for field in form['fields'].values():
+            field['capture_rate'] = field['captures'] / form['sections'] if form['sections'] else 0.0
+    return {
+        'pattern_hash': bundle.hash,
+        'documents': documents,
+        'forms': report_forms,
+        'unmatched_headers': dict(unmatched.most_common()),
+    }
+
+
+def evaluate_corpus(text_keys: List[str], bundle: Optional[PatternBundle] = None, workers: Optional[int] = None,
+                    cache_root: str = DEFAULT_CACHE_DIR) -> Dict:
+    """
+    Evaluate a bundle over cached texts
+
+    Args:
+        text_keys: Text cache keys to evaluate (duplicates are evaluated once)
+        bundle: Pattern bundle (default: the current full_form_patterns)
+        workers: Worker processes, or threads when the bundle's regex backend
+            releases the GIL (default: CPU count; 1 runs in-process)
+        cache_root: Text cache directory
+
+    Returns:
+        Report with pattern_hash, documents, missing_texts, elapsed_s,
+        per-form match_rate / sections / pattern_ms, per-field
+        capture_rate / captures / ms, and unmatched_headers counts
+    """
+    bundle = bundle or get_pattern_bundle()
+    keys = list(dict.fromkeys(text_keys))
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    init_args = (bundle.to_json(), cache_root, bundle.backend.name)
+    if bundle.backend.releases_gil and workers > 1 and len(keys) > 1:
+        # Matching runs without the GIL: threads share the compiled bundle and the text cache
+        texts = TextCache(cache_root, memory_items=0)
+
+        def evaluate(key):
+            text = texts.normalized(key)
+            return None if text is None else evaluate_text(text, bundle)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(evaluate, keys))
+    elif workers <= 1 or len(keys) < 2:
+        _init_worker(*init_args)
+        results = [_evaluate_key(key) for key in keys]
+    else:
+        chunksize = max(1, len(keys) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            results = list(pool.map(_evaluate_key, keys, chunksize=chunksize))
+    report = aggregate((r for r in results if r is not None), bundle)
+    report['missing_texts'] = sum(r is None for r in results)
+    report['elapsed_s'] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def compare_reports(baseline: Dict, candidate: Dict) -> List[Dict]:
+    """Per form/field rate changes from baseline to candidate (largest first)"""
+    rows = []
+    for name in dict.fromkeys(list(baseline['forms']) + list(candidate['forms'])):
+        old, new = baseline['forms'].get(name), candidate['forms'].get(name)
+        rows.append({
+            'form': name, 'field': None,
+            'old_rate': old['match_rate'] if old else None, 'new_rate': new['match_rate'] if new else None,
+        })
+        fields = list(dict.fromkeys(list(old['fields'] if old else []) + list(new['fields'] if new else [])))
+        for field_name in fields:
+            old_field = old['fields'].get(field_name) if old else None
+            new_field = new['fields'].get(field_name) if new else None
+            rows.append({
+                'form': name, 'field': field_name,
+                'old_rate': old_field['capture_rate'] if old_field else None,
+                'new_rate': new_field['capture_rate'] if new_field else None,
+            })
+    changed = [row for row in rows if row['old_rate'] != row['new_rate']]
+    for row in changed:
+        row['delta'] = (row['new_rate'] or 0.0) - (row['old_rate'] or 0.0)
+    return sorted(changed, key=lambda row: -abs(row['delta']))
+
+
+def evaluate_store(store: Optional[CaseStore] = None, bundle: Optional[PatternBundle] = None,
+                   workers: Optional[int] = None, save: bool = True, label: Optional[str] = None,
+                   cache_root: str = DEFAULT_CACHE_DIR) -> Dict:
+    """Evaluate a bundle over every WI document stored in the case store (optionally storing the report)"""
+    store = store or get_case_store()
+    keys = [doc['text_key'] for doc in store.document_texts('WI')]
+    report = evaluate_corpus(keys, bundle, workers=workers, cache_root=cache_root)
+    if save:
+        store.save_pattern_evaluation(report, label=label)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidate", help="Pattern bundle file to evaluate instead of the current patterns")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--label", help="Label stored with the report")
+    parser.add_argument("--no-save", action="store_true", help="Do not store the report")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print per table")
+    args = parser.parse_args()
+
+    store = get_case_store()
+    current = get_pattern_bundle()
+    bundle = PatternBundle.load(args.candidate) if args.candidate else current
+    report = evaluate_store(store, bundle, workers=args.workers, save=not args.no_save, label=args.label)
+    print(f"{report['documents']} documents in {report['elapsed_s']}s (bundle {report['pattern_hash'][:12]}, "
+          f"{report['missing_texts']} texts not cached)")
+
+    slowest = sorted(
+        ((stats['pattern_ms'] + sum(f['ms'] for f in stats['fields'].values()), name, stats)
+         for name, stats in report['forms'].items()), reverse=True
+    )
+    print("\nForm                      match   sections   cpu ms")
+    for cpu_ms, name, stats in slowest[:args.top]:
+        print(f"{name:<24}{stats['match_rate']:>7.1%}{stats['sections']:>11}{cpu_ms:>9.1f}")
+    print("\nUnmatched headers")
+    for label, count in list(report['unmatched_headers'].items())[:args.top]:
+        print(f"{count:>6}  {label}")
+
+    if bundle is not current:
+        baseline = store.load_pattern_evaluation(current.hash)
+        if baseline is None:
+            baseline = evaluate_store(store, current, workers=args.workers, save=not args.no_save, label='baseline')
+        print("\nChanges vs current patterns")
+        for row in compare_reports(baseline, report)[:args.top]:
+            print(f"{row['form']:<24}{row['field'] or '(form match)':<40}{json.dumps(row['old_rate'])} -> "
+                  f"{json.dumps(row['new_rate'])}")
+
+
+if __name__ == "__main__":
+    main()
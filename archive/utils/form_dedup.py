@@ -0,0 +1,114 @@
+"""
+Cross-file duplicate WI forms
+A case often has a TP and a combined or spouse WI transcript for the same
+year, so the same W-2 (same EIN, same amounts) is parsed from both files and
+summed twice. The index keys every form on a canonical hash of its form type,
+tax year, payer identifier (EIN/FIN, or the payer label when the form has
+none) and field values; a form whose key was already seen in another file
+is collapsed into the first one before anything is aggregated. The kept
+form lists the files it was also found in under 'Duplicates', so
+restore_duplicates() can put the copies back when a file is recalculated
+(SSA-1099 income depends on every form of its file, copies included).
+
+Identical forms within one file are left alone: a transcript can list the
+same form twice (e.g. a corrected copy) and only the parser can tell.
+"""
+
+import hashlib
+import json
+from typing import Callable, Dict, List, Optional
+
+from utils.money import to_cents
+
+
+def _canonical_value(value):
+    if isinstance(value, (list, tuple)):
+        return [_canonical_value(v) for v in value]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return to_cents(value)
+    return value
+
+
+def form_key(year, form: Dict) -> str:
+    """Canonical hash of a form: type, tax year, EIN/FIN (or payer label) and field values in cents"""
+    identity = form.get('UniqueID')
+    if identity in (None, 'UNKNOWN'):
+        identity = ['label', form.get('Label')]
+    fields = {name: _canonical_value(value) for name, value in (form.get('Fields') or {}).items()}
+    key = [form.get('Form'), str(year), identity, fields]
+    return hashlib.sha256(json.dumps(key, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+class FormIndex:
+    """Forms of one case by form_key; remembers the first form seen for each key"""
+
+    def __init__(self):
+        self._forms: Dict[str, Dict] = {}
+
+    def __len__(self) -> int:
+        return len(self._forms)
+
+    def add(self, year, form: Dict) -> Optional[Dict]:
+        """
+        Index a form; returns the form it duplicates (first seen in another
+        file), or None when it is new or the earlier copy is from the same file
+        """
+        key = form_key(year, form)
+        first = self._forms.setdefault(key, form)
+        if first is form or first.get('SourceFile') == form.get('SourceFile'):
+            return None
+        return first
+
+
+def dedupe_wi_data(wi_data: Dict) -> Dict:
+    """
+    Collapse forms repeated across the files of a case
+
+    Returns:
+        {'wi_data': {year: [forms]} without the repeats (copies of the input
+         forms; the kept form's 'Duplicates' lists the other files),
+         'duplicates': [{'tax_year', 'form', 'unique_id', 'source_file',
+         'owner', 'kept_source_file', 'kept_owner', 'income'}] one entry per
+         dropped form}
+    """
+    index = FormIndex()
+    result: Dict = {}
+    duplicates: List[Dict] = []
+    for year, forms in wi_data.items():
+        kept = []
+        for form in forms:
+            # 'Duplicates' is rebuilt from what is in wi_data now
+            form = {k: v for k, v in form.items() if k != 'Duplicates'}
+            first = index.add(year, form)
+            if first is None:
+                kept.append(form)
+                continue
+            sources = first.get('Duplicates', [])
+            if form.get('SourceFile') not in sources:
+                first['Duplicates'] = sources + [form.get('SourceFile')]
+            duplicates.append({
+                'tax_year': year, 'form': form.get('Form'), 'unique_id': form.get('UniqueID'),
+                'source_file': form.get('SourceFile'), 'owner': form.get('Owner'),
+                'kept_source_file': first.get('SourceFile'), 'kept_owner': first.get('Owner'),
+                'income': form.get('Income'),
+            })
+        result[year] = kept
+    return {'wi_data': result, 'duplicates': duplicates}
+
+
+def restore_duplicates(wi_data: Dict, owner_of: Callable[[str], str]) -> Dict:
+    """
+    wi_data with the collapsed copies back in their own files (the inverse of dedupe_wi_data)
+
+    A copy is the kept form with its SourceFile and Owner (owner_of(file))
+    swapped; its Income/Withholding are recalculated with its file.
+    """
+    restored: Dict = {}
+    for year, forms in wi_data.items():
+        year_forms = restored.setdefault(year, [])
+        for form in forms:
+            kept = {k: v for k, v in form.items() if k != 'Duplicates'}
+            year_forms.append(kept)
+            for source in form.get('Duplicates') or []:
+                year_forms.append({**kept, 'SourceFile': source, 'Owner': owner_of(source)})
+    return restored
@@ -0,0 +1,344 @@
+"""
+IRS interest and penalty accrual
+Runs an Account Transcript's transactions forward to an as-of date using the
+quarterly underpayment rates compounded daily, the combined failure-to-file /
+failure-to-pay monthly rule, the FTF cap and the minimum late-filing penalty.
+Cumulative interest factors are precomputed once per day, so interest between
+any two dates is a single lookup.
+"""
+
+import calendar
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.money import sum_dollars, to_cents, to_dollars
+
+# Individual underpayment rate (federal short-term rate + 3%) by quarter start.
+# Each rate applies until the next entry; the last one is held going forward.
+UNDERPAYMENT_RATES: List[Tuple[date, float]] = [
+    (date(2011, 4, 1), 0.04),
+    (date(2011, 10, 1), 0.03),
+    (date(2016, 4, 1), 0.04),
+    (date(2018, 4, 1), 0.05),
+    (date(2019, 1, 1), 0.06),
+    (date(2019, 7, 1), 0.05),
+    (date(2020, 7, 1), 0.03),
+    (date(2022, 4, 1), 0.04),
+    (date(2022, 7, 1), 0.05),
+    (date(2022, 10, 1), 0.06),
+    (date(2023, 1, 1), 0.07),
+    (date(2023, 10, 1), 0.08),
+    (date(2025, 1, 1), 0.07),
+]
+
+# Day-index table bounds
+TABLE_START = date(2011, 4, 1)
+TABLE_END = date(2040, 12, 31)
+
+# Penalty rules (IRC 6651)
+FTF_MONTHLY_RATE = 0.05
+FTF_MAX_MONTHS = 5          # 25% cap
+FTP_MONTHLY_RATE = 0.005
+FTP_MAX_MONTHS = 50         # 25% cap
+MIN_PENALTY_DAYS = 60       # minimum FTF penalty applies when more than 60 days late
+
+# Minimum late-filing penalty by tax year (lesser of this or the unpaid tax)
+MIN_LATE_FILING_PENALTY = {
+    2015: 205,
+    2016: 205,
+    2017: 210,
+    2018: 215,
+    2019: 435,
+    2020: 435,
+    2021: 435,
+    2022: 450,
+    2023: 485,
+    2024: 510,
+    2025: 525,
+}
+
+# Return due dates that moved off April 15 (weekends/holidays and COVID relief)
+DUE_DATE_OVERRIDES = {
+    2015: date(2016, 4, 18),
+    2016: date(2017, 4, 18),
+    2017: date(2018, 4, 17),
+    2019: date(2020, 7, 15),
+    2020: date(2021, 5, 17),
+    2021: date(2022, 4, 18),
+    2022: date(2023, 4, 18),
+}
+
+# Transaction codes driving the accrual
+ASSESSMENT_CODES = ('150', '290', '300')
+PAYMENT_CODES = ('610', '670')
+# Withholding and refundable credits are deemed paid on the due date
+DUE_DATE_CREDIT_CODES = ('766', '768', '806')
+RETURN_FILED_CODE = '150'
+
+
+def due_date(tax_year: int) -> date:
+    """Return due date for an individual tax year"""
+    return DUE_DATE_OVERRIDES.get(tax_year, date(tax_year + 1, 4, 15))
+
+
+def minimum_late_filing_penalty(tax_year: int) -> float:
+    """Minimum FTF penalty for a tax year (years outside the table are clamped)"""
+    years = sorted(MIN_LATE_FILING_PENALTY)
+    return float(MIN_LATE_FILING_PENALTY[min(max(tax_year, years[0]), years[-1])])
+
+
+def add_months(day: date, months: int) -> date:
+    """Same day of the month `months` later, clamped to the month's length"""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def months_or_part(start: date, end: date) -> int:
+    """Number of months or fractions of a month from start to end (0 if not after)"""
+    if end <= start:
+        return 0
+    months = (end.year - start.year) * 12 + end.month - start.month
+    if add_months(start, months) < end:
+        months += 1
+    return months
+
+
+@lru_cache(maxsize=64)
+def month_starts(due: date) -> Tuple[List[date], np.ndarray]:
+    """Start of each penalty month after a due date (as dates and datetime64)"""
+    starts = [add_months(due, k) for k in range(FTP_MAX_MONTHS)]
+    return starts, np.array(starts, dtype='datetime64[D]')
+
+
+def parse_transaction_date(value) -> Optional[date]:
+    """Transaction post date from the AT parser (ISO, or MM-DD-YYYY when kept verbatim)"""
+    if isinstance(value, date):
+        return value
+    text = str(value or '').strip()
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        pass
+    for fmt in ('%m-%d-%Y', '%m/%d/%Y'):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+class InterestFactorTable:
+    """
+    Cumulative daily-compounding factors indexed by day
+
+    factors[d] is the growth of $1 from TABLE_START to day d, so the growth
+    between two days is factors[b] / factors[a].
+    """
+
+    def __init__(self, start: date = TABLE_START, end: date = TABLE_END, rates=UNDERPAYMENT_RATES):
+        self.start = start
+        self.end = end
+        days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+        rate_starts = np.array([np.datetime64(d, 'D') for d, _ in rates])
+        annual = np.array([r for _, r in rates], dtype=float)
+        daily = annual[np.clip(np.searchsorted(rate_starts, days, side='right') - 1, 0, None)]
+        years = days.astype('datetime64[Y]').astype(int) + 1970
+        days_in_year = np.where((years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0)), 366, 365)
+        # Interest for day d accrues into factors[d + 1]
+        log_growth = np.log1p(daily / days_in_year)
+        self.factors = np.exp(np.concatenate([[0.0], np.cumsum(log_growth)]))
+        self._start_ordinal = start.toordinal()
+
+    def index(self, day: date) -> int:
+        """Day index into the table (clamped to the covered range)"""
+        offset = day.toordinal() - self._start_ordinal
+        return min(max(offset, 0), len(self.factors) - 1)
+
+    def factors_at(self, days: List[date]) -> np.ndarray:
+        """Cumulative factors for many days at once"""
+        offsets = np.array([d.toordinal() for d in days], dtype=np.int64) - self._start_ordinal
+        return self.factors[np.clip(offsets, 0, len(self.factors) - 1)]
+
+    def growth(self, start: date, end: date) -> float:
+        """Compounded growth of $1 from start to end (1.0 when end is not after start)"""
+        if end <= start:
+            return 1.0
+        return float(self.factors[self.index(end)] / self.factors[self.index(start)])
+
+    def interest(self, balance: float, start: date, end: date) -> float:
+        """Interest on a positive balance between two dates"""
+        if balance <= 0:
+            return 0.0
+        return float(balance * (self.growth(start, end) - 1.0))
+
+
+_table_instance: Optional[InterestFactorTable] = None
+
+
+def get_interest_table() -> InterestFactorTable:
+    """Get the process-wide interest factor table (built on first use)"""
+    global _table_instance
+    if _table_instance is None:
+        _table_instance = InterestFactorTable()
+    return _table_instance
+
+
+def penalty_schedule(tax: float, credits: float, payments: List[Tuple[date, float]], due: date,
+                     filed: Optional[date], as_of: date, tax_year: int) -> Dict:
+    """
+    Failure-to-file and failure-to-pay penalties
+
+    FTF is 5% of the tax unpaid at the due date per month or part of a month
+    the return is late (max 5 months), reduced by the FTP for the same month,
+    and never less than the minimum late-filing penalty once more than 60 days
+    late. FTP is 0.5% of the tax still unpaid at the start of each month until
+    as_of (max 25%). An unfiled return is treated as filed on as_of.
+
+    Returns:
+        Dict with ftf_penalty, ftp_penalty and ftp_accruals [(date, amount)]
+    """
+    net_due = max(0.0, tax - credits)
+    if net_due <= 0:
+        return {'ftf_penalty': 0.0, 'ftp_penalty': 0.0, 'ftp_accruals': []}
+
+    # Unpaid tax at the start of each month after the due date
+    ftp_months = min(months_or_part(due, as_of), FTP_MAX_MONTHS)
+    start_dates, starts = month_starts(due)
+    start_dates, starts = start_dates[:ftp_months], starts[:ftp_months]
+    pay_dates = np.array([d for d, _ in payments], dtype='datetime64[D]')
+    paid = np.concatenate([[0.0], np.cumsum([amount for _, amount in payments])])
+    paid_by_start = paid[np.searchsorted(pay_dates, starts, side='right')]
+    unpaid = np.maximum(0.0, net_due - paid_by_start)
+    ftp = unpaid * FTP_MONTHLY_RATE
+    ftp = np.minimum(np.cumsum(ftp), net_due * FTP_MONTHLY_RATE * FTP_MAX_MONTHS)
+    ftp = np.diff(np.concatenate([[0.0], ftp]))
+
+    late_months = min(months_or_part(due, filed or as_of), FTF_MAX_MONTHS)
+    ftf = float(sum(net_due * FTF_MONTHLY_RATE - (ftp[k] if k < len(ftp) else 0.0) for k in range(late_months)))
+    if ((filed or as_of) - due).days > MIN_PENALTY_DAYS:
+        ftf = max(ftf, min(minimum_late_filing_penalty(tax_year), net_due))
+
+    return {
+        'ftf_penalty': round(ftf, 2),
+        'ftp_penalty': round(float(ftp.sum()), 2),
+        'ftp_accruals': [(d, float(a)) for d, a in zip(start_dates, ftp) if a > 0]
+    }
+
+
+def running_balance(table: InterestFactorTable, days: List[date], amounts: List[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Balance after each dated amount and the interest accrued just before it
+
+    While the balance stays non-negative, compounding between events means
+    balance[k] / F[k] = sum(amount[j] / F[j] for j <= k), so the whole run is
+    one cumulative sum over factor lookups. A credit balance earns no
+    underpayment interest, so runs that dip below zero are walked event by
+    event instead.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    factors = table.factors_at(days)
+    balance = factors * np.cumsum(amounts / factors)
+    if not np.all(balance[:-1] >= -0.005):
+        balance = np.empty_like(amounts)
+        current = 0.0
+        for k in range(len(amounts)):
+            if current > 0 and k:
+                current *= factors[k] / factors[k - 1]
+            current += amounts[k]
+            balance[k] = current
+    previous = np.concatenate([[0.0], balance[:-1]])
+    return balance, balance - previous - amounts
+
+
+def accrue_account(at_record: Dict, as_of: Optional[date] = None,
+                   table: Optional[InterestFactorTable] = None, include_running: bool = True) -> Dict:
+    """
+    Run one AT record forward to as_of
+
+    Assessments (TC 150/290/300) and due-date credits (withholding, refundable
+    credits) enter at the due date, payments (TC 610/670) on their post date.
+    Interest compounds daily on the positive balance of tax, FTF penalty (from
+    the due date) and FTP penalty (from each monthly accrual).
+
+    Returns:
+        Dict with tax_year, owner, totals (tax, credits, payments, ftf_penalty,
+        ftp_penalty, interest, balance) and the running balance as a list of
+        {date, event, code, amount, interest, balance} (omitted when
+        include_running is False)
+    """
+    as_of = as_of or date.today()
+    table = table or get_interest_table()
+    try:
+        tax_year = int(str(at_record.get('tax_year', '')))
+    except ValueError:
+        return {'tax_year': at_record.get('tax_year', 'Unknown'), 'owner': at_record.get('owner', 'Unknown'),
+                'error': 'Unknown tax year', 'running': []}
+    due = due_date(tax_year)
+
+    tax_cents = credit_cents = 0
+    filed = None
+    payments: List[Tuple[date, float]] = []
+    events: List[Tuple[date, str, str, float]] = []  # (date, event, code, amount)
+    for trans in at_record.get('transactions', []):
+        code = str(trans.get('code', ''))
+        cents = to_cents(trans.get('amount', 0))
+        amount = to_dollars(cents)
+        posted = parse_transaction_date(trans.get('date'))
+        if code in ASSESSMENT_CODES:
+            tax_cents += cents
+            events.append((due, 'assessment', code, amount))
+            if code == RETURN_FILED_CODE and posted and filed is None:
+                filed = posted
+        elif code in DUE_DATE_CREDIT_CODES:
+            credit_cents += abs(cents)
+            events.append((due, 'credit', code, -abs(amount)))
+        elif code in PAYMENT_CODES and posted:
+            paid_on = max(posted, due)
+            payments.append((paid_on, abs(amount)))
+            events.append((paid_on, 'payment', code, -abs(amount)))
+
+    payments.sort()
+    tax, credits = to_dollars(tax_cents), to_dollars(credit_cents)
+    penalties = penalty_schedule(tax, credits, payments, due, filed, as_of, tax_year)
+    if penalties['ftf_penalty']:
+        events.append((due, 'ftf_penalty', '', penalties['ftf_penalty']))
+    events.extend((d, 'ftp_penalty', '', a) for d, a in penalties['ftp_accruals'])
+    events.sort(key=lambda e: e[0])
+
+    events = [e for e in events if e[0] <= as_of]
+    events.append((as_of, 'as_of', '', 0.0))
+    balances, interest = running_balance(table, [e[0] for e in events], [e[3] for e in events])
+    balance = float(balances[-1])
+    interest_total = float(interest.sum())
+
+    result = {
+        'tax_year': str(tax_year),
+        'owner': at_record.get('owner', 'Unknown'),
+        'due_date': due.isoformat(),
+        'filed_date': filed.isoformat() if filed else '',
+        'as_of': as_of.isoformat(),
+        'tax': round(tax, 2),
+        'credits': round(credits, 2),
+        'payments': sum_dollars(a for _, a in payments),
+        'ftf_penalty': penalties['ftf_penalty'],
+        'ftp_penalty': penalties['ftp_penalty'],
+        'interest': round(interest_total, 2),
+        'balance': round(balance, 2)
+    }
+    if include_running:
+        result['running'] = [
+            {'date': day.isoformat(), 'event': event, 'code': code, 'amount': round(amount, 2),
+             'interest': round(float(i), 2), 'balance': round(float(b), 2)}
+            for (day, event, code, amount), i, b in zip(events, interest, balances)
+        ]
+    return result
+
+
+def accrue_portfolio(at_data: List[Dict], as_of: Optional[date] = None, include_running: bool = False) -> List[Dict]:
+    """Accrue every AT record (one shared factor table, O(events) per record)"""
+    table = get_interest_table()
+    return [accrue_account(record, as_of, table, include_running) for record in at_data]
@@ -0,0 +1,83 @@
+"""
+Integer-cents money helpers
+Amounts are parsed and summed as whole cents (int / int64 arrays) so WI and
+AT totals reconcile exactly; dollars (float) only appear in the stored result
+dicts and at the UI edge. NumPy is only imported by the bulk helpers, so
+the parsers can use this module without pulling it in
+"""
+
+from typing import Iterable, Optional
+
+
+def parse_cents(text) -> Optional[int]:
+    """
+    Parse an amount string to cents without going through float
+
+    Accepts '$1,234.56', '-$5.00', '$-5', '(12.30)' and plain numbers; a third
+    decimal rounds half up. Returns None if the text is not an amount.
+
+    Example:
+        parse_cents('$1,234.56')  # 123456
+    """
+    s = str(text).strip().replace('$', '').replace(',', '').replace(' ', '')
+    negative = False
+    if s.startswith('(') and s.endswith(')'):
+        negative, s = True, s[1:-1]
+    if s.startswith('-'):
+        negative, s = not negative, s[1:]
+    elif s.startswith('+'):
+        s = s[1:]
+    whole, _, frac = s.partition('.')
+    if not (whole or frac) or (whole and not whole.isdigit()) or (frac and not frac.isdigit()):
+        return None
+    cents = int(whole or 0) * 100 + int((frac + '00')[:2])
+    if len(frac) > 2 and frac[2] >= '5':
+        cents += 1
+    return -cents if negative else cents
+
+
+def to_cents(value, default: int = 0) -> int:
+    """Cents for a parsed amount (int/float dollars) or an amount string"""
+    if value is None:
+        return default
+    if isinstance(value, str):
+        cents = parse_cents(value)
+        return default if cents is None else cents
+    try:
+        return int(round(float(value) * 100))
+    except (TypeError, ValueError):
+        return default
+
+
+def to_dollars(cents) -> float:
+    """Cents -> dollars for storage in result dicts and display"""
+    return int(cents) / 100
+
+
+def round_dollars(value) -> float:
+    """A dollar amount snapped to whole cents"""
+    return to_dollars(to_cents(value))
+
+
+def parse_cents_array(texts: Iterable[str]):
+    """Bulk-parse amount strings to an int64 cents array (unparsable -> 0)"""
+    import numpy as np
+    texts = list(texts)
+    return np.fromiter((to_cents(t) for t in texts), dtype=np.int64, count=len(texts))
+
+
+def sum_cents(values: Iterable) -> int:
+    """Exact total of dollar amounts / amount strings, in cents"""
+    import numpy as np
+    values = list(values)
+    return int(np.fromiter((to_cents(v) for v in values), dtype=np.int64, count=len(values)).sum())
+
+
+def sum_dollars(values: Iterable) -> float:
+    """Exact total of dollar amounts, snapped to cents"""
+    return to_dollars(sum_cents(values))
+
+
+def format_cents(cents) -> str:
+    """Display string for a cents amount, in the app's '$1,234.56' style"""
+    return f"${to_dollars(cents):,.2f}"
@@ -0,0 +1,330 @@
+"""
+PDF text extraction engines with learned per-producer routing
+Each engine (pypdf, pdfplumber, OCR) turns PDF bytes into page texts and
+reports how long it took and whether the result is readable. Transcripts
+from one producer (IRS TDS, a given scanner or print driver) behave the same
+way, so the router keys what it learns on the PDF's Producer/Creator
+fingerprint: the engine that worked last time for that fingerprint is tried
+first, and engines that only ever failed for it are tried last (PDFs with
+no producer info always use the default order). An IRS TDS
+download goes straight to the text engine that handles it, and a scanned
+producer straight to OCR, without paying for the failed attempts first.
+
+Routes are kept in a small JSON file (TIPARSER_EXTRACT_ROUTES). Show them:
+    python -m utils.pdf_extract
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Type
+
+from parsers.boilerplate import PAGE_BREAK
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUTES_PATH = os.environ.get("TIPARSER_EXTRACT_ROUTES", ".extract_routes.json")
+
+# Fixed order for PDFs the router knows nothing about
+DEFAULT_ORDER = ['pypdf', 'pdfplumber', 'ocr']
+
+OnPage = Optional[Callable[[str, int, int], None]]
+
+
+def is_text_readable(text: str) -> bool:
+    """Whether extracted text looks like text rather than (cid:xx) glyph ids or binary noise"""
+    if not text or len(text) < 100:
+        return False
+    # Too many (cid:xx) patterns = garbage
+    if len(re.findall(r'\(cid:\d+\)', text)) > 10:
+        return False
+    # Too many non-ASCII or non-printable chars
+    ascii_ratio = sum(32 <= ord(c) < 127 for c in text) / len(text)
+    if ascii_ratio < 0.7:
+        return False
+    # At least 20% letters, at least 10 spaces per 1000 chars
+    letter_ratio = sum(c.isalpha() for c in text) / len(text)
+    space_ratio = text.count(' ') / max(1, len(text))
+    return letter_ratio > 0.2 and space_ratio > 0.01
+
+
+class PdfEngine:
+    """Extracts the page texts of a PDF with one library"""
+
+    name = ""
+
+    @classmethod
+    def available(cls) -> bool:
+        return False
+
+    def pages(self, pdf_bytes: bytes, on_page: OnPage = None) -> List[str]:
+        raise NotImplementedError
+
+    def extract(self, pdf_bytes: bytes, on_page: OnPage = None) -> Dict:
+        """
+        Run the engine and time it
+
+        Returns:
+            {'engine', 'text' (pages joined with PAGE_BREAK), 'pages',
+             'seconds', 'readable', 'error'}
+        """
+        started = time.perf_counter()
+        try:
+            pages = self.pages(pdf_bytes, on_page)
+            error = None
+        except Exception as e:
+            pages, error = [], str(e)
+        text = PAGE_BREAK.join(pages)
+        return {'engine': self.name, 'text': text, 'pages': len(pages),
+                'seconds': time.perf_counter() - started, 'readable': is_text_readable(text), 'error': error}
+
+
+def _pypdf():
+    """pypdf, or PyPDF2 (its older name, same PdfReader API) when only that is installed"""
+    try:
+        import pypdf
+        return pypdf
+    except ImportError:
+        import PyPDF2
+        return PyPDF2
+
+
+class PypdfEngine(PdfEngine):
+    name = "pypdf"
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            _pypdf()
+        except ImportError:
+            return False
+        return True
+
+    def pages(self, pdf_bytes: bytes, on_page: OnPage = None) -> List[str]:
+        reader = _pypdf().PdfReader(io.BytesIO(pdf_bytes))
+        texts = []
+        for page_num, page in enumerate(reader.pages, 1):
+            texts.append(page.extract_text() or "")
+            if on_page:
+                on_page(self.name, page_num, len(reader.pages))
+        return texts
+
+
+class PdfplumberEngine(PdfEngine):
+    """pdfplumber (pdfminer.six layout analysis): slower, better on some generated layouts"""
+
+    name = "pdfplumber"
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import pdfplumber  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def pages(self, pdf_bytes: bytes, on_page: OnPage = None) -> List[str]:
+        import pdfplumber
+        texts = []
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            for page_num, page in enumerate(pdf.pages, 1):
+                texts.append(page.extract_text() or "")
+                if on_page:
+                    on_page(self.name, page_num, len(pdf.pages))
+        return texts
+
+
+class OcrEngine(PdfEngine):
+    """Tesseract over rendered pages, for scanned transcripts"""
+
+    name = "ocr"
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import pytesseract  # noqa: F401
+            from pdf2image import convert_from_bytes  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def pages(self, pdf_bytes: bytes, on_page: OnPage = None) -> List[str]:
+        import pytesseract
+        from pdf2image import convert_from_bytes
+        images = convert_from_bytes(pdf_bytes)
+        texts = []
+        for page_num, image in enumerate(images, 1):
+            texts.append(pytesseract.image_to_string(image))
+            if on_page:
+                on_page(self.name, page_num, len(images))
+        return texts
+
+
+ENGINES: Dict[str, Type[PdfEngine]] = {
+    PypdfEngine.name: PypdfEngine,
+    PdfplumberEngine.name: PdfplumberEngine,
+    OcrEngine.name: OcrEngine,
+}
+
+
+def register_engine(engine: Type[PdfEngine]) -> None:
+    """Make another extraction engine available to the router (tried after DEFAULT_ORDER until it succeeds)"""
+    ENGINES[engine.name] = engine
+
+
+def available_engines() -> List[str]:
+    return [name for name, engine in ENGINES.items() if engine.available()]
+
+
+# Document info entries, read from the raw bytes (no PDF library needed)
+_INFO_ENTRY = re.compile(rb'/(Producer|Creator)\s*\(((?:\\.|[^\\)]){0,200})\)')
+_VERSION = re.compile(r'\d+(?:[._]\d+)*')
+
+
+def pdf_fingerprint(pdf_bytes: bytes) -> str:
+    """
+    "producer | creator" of a PDF, version numbers masked ("" when the PDF has neither)
+
+    Read from the uncompressed document info dictionary; PDFs that keep it
+    in a compressed object stream fall back to pypdf's metadata.
+    """
+    info = {}
+    for match in _INFO_ENTRY.finditer(pdf_bytes):
+        info.setdefault(match.group(1).decode('ascii'), match.group(2).decode('latin-1'))
+    if not info and PypdfEngine.available():
+        try:
+            metadata = _pypdf().PdfReader(io.BytesIO(pdf_bytes)).metadata or {}
+            info = {key: str(metadata.get(f'/{key}') or '') for key in ('Producer', 'Creator')}
+        except Exception as e:
+            logger.debug(f"No PDF metadata: {e}")
+    parts = [_VERSION.sub('#', info.get(key, '')).strip() for key in ('Producer', 'Creator')]
+    return ' | '.join(parts) if any(parts) else ''
+
+
+class ExtractionRouter:
+    """Tries extraction engines in the order learned for each PDF fingerprint"""
+
+    def __init__(self, path: str = DEFAULT_ROUTES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        # fingerprint -> engine -> {'ok', 'failed', 'seconds'}
+        self.routes: Dict[str, Dict[str, Dict]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.routes = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable extraction routes {path}: {e}")
+
+    def order(self, fingerprint: str) -> List[str]:
+        """Available engines, best first for this fingerprint"""
+        stats = self.routes.get(fingerprint, {})
+        names = list(dict.fromkeys(DEFAULT_ORDER + list(ENGINES)))
+        default_rank = {name: i for i, name in enumerate(names)}
+
+        def rank(name):
+            s = stats.get(name, {})
+            ok, failed = s.get('ok', 0), s.get('failed', 0)
+            if ok:
+                # Engines that worked, most reliable then fastest first
+                return (0, -ok / (ok + failed), s.get('seconds', 0.0) / ok)
+            if failed:
+                return (2, default_rank[name], 0.0)  # only ever failed: last resort
+            return (1, default_rank[name], 0.0)
+
+        return sorted((name for name in names if ENGINES[name].available()), key=rank)
+
+    def record(self, fingerprint: str, result: Dict) -> None:
+        """Count an extraction attempt in memory (extract() writes the routes file once per document)"""
+        # PDFs without producer info have nothing in common to learn from
+        if not fingerprint:
+            return
+        with self._lock:
+            stats = self.routes.setdefault(fingerprint, {}).setdefault(
+                result['engine'], {'ok': 0, 'failed': 0, 'seconds': 0.0})
+            if result['readable']:
+                stats['ok'] += 1
+                stats['seconds'] += result['seconds']
+            else:
+                stats['failed'] += 1
+
+    def _save(self) -> None:
+        """Write the routes file; a failed write is logged (the routes stay learned in memory)"""
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        tmp_path = None
+        with self._lock:
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self.routes, f, indent=1, sort_keys=True)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not save extraction routes {self.path}: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def extract(self, pdf_bytes: bytes, on_page: OnPage = None) -> Dict:
+        """
+        Text of a PDF from the first engine whose output is readable
+
+        Returns:
+            {'text' ("" if no engine succeeded), 'engine', 'fingerprint',
+             'attempts': [engine result dicts without the text]}
+        """
+        fingerprint = pdf_fingerprint(pdf_bytes)
+        attempts = []
+        extracted = {'text': '', 'engine': None}
+        for name in self.order(fingerprint):
+            result = ENGINES[name]().extract(pdf_bytes, on_page)
+            self.record(fingerprint, result)
+            attempts.append({k: v for k, v in result.items() if k != 'text'})
+            if result['readable']:
+                logger.info(f"Extracted text with {name} in {result['seconds']:.2f}s "
+                            f"({result['pages']} pages, producer: {fingerprint or 'unknown'})")
+                extracted = {'text': result['text'], 'engine': name}
+                break
+            logger.warning(f"{name} extraction unreadable{': ' + result['error'] if result['error'] else ''}, "
+                           f"trying the next engine")
+        else:
+            logger.warning("Could not extract readable text from PDF with any method.")
+        # One routes file write per document, not per attempt
+        if fingerprint and attempts:
+            self._save()
+        return {**extracted, 'fingerprint': fingerprint, 'attempts': attempts}
+
+
+_router: Optional[ExtractionRouter] = None
+
+
+def get_extraction_router() -> ExtractionRouter:
+    """Shared router (routes file from TIPARSER_EXTRACT_ROUTES)"""
+    global _router
+    if _router is None:
+        _router = ExtractionRouter()
+    return _router
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", default=DEFAULT_ROUTES_PATH, help="Routes file")
+    args = parser.parse_args()
+
+    router = ExtractionRouter(args.routes)
+    print(f"Available engines: {', '.join(available_engines()) or 'none'}")
+    for fingerprint, stats in sorted(router.routes.items()):
+        print(f"{fingerprint or '(no producer)'}: {' > '.join(router.order(fingerprint))}")
+        for name, s in stats.items():
+            per_success = s['seconds'] / s['ok'] if s['ok'] else 0.0
+            print(f"  {name:<12}{s['ok']:>5} ok{s['failed']:>5} failed{per_success:>8.2f}s per success")
+
+
+if __name__ == "__main__":
+    main()
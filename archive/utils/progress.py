@@ -0,0 +1,157 @@
+"""
+Per-document pipeline progress events
+Publishes stage events (listed, downloading, extracting, parsing, done, failed)
+for every document in a run to in-process subscribers (the Streamlit
+progress bar and the partial results shown while a case is processed)
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# Pipeline stages in the order a document moves through them
+STAGE_LISTED = 'listed'
+STAGE_DOWNLOADING = 'downloading'
+STAGE_EXTRACTING = 'extracting'
+STAGE_PARSING = 'parsing'
+STAGE_DONE = 'done'
+STAGE_FAILED = 'failed'
+
+TERMINAL_STAGES = (STAGE_DONE, STAGE_FAILED)
+
+# Event name used to tell stream consumers that the whole run is finished
+RUN_COMPLETE = 'run_complete'
+
+# Share of a document's progress reached when it enters each stage
+STAGE_WEIGHTS = {
+    STAGE_LISTED: 0.0,
+    STAGE_DOWNLOADING: 0.1,
+    STAGE_EXTRACTING: 0.2,
+    STAGE_PARSING: 0.85,
+    STAGE_DONE: 1.0,
+    STAGE_FAILED: 1.0
+}
+
+
+class ProgressBus:
+    """Fan out progress events for one processing run to any number of listeners"""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.events: List[Dict] = []
+        self.closed = False
+        self._callbacks: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[Dict], None]) -> None:
+        """Call `callback(event)` synchronously for every future event"""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def publish(self, doc_type: str, filename: str, stage: str, **extra) -> Dict:
+        """
+        Publish a stage event for a document
+
+        Args:
+            doc_type: Document family ("WI", "AT", ...)
+            filename: Source file name as listed by TPS
+            stage: One of the STAGE_* constants
+            **extra: Optional details such as engine, page, pages,
+                message or result (partial result for a finished document)
+        """
+        event = {
+            'run_id': self.run_id,
+            'doc_type': doc_type,
+            'filename': filename,
+            'stage': stage,
+            'ts': time.time()
+        }
+        event.update({k: v for k, v in extra.items() if v is not None})
+        self._dispatch(event)
+        return event
+
+    def close(self) -> None:
+        """Mark the run as complete (subscribers get a RUN_COMPLETE event)"""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+        self._dispatch({'run_id': self.run_id, 'stage': RUN_COMPLETE, 'ts': time.time()})
+
+    def _dispatch(self, event: Dict) -> None:
+        with self._lock:
+            self.events.append(event)
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback(event)
+
+
+# Seconds a closed run stays available to get_run, so a lookup just after
+# the run finished still finds its events
+CLOSED_RUN_TTL = 300.0
+
+# Runs by run_id (st.session_state['progress_run_id']) so a later rerun can
+# look up a run's events
+_RUNS: Dict[str, ProgressBus] = {}
+# run_id -> time.monotonic() the run was closed
+_CLOSED_AT: Dict[str, float] = {}
+_RUNS_LOCK = threading.Lock()
+
+
+def _expire_closed_runs() -> None:
+    """Forget closed runs older than CLOSED_RUN_TTL (caller holds _RUNS_LOCK)"""
+    now = time.monotonic()
+    for run_id in [r for r, closed_at in _CLOSED_AT.items() if now - closed_at > CLOSED_RUN_TTL]:
+        del _CLOSED_AT[run_id]
+        _RUNS.pop(run_id, None)
+
+
+def open_run(run_id: str) -> ProgressBus:
+    """Create (or replace) the progress bus for a run"""
+    bus = ProgressBus(run_id)
+    with _RUNS_LOCK:
+        _expire_closed_runs()
+        _RUNS[run_id] = bus
+        _CLOSED_AT.pop(run_id, None)
+    return bus
+
+
+def get_run(run_id: str) -> Optional[ProgressBus]:
+    """Look up the progress bus for a run, if any (closed runs for CLOSED_RUN_TTL seconds)"""
+    with _RUNS_LOCK:
+        _expire_closed_runs()
+        return _RUNS.get(run_id)
+
+
+def close_run(run_id: str) -> None:
+    """Close a run's bus; it is forgotten CLOSED_RUN_TTL seconds later"""
+    with _RUNS_LOCK:
+        bus = _RUNS.get(run_id)
+        if bus:
+            _CLOSED_AT[run_id] = time.monotonic()
+        _expire_closed_runs()
+    if bus:
+        bus.close()
+
+
+def document_fraction(event: Dict) -> float:
+    """Progress (0..1) of a single document implied by its latest event"""
+    stage = event.get('stage')
+    fraction = STAGE_WEIGHTS.get(stage, 0.0)
+    if stage == STAGE_EXTRACTING and event.get('pages'):
+        span = STAGE_WEIGHTS[STAGE_PARSING] - STAGE_WEIGHTS[STAGE_EXTRACTING]
+        fraction += span * min(1.0, event.get('page', 0) / event['pages'])
+    return fraction
+
+
+def describe_event(event: Dict) -> str:
+    """One-line human readable status for an event"""
+    stage = event.get('stage', '')
+    text = f"{event.get('filename', '')}: {stage}"
+    if event.get('engine'):
+        text += f" ({event['engine']})"
+    if event.get('pages'):
+        text += f" page {event.get('page', 0)} of {event['pages']}"
+    if event.get('message'):
+        text += f" - {event['message']}"
+    return text
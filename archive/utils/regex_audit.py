@@ -0,0 +1,271 @@
+"""
+ReDoS audit for the parser regexes
+Checks every regex the WI and AT parsers run (form patterns, fields and
+identifiers from the pattern bundle, wi_parser's identifier/header regexes and
+at_parser's label, field and transaction regexes) two ways:
+
+- static: nested unbounded quantifiers (exponential backtracking) and several
+  unbounded wildcards in one sequence (polynomial backtracking)
+- dynamic: times each regex on adversarial and fuzzed inputs of doubling size
+  and flags super-linear growth, stopping early once a run exceeds the cap
+
+Usage:
+    python -m utils.regex_audit            # every parser regex
+    python -m utils.regex_audit --strict   # exit 1 if anything is flagged
+"""
+
+import argparse
+import math
+import random
+import re
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import re._parser as sre_parse
+    from re._constants import MAXREPEAT
+except ImportError:  # Python < 3.11
+    import sre_parse
+    from sre_constants import MAXREPEAT
+
+# Input sizes (characters) tried in order; growth is measured between consecutive sizes
+SIZES = (500, 1000, 2000, 4000, 8000)
+# Stop growing the input once one search takes this long (seconds)
+RUN_CAP_S = 0.25
+# Growth exponent above which a regex counts as super-linear, ignoring runs faster than NOISE_FLOOR_S
+SUPERLINEAR_EXPONENT = 1.5
+NOISE_FLOOR_S = 0.002
+
+FUZZ_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789 $,.:-()&/"
+
+_REPEATS = {sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT}
+_WILDCARDS = {sre_parse.ANY, sre_parse.NOT_LITERAL}
+
+
+def parser_regexes() -> List[Tuple[str, re.Pattern]]:
+    """(name, compiled regex) for every regex the WI and AT parsers run"""
+    from parsers import at_parser, wi_parser
+    from parsers.pattern_bundle import get_pattern_bundle
+
+    bundle = get_pattern_bundle()
+    regexes = []
+    for name, info in bundle.forms.items():
+        regexes.append((f"WI {name} pattern", bundle.pattern(name)))
+        for field_name, regex in info['fields'].items():
+            if regex:
+                regexes.append((f"WI {name}.{field_name}", bundle.field(name, field_name)))
+        for identifier, regex in (info.get('identifiers') or {}).items():
+            regexes.append((f"WI {name} identifier {identifier}", re.compile(regex)))
+    for attr in ('EIN_PATTERN', 'EMPLOYER_PATTERN', 'FIN_PATTERN', 'PAYER_PATTERN', 'FORM_HEADER', 'NOT_A_FORM_HEADER'):
+        regexes.append((f"WI {attr}", getattr(wi_parser, attr)))
+    for regex, label in at_parser.TAX_YEAR_RULES:
+        regexes.append((f"AT tax year ({label})", regex))
+    for field_name, regex in at_parser.FIELD_PATTERNS.items():
+        regexes.append((f"AT {field_name}", regex))
+    regexes.append(("AT COMPACT_TRANSACTION", at_parser.COMPACT_TRANSACTION))
+    regexes.append(("AT SPACED_TRANSACTION", at_parser.SPACED_TRANSACTION))
+    regexes.append(("AT label scanner", at_parser._scanner(frozenset(at_parser.LABEL_TARGETS), True)))
+    return regexes
+
+
+def _unbounded(node) -> bool:
+    op, av = node
+    return op in _REPEATS and av[1] == MAXREPEAT
+
+
+def _items(av):
+    """Sub-sequences inside a node argument"""
+    op_subpatterns = []
+    if isinstance(av, sre_parse.SubPattern):
+        op_subpatterns.append(av)
+    elif isinstance(av, (list, tuple)):
+        for item in av:
+            op_subpatterns.extend(_items(item))
+    return op_subpatterns
+
+
+def static_findings(regex: re.Pattern) -> List[str]:
+    """Backtracking hazards visible in the regex structure"""
+    findings = []
+
+    def walk(seq, inside_unbounded: bool):
+        wildcards = 0
+        for op, av in seq:
+            node = (op, av)
+            if op in _REPEATS:
+                body = av[2]
+                if _unbounded(node):
+                    if inside_unbounded:
+                        findings.append("nested unbounded quantifier (exponential)")
+                    wildcards += _wide(node)
+                walk(body, inside_unbounded or _unbounded(node))
+            else:
+                for sub in _items(av):
+                    walk(sub, inside_unbounded)
+        if wildcards >= 2:
+            findings.append(f"{wildcards} unbounded wildcards in one sequence (polynomial)")
+
+    walk(sre_parse.parse(regex.pattern, regex.flags), False)
+    return list(dict.fromkeys(findings))
+
+
+def _wide(node) -> bool:
+    """Unbounded repeat of a wildcard (. or a negated class)"""
+    op, av = node
+    return _unbounded(node) and any(
+        sub_op in _WILDCARDS or (sub_op == sre_parse.IN and any(o == sre_parse.NEGATE for o, _ in sub_av))
+        for sub_op, sub_av in av[2])
+
+
+def _class_sample(items) -> str:
+    if any(op == sre_parse.NEGATE for op, _ in items):
+        return '#'
+    for op, av in items:
+        if op == sre_parse.LITERAL:
+            return chr(av)
+        if op == sre_parse.RANGE:
+            return chr(av[0])
+        if op == sre_parse.CATEGORY:
+            return {sre_parse.CATEGORY_DIGIT: '1', sre_parse.CATEGORY_SPACE: ' '}.get(av, 'a')
+    return 'a'
+
+
+def _sample(seq) -> str:
+    """Shortest-ish text a regex sequence matches (first branch, minimum repeats)"""
+    out = []
+    for op, av in seq:
+        if op == sre_parse.LITERAL:
+            out.append(chr(av))
+        elif op == sre_parse.IN:
+            out.append(_class_sample(av))
+        elif op == sre_parse.ANY:
+            out.append('a')
+        elif op == sre_parse.NOT_LITERAL:
+            out.append('#' if av != ord('#') else 'a')
+        elif op in _REPEATS:
+            out.append(_sample(av[2]) * av[0])
+        elif op == sre_parse.SUBPATTERN:
+            out.append(_sample(av[-1]))
+        elif op == sre_parse.BRANCH:
+            out.append(_sample(av[1][0]))
+        elif op == sre_parse.CATEGORY:
+            out.append({sre_parse.CATEGORY_DIGIT: '1', sre_parse.CATEGORY_SPACE: ' '}.get(av, 'a'))
+    return ''.join(out)
+
+
+def _segments(regex: re.Pattern) -> List[str]:
+    """Sample text for each part of a regex between its top-level unbounded wildcards (.*, [^x]+)"""
+    segments, current = [], []
+    for node in sre_parse.parse(regex.pattern, regex.flags):
+        if _wide(node):
+            segments.append(_sample(current))
+            current = []
+        else:
+            current.append(node)
+    segments.append(_sample(current))
+    return [segment for segment in segments if segment.strip()] or ['a']
+
+
+def adversarial_inputs(regex: re.Pattern, size: int, seed: int = 0) -> Dict[str, str]:
+    """
+    Inputs of `size` characters built to make a regex work hard
+
+    - pump: the regex's first segment, then every middle segment repeated and
+      never the last one, so each .* gap backtracks over all the others
+    - padded: the first segment followed by a long run of spaces and word
+      characters (what greedy classes like [A-Z0-9 &.,-]+ consume)
+    - fuzz: the regex's segments mixed with OCR-like noise, no newlines
+    """
+    segments = _segments(regex)
+    head = segments[0]
+    middle = ' '.join(segments[1:-1]) or head
+    rng = random.Random(seed)
+    noise = []
+    while sum(len(part) for part in noise) < size:
+        noise.append(rng.choice(segments) if rng.random() < 0.3 else
+                     ''.join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(1, 12))))
+    return {
+        'pump': (head + ' ' + (middle + ' ') * (size // (len(middle) + 1) + 1))[:size] + '\x00',
+        'padded': (head + ' ' + 'A 1 ' * (size // 4 + 1))[:size] + '\x00',
+        'fuzz': ''.join(noise)[:size],
+    }
+
+
+def time_search(regex: re.Pattern, text: str) -> float:
+    started = time.perf_counter()
+    regex.search(text)
+    return time.perf_counter() - started
+
+
+def dynamic_findings(regex: re.Pattern, sizes=SIZES, run_cap_s: float = RUN_CAP_S) -> Dict:
+    """
+    Time a regex on growing adversarial inputs
+
+    Returns:
+        {'worst_s', 'exponent', 'input', 'capped'}; exponent is the largest
+        growth exponent between consecutive sizes among runs above the noise
+        floor (1.0 = linear)
+    """
+    worst = {'worst_s': 0.0, 'exponent': 0.0, 'input': None, 'capped': False}
+    previous: Dict[str, Tuple[int, float]] = {}
+    for size in sizes:
+        for kind, text in adversarial_inputs(regex, size).items():
+            elapsed = time_search(regex, text)
+            if elapsed > worst['worst_s']:
+                worst.update(worst_s=elapsed, input=kind)
+            if kind in previous:
+                prev_size, prev_elapsed = previous[kind]
+                if elapsed > NOISE_FLOOR_S and prev_elapsed > 0:
+                    exponent = math.log(elapsed / prev_elapsed) / math.log(size / prev_size)
+                    worst['exponent'] = max(worst['exponent'], exponent)
+            previous[kind] = (size, elapsed)
+        if worst['worst_s'] > run_cap_s:
+            worst['capped'] = True
+            break
+    return worst
+
+
+def audit(regexes: Optional[List[Tuple[str, re.Pattern]]] = None, sizes=SIZES, dynamic: bool = True) -> List[Dict]:
+    """
+    Audit regexes
+
+    Returns one row per regex with its static findings, the timing results
+    (worst_s, exponent, input, capped) and 'flagged'. Regexes with nested
+    unbounded quantifiers are flagged without being timed.
+    """
+    rows = []
+    for name, regex in regexes if regexes is not None else parser_regexes():
+        row = {'name': name, 'pattern': regex.pattern, 'static': static_findings(regex)}
+        exponential = any('exponential' in finding for finding in row['static'])
+        # An exponential regex could run for hours on the timing inputs, and re cannot be interrupted
+        if dynamic and not exponential:
+            row.update(dynamic_findings(regex, sizes))
+            row['flagged'] = row['capped'] or row['exponent'] > SUPERLINEAR_EXPONENT
+        else:
+            row['flagged'] = exponential
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 if any regex is flagged")
+    parser.add_argument("--static-only", action="store_true", help="Skip the timing runs")
+    args = parser.parse_args()
+
+    rows = audit(dynamic=not args.static_only)
+    flagged = [row for row in rows if row['flagged']]
+    for row in sorted(rows, key=lambda r: -r.get('worst_s', 0.0))[:15]:
+        timing = f"{row['worst_s'] * 1000:8.2f} ms  x^{row['exponent']:.1f}  ({row['input']})" if 'worst_s' in row else ''
+        print(f"{'FLAG' if row['flagged'] else '    '}  {row['name']:<50}{timing}")
+    for row in rows:
+        for finding in row['static']:
+            print(f"  static: {row['name']}: {finding}")
+    print(f"\n{len(rows)} regexes audited, {len(flagged)} flagged")
+    if args.strict and flagged:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
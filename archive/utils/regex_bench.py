@@ -0,0 +1,127 @@
+"""
+Regex backend benchmark
+Parses the same WI texts with every installed regex backend (see
+parsers/regex_backend.py) at several thread counts, reports documents per
+second, and checks that every backend extracts exactly what re does.
+Texts come from the case store's text cache; without stored cases a
+synthetic transcript set is used.
+
+Usage:
+    python -m utils.regex_bench                          # cached texts, 1/2/4/8 threads
+    python -m utils.regex_bench --synthetic 400 --threads 1,8
+"""
+
+import argparse
+import logging
+import sys
+import time
+from typing import Dict, List, Optional
+
+from parsers.pattern_bundle import get_pattern_bundle
+from parsers.regex_backend import available_backends, get_regex_backend
+from parsers.wi_parser import parse_wi_texts
+
+# Parse runs are quiet; the parser logs every field it tries
+_quiet = logging.getLogger(__name__ + ".parse")
+_quiet.propagate = False
+_quiet.addHandler(logging.NullHandler())
+
+SYNTHETIC_FORMS = (
+    "Form W-2 Wage and Tax Statement\n"
+    "Employer Identification Number (EIN): 12-34567{n:02d}\n"
+    "Employer: ACME CORP {n}\n"
+    "Wages, tips, and other compensation: ${wages:,}.00\n"
+    "Federal income tax withheld: ${withheld:,}.00\n"
+    "Form 1099-INT Interest Income\n"
+    "Payer's Federal Identification Number (FIN): 98-76543{n:02d}\n"
+    "Payer: FIRST BANK {n}\n"
+    "Interest: ${interest:,}.00\n"
+    "Tax Withheld: $0.00\n"
+)
+
+
+def synthetic_texts(count: int) -> Dict[str, str]:
+    """Small WI transcripts with a few W-2 / 1099-INT forms each"""
+    texts = {}
+    for i in range(count):
+        body = ''.join(SYNTHETIC_FORMS.format(n=(i + j) % 100, wages=20000 + 37 * i + j, withheld=2000 + i,
+                                              interest=10 + j) for j in range(1 + i % 4))
+        texts[f"WI {20 + i % 5} TP {i}"] = f"Tax Period Requested: December, 20{20 + i % 5}\n{body}"
+    return texts
+
+
+def stored_texts(limit: Optional[int] = None) -> Dict[str, str]:
+    """Cached WI texts of the stored cases, keyed by text key"""
+    from utils.case_store import get_case_store
+    from utils.text_cache import get_text_cache
+    cache = get_text_cache()
+    texts = {}
+    for doc in get_case_store().document_texts('WI'):
+        text = cache.get(doc['text_key'])
+        if text is not None:
+            texts[doc['text_key']] = text
+        if limit and len(texts) >= limit:
+            break
+    return texts
+
+
+def run(texts: Dict[str, str], backend_name: str, threads: int, repeat: int = 3) -> Dict:
+    """Best-of-`repeat` timing of parse_wi_texts over `texts`"""
+    backend = get_regex_backend(backend_name)
+    patterns = get_pattern_bundle().form_patterns
+    best, results = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = parse_wi_texts(texts, patterns, workers=threads, backend=backend, log=_quiet)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {'backend': backend_name, 'threads': threads, 'seconds': best,
+            'docs_per_s': len(texts) / best if best else 0.0, 'results': results}
+
+
+def benchmark(texts: Dict[str, str], thread_counts: List[int], backends: Optional[List[str]] = None,
+              repeat: int = 3) -> List[Dict]:
+    """
+    Time every backend at every thread count
+
+    Returns:
+        Rows of backend, threads, seconds, docs_per_s and matches_re (the
+        extraction equals the single-threaded re baseline)
+    """
+    baseline = run(texts, 're', 1, repeat=1)['results']
+    rows = []
+    for name in backends or available_backends():
+        for threads in thread_counts:
+            row = run(texts, name, threads, repeat)
+            row['matches_re'] = row.pop('results') == baseline
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", default="1,2,4,8", help="Comma-separated thread counts")
+    parser.add_argument("--synthetic", type=int, default=0, help="Benchmark N synthetic transcripts instead")
+    parser.add_argument("--limit", type=int, default=None, help="At most this many cached texts")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per setting (best is reported)")
+    args = parser.parse_args()
+
+    texts = synthetic_texts(args.synthetic) if args.synthetic else stored_texts(args.limit)
+    if not texts:
+        texts = synthetic_texts(200)
+        print("No cached WI texts, using 200 synthetic transcripts")
+    missing = [name for name in ('re', 'regex') if name not in available_backends()]
+    if missing:
+        print(f"Not installed: {', '.join(missing)}")
+
+    rows = benchmark(texts, [int(n) for n in args.threads.split(',')], repeat=args.repeat)
+    print(f"\n{len(texts)} documents\nbackend   threads   seconds    docs/s   same as re")
+    for row in rows:
+        print(f"{row['backend']:<10}{row['threads']:>7}{row['seconds']:>10.3f}{row['docs_per_s']:>10.1f}"
+              f"   {'yes' if row['matches_re'] else 'NO'}")
+    if not all(row['matches_re'] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
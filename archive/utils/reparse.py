@@ -0,0 +1,284 @@
+"""
+Incremental re-parse of stored cases
+Replays the WI and AT parsers over the extracted texts kept in the text cache,
+so a pattern fix can be checked against stored cases without downloading or
+OCRing the PDFs again. Only WI forms whose pattern hash changed are
+re-extracted; the other forms keep their stored fields, and every affected
+file's calculations are re-evaluated together (SSA-1099 depends on the rest
+of the file). AT transcripts are re-parsed only when at_parser's patterns
+changed. Forms repeated across the files of a case are collapsed again
+afterwards (utils/form_dedup.py).
+
+Re-parse every stale case in the store:
+    python -m utils.reparse [--save]
+"""
+
+import logging
+import sys
+from typing import Dict, List, Optional
+
+from parsers.at_parser import parse_at_transcript, pattern_hash as at_pattern_hash
+from parsers.pattern_bundle import PatternBundle, get_pattern_bundle
+from parsers.wi_parser import calculate_forms, parse_wi_forms, parse_wi_header
+from utils.at_columns import ATColumns
+from utils.case_store import CaseStore, get_case_store
+from utils.form_dedup import dedupe_wi_data, restore_duplicates
+from utils.text_cache import TextCache, get_text_cache
+from utils.tp_s_parser import TPSParser
+from utils.wi_cube import WICube
+
+logger = logging.getLogger(__name__)
+
+# Reparse runs are quiet unless the caller passes a logger
+_quiet = logging.getLogger(__name__ + ".parse")
+_quiet.propagate = False
+_quiet.addHandler(logging.NullHandler())
+
+
+def _form_key(form: Dict):
+    return (form.get('SourceFile'), form.get('Form'), form.get('UniqueID'), form.get('Label'))
+
+
+def _values(form: Dict):
+    return form.get('Income'), form.get('Withholding'), form.get('Fields')
+
+
+def reparse_wi(wi_data: Dict, text_keys: Dict[str, str], bundle: PatternBundle, changed_forms: List[str],
+               filing_status: str = 'Single', texts: Optional[TextCache] = None,
+               log: Optional[logging.Logger] = None) -> Dict:
+    """
+    Re-extract `changed_forms` from every cached WI text and merge them with the kept forms
+
+    Args:
+        wi_data: Stored {tax_year: [form dicts]}
+        text_keys: {filename: text cache key} of the case's WI files
+        bundle: Current pattern bundle
+        changed_forms: Forms to re-extract (added or changed since the stored parse)
+        filing_status: Filing status for the calculations
+        texts: Text cache (default: the shared cache)
+
+    Returns:
+        {'wi_data', 'reparsed_files', 'missing_texts'}; files whose text is not
+        cached keep their stored forms
+    """
+    texts = texts or get_text_cache()
+    log = log or _quiet
+    patterns = bundle.form_patterns
+    order = {name: i for i, name in enumerate(patterns)}
+    changed = set(changed_forms)
+
+    # Stored forms are deduplicated: put the collapsed copies back so every
+    # file is recalculated over all of its forms (reparse_case dedupes again)
+    wi_data = restore_duplicates(wi_data, TPSParser.extract_owner_from_filename)
+    by_file: Dict[str, Dict] = {}
+    for year, forms in wi_data.items():
+        for form in forms:
+            by_file.setdefault(form.get('SourceFile'), {}).setdefault(year, []).append(form)
+
+    new_data: Dict = {}
+    reparsed, missing = [], []
+    for filename in list(dict.fromkeys(list(by_file) + list(text_keys))):
+        stored = by_file.get(filename, {})
+        text = texts.normalized(text_keys[filename]) if filename in text_keys else None
+        if text is None or not changed:
+            if changed and filename is not None:
+                missing.append(filename)
+            for year, forms in stored.items():
+                new_data.setdefault(year, []).extend(forms)
+            continue
+
+        _, _, tax_year = parse_wi_header(text, log=log)
+        owner = TPSParser.extract_owner_from_filename(filename)
+        fresh = parse_wi_forms(text, patterns, tax_year, filing_status=filing_status, filename=filename,
+                               log=log, only_forms=changed, calculate=False)
+        for forms in fresh.values():
+            for form in forms:
+                form['Owner'] = owner
+                form['SourceFile'] = filename
+        # Forms that still exist with an unchanged pattern keep their stored fields
+        file_data = {}
+        for year, forms in stored.items():
+            kept = [dict(f) for f in forms if f.get('Form') in order and f.get('Form') not in changed]
+            if kept:
+                file_data[year] = kept
+        for year, forms in fresh.items():
+            file_data.setdefault(year, []).extend(forms)
+        for year, forms in file_data.items():
+            forms.sort(key=lambda f: order[f['Form']])  # stable: keeps match order within a form
+        calculate_forms(file_data, patterns, filing_status, log.info)
+        for year, forms in file_data.items():
+            new_data.setdefault(year, []).extend(forms)
+        reparsed.append(filename)
+
+    return {'wi_data': new_data, 'reparsed_files': reparsed, 'missing_texts': missing}
+
+
+def reparse_at(at_data: List[Dict], text_keys: Dict[str, str], texts: Optional[TextCache] = None,
+               log: Optional[logging.Logger] = None) -> Dict:
+    """
+    Re-parse cached AT texts with the current at_parser
+
+    Returns:
+        {'at_data', 'at_alerts', 'reparsed_files', 'missing_texts', 'changed_files'}
+    """
+    texts = texts or get_text_cache()
+    log = log or _quiet
+    stored = {record.get('source_file'): record for record in at_data}
+    new_data, reparsed, missing, changed = [], [], [], []
+    for filename in list(dict.fromkeys(list(stored) + list(text_keys))):
+        text = texts.get(text_keys[filename]) if filename in text_keys else None
+        if text is None:
+            if filename in stored:
+                new_data.append(stored[filename])
+                missing.append(filename)
+            continue
+        record = parse_at_transcript(text, log=log)
+        if not record:
+            continue
+        record['owner'] = TPSParser.extract_owner_from_filename(filename) or 'Unknown'
+        record['source_file'] = filename
+        if record != stored.get(filename):
+            changed.append(filename)
+        new_data.append(record)
+        reparsed.append(filename)
+    alerts = ATColumns.from_records(new_data).alerts()
+    return {'at_data': new_data, 'at_alerts': alerts, 'reparsed_files': reparsed,
+            'missing_texts': missing, 'changed_files': changed}
+
+
+def compare_wi(old: Dict, new: Dict) -> Dict:
+    """Forms and per-year totals that differ between two wi_data dicts"""
+    old_forms = {}
+    for year, forms in old.items():
+        for form in forms:
+            old_forms.setdefault((year,) + _form_key(form), []).append(form)
+    new_forms = {}
+    for year, forms in new.items():
+        for form in forms:
+            new_forms.setdefault((year,) + _form_key(form), []).append(form)
+
+    form_changes = []
+    for key in dict.fromkeys(list(old_forms) + list(new_forms)):
+        before, after = old_forms.get(key, []), new_forms.get(key, [])
+        for i in range(max(len(before), len(after))):
+            a = before[i] if i < len(before) else None
+            b = after[i] if i < len(after) else None
+            if a is not None and b is not None and _values(a) == _values(b):
+                continue
+            form_changes.append({
+                'tax_year': key[0], 'source_file': key[1], 'form': key[2], 'unique_id': key[3], 'label': key[4],
+                'change': 'added' if a is None else 'removed' if b is None else 'changed',
+                'old_income': a.get('Income') if a else None, 'new_income': b.get('Income') if b else None,
+                'old_withholding': a.get('Withholding') if a else None,
+                'new_withholding': b.get('Withholding') if b else None,
+            })
+
+    old_cube, new_cube = WICube.from_wi_data(old), WICube.from_wi_data(new)
+    totals = []
+    for year in sorted(set(old) | set(new)):
+        row = {
+            'tax_year': year,
+            'old_income': old_cube.year_total(year, 'income'), 'new_income': new_cube.year_total(year, 'income'),
+            'old_withholding': old_cube.year_total(year, 'withholding'),
+            'new_withholding': new_cube.year_total(year, 'withholding'),
+        }
+        if row['old_income'] != row['new_income'] or row['old_withholding'] != row['new_withholding']:
+            totals.append(row)
+    return {'form_changes': form_changes, 'total_changes': totals}
+
+
+def reparse_case(stored: Dict, bundle: Optional[PatternBundle] = None, filing_status: Optional[str] = None,
+                 texts: Optional[TextCache] = None, force: bool = False, log: Optional[logging.Logger] = None) -> Dict:
+    """
+    Re-parse a stored case (CaseStore.load_case result) against the current patterns
+
+    Args:
+        stored: Stored case
+        bundle: Pattern bundle (default: the current full_form_patterns)
+        filing_status: Override the filing status stored with the case
+        force: Re-extract every form / transcript, not only the changed ones
+
+    Returns:
+        Dict with the new wi_data, wi_summary, wi_projection, wi_duplicates,
+        at_data and at_alerts, the hashes to store with them, and a report:
+        changed_forms, form_changes, total_changes, at_changed_files,
+        reparsed_files and missing_texts
+    """
+    bundle = bundle or get_pattern_bundle()
+    text_keys = stored.get('text_keys') or {}
+    filing_status = filing_status or stored.get('wi_filing_status') or 'Single'
+    changed_forms = list(bundle.forms) if force else bundle.changed_forms(stored.get('form_hashes'))
+
+    wi = reparse_wi(stored.get('wi_data') or {}, text_keys.get('WI', {}), bundle, changed_forms,
+                    filing_status=filing_status, texts=texts, log=log)
+    # Re-extracted forms come back from every file they are in
+    deduped = dedupe_wi_data(wi['wi_data'])
+    wi['wi_data'] = deduped['wi_data']
+    comparison = compare_wi(stored.get('wi_data') or {}, wi['wi_data'])
+    cube = WICube.from_wi_data(wi['wi_data'])
+
+    result = {
+        'wi_data': wi['wi_data'],
+        'wi_summary': cube.summary_rows(),
+        'wi_projection': cube.projection_rows(),
+        'wi_duplicates': deduped['duplicates'],
+        'at_data': stored.get('at_data') or [],
+        'at_alerts': stored.get('at_alerts') or [],
+        'pattern_hash': bundle.hash,
+        'form_hashes': bundle.form_hashes(),
+        'at_pattern_hash': stored.get('at_pattern_hash'),
+        'wi_filing_status': filing_status,
+        'changed_forms': changed_forms,
+        'form_changes': comparison['form_changes'],
+        'total_changes': comparison['total_changes'],
+        'at_changed_files': [],
+        'reparsed_files': {'WI': wi['reparsed_files'], 'AT': []},
+        'missing_texts': {'WI': wi['missing_texts'], 'AT': []},
+    }
+    if force or stored.get('at_pattern_hash') != at_pattern_hash():
+        at = reparse_at(result['at_data'], text_keys.get('AT', {}), texts=texts, log=log)
+        result.update({'at_data': at['at_data'], 'at_alerts': at['at_alerts'], 'at_pattern_hash': at_pattern_hash(),
+                       'at_changed_files': at['changed_files']})
+        result['reparsed_files']['AT'] = at['reparsed_files']
+        result['missing_texts']['AT'] = at['missing_texts']
+    return result
+
+
+def save_reparsed(store: CaseStore, case_id: str, stored: Dict, result: Dict) -> None:
+    """Replace a stored case with its re-parsed results"""
+    store.save_case(
+        case_id,
+        wi_data=result['wi_data'], at_data=result['at_data'], wi_summary=result['wi_summary'],
+        wi_projection=result['wi_projection'], at_alerts=result['at_alerts'],
+        wi_form_matching=stored.get('wi_form_matching'), pattern_hash=result['pattern_hash'],
+        form_hashes=result['form_hashes'], at_pattern_hash=result['at_pattern_hash'],
+        wi_filing_status=result['wi_filing_status'], text_keys=stored.get('text_keys')
+    )
+
+
+def reparse_store(store: Optional[CaseStore] = None, bundle: Optional[PatternBundle] = None,
+                  save: bool = False, texts: Optional[TextCache] = None) -> Dict[str, Dict]:
+    """Re-parse every stored case parsed with other patterns; returns case_id -> reparse_case result"""
+    store = store or get_case_store()
+    bundle = bundle or get_pattern_bundle()
+    results = {}
+    for case_id in store.cases_parsed_with_other_patterns(bundle.hash, at_pattern_hash()):
+        stored = store.load_case(case_id)
+        result = reparse_case(stored, bundle, texts=texts)
+        if save:
+            save_reparsed(store, case_id, stored, result)
+        results[case_id] = result
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    save = '--save' in sys.argv[1:]
+    for case_id, result in reparse_store(save=save).items():
+        missing = sum(len(files) for files in result['missing_texts'].values())
+        logger.info(f"Case {case_id}: {len(result['changed_forms'])} changed patterns, "
+                    f"{len(result['form_changes'])} form changes, {len(result['at_changed_files'])} AT files changed"
+                    f"{f', {missing} texts not cached' if missing else ''}")
+        for row in result['total_changes']:
+            logger.info(f"  {row['tax_year']}: income {row['old_income']:,.2f} -> {row['new_income']:,.2f}, "
+                        f"withholding {row['old_withholding']:,.2f} -> {row['new_withholding']:,.2f}")
@@ -0,0 +1,94 @@
+"""
+Per-run, context-local log capture
+A single handler on the module logger routes records to the RunLog of the
+current context (thread/task), so concurrent Streamlit sessions never see
+each other's lines, and each RunLog is a bounded ring buffer so memory stays
+flat regardless of case size
+"""
+
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from utils.text_cache import get_text_cache
+
+DEFAULT_MAX_LINES = 20000
+DEFAULT_MAX_LINE_CHARS = 4000
+
+_current_run: ContextVar[Optional["RunLog"]] = ContextVar("tiparser_run_log", default=None)
+
+
+class RunLog:
+    """Bounded ring buffer of formatted log lines for one processing run"""
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES, max_line_chars: int = DEFAULT_MAX_LINE_CHARS):
+        self.max_line_chars = max_line_chars
+        self.lines = deque(maxlen=max_lines)
+        self.dropped = 0
+
+    def append(self, line: str) -> None:
+        if len(line) > self.max_line_chars:
+            line = line[:self.max_line_chars] + f"... [truncated {len(line) - self.max_line_chars} chars]"
+        if len(self.lines) == self.lines.maxlen:
+            self.dropped += 1
+        self.lines.append(line)
+
+    def getvalue(self) -> str:
+        """The captured log as text (like StringIO.getvalue)"""
+        header = f"[{self.dropped} earlier log lines dropped]\n" if self.dropped else ""
+        body = "\n".join(self.lines)
+        return header + body + ("\n" if body else "")
+
+
+class RunLogHandler(logging.Handler):
+    """Send records to the RunLog active in the current context, if any"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        run_log = _current_run.get()
+        if run_log is None:
+            return
+        try:
+            run_log.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+def install(logger: logging.Logger) -> None:
+    """Attach the shared RunLogHandler to a logger (idempotent)"""
+    if not any(isinstance(h, RunLogHandler) for h in logger.handlers):
+        handler = RunLogHandler()
+        handler.setLevel(logging.INFO)
+        logger.addHandler(handler)
+
+
+@contextmanager
+def capture_run_log(logger: logging.Logger, max_lines: int = DEFAULT_MAX_LINES) -> Iterator[RunLog]:
+    """
+    Capture everything `logger` emits in this context into a new RunLog
+
+    Usage:
+        with capture_run_log(logger) as run_log:
+            ...
+        st.session_state['wi_log'] = run_log.getvalue()
+    """
+    install(logger)
+    run_log = RunLog(max_lines=max_lines)
+    token = _current_run.set(run_log)
+    try:
+        yield run_log
+    finally:
+        _current_run.reset(token)
+
+
+def log_text_ref(logger: logging.Logger, label: str, text: str) -> str:
+    """
+    Log a reference to a document text instead of the text itself
+
+    The text is stored in the text cache and the log gets one line with
+    its key and size. Returns the cache key.
+    """
+    key = get_text_cache().put(text)
+    logger.info(f"{label}: [text ref {key}, {len(text)} chars, {text.count(chr(10)) + 1} lines]")
+    return key
@@ -0,0 +1,116 @@
+"""
+SFR scenario sweep
+Computes the full what-if grid of tax year x filing status x months late for
+a Substitute for Return in one batched call, so the projection page only
+slices precomputed arrays when a filing status or months-late input changes
+"""
+
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from utils.irs_accrual import (
+    FTF_MAX_MONTHS, FTF_MONTHLY_RATE, FTP_MAX_MONTHS, FTP_MONTHLY_RATE, MIN_PENALTY_DAYS,
+    add_months, due_date, get_interest_table, minimum_late_filing_penalty
+)
+from utils.tax_engine import sfr_base_tax
+from utils.tax_tables import FILING_STATUSES, normalize_filing_status
+
+MAX_MONTHS_LATE = 60
+
+# Measures shaped [year, status, months]; the base-tax measures do not depend
+# on months late and are broadcast along that axis
+MEASURES = [
+    'deduction', 'taxable_income', 'ss_tax', 'medicare_tax', 'se_tax', 'fed_tax',
+    'base_tax_owed', 'ftf_penalty', 'ftp_penalty', 'interest', 'total_owed'
+]
+
+
+class SFRScenarioGrid:
+    """Precomputed SFR projections for every year, filing status and months late"""
+
+    def __init__(self, years: List[int], statuses: List[str], months: np.ndarray, values: Dict[str, np.ndarray]):
+        self.years = years
+        self.statuses = statuses
+        self.months = months
+        self.values = values
+        self._year_row = {year: i for i, year in enumerate(years)}
+        self._month_col = {int(m): j for j, m in enumerate(months)}
+
+    def cell(self, year: int, status: str, months_late: int) -> Dict[str, float]:
+        """All measures for one scenario"""
+        i = self._year_row[int(year)]
+        s = self.statuses.index(normalize_filing_status(status))
+        m = self._month_col[int(months_late)]
+        return {k: float(v[i, s, m]) for k, v in self.values.items()}
+
+    def select(self, statuses: Sequence[str], months_late: Sequence[int]) -> Dict[str, np.ndarray]:
+        """One scenario per year (in grid order), picked with fancy indexing"""
+        rows = np.arange(len(self.years))
+        s = np.array([self.statuses.index(normalize_filing_status(status)) for status in statuses], dtype=int)
+        m = np.array([self._month_col[int(months)] for months in months_late], dtype=int)
+        return {k: v[rows, s, m] for k, v in self.values.items()}
+
+    def compare(self, year: int, measure: str = 'total_owed') -> np.ndarray:
+        """[status, months] slice of one measure for a year"""
+        return self.values[measure][self._year_row[int(year)]]
+
+
+def sfr_scenario_grid(years: Iterable[int], se_income: Iterable[float], nonse_income: Iterable[float],
+                      withholding: Iterable[float], statuses: Optional[List[str]] = None,
+                      months: Optional[Iterable[int]] = None, as_of: Optional[date] = None) -> SFRScenarioGrid:
+    """
+    Build the scenario grid for the given tax years
+
+    Args:
+        years: Tax year of each row
+        se_income, nonse_income, withholding: Per-year amounts (same order as years)
+        statuses: Filing statuses to sweep (default: all)
+        months: Months-late values to sweep (default: 0..MAX_MONTHS_LATE)
+        as_of: Date interest is accrued to (default today)
+
+    Penalties follow utils/irs_accrual.py: the SFR is assessed `months` after
+    the due date and the tax stays unpaid for that long, so FTF and FTP run
+    together (FTF net of FTP, max 5 months), with the minimum late-filing
+    penalty after 60 days. Interest compounds daily at the quarterly
+    underpayment rates on the tax and FTF penalty from the due date to as_of.
+
+    Returns:
+        SFRScenarioGrid with every measure shaped [year, status, months]
+    """
+    years = [int(y) for y in years]
+    as_of = as_of or date.today()
+    statuses = list(statuses or FILING_STATUSES)
+    months = np.arange(MAX_MONTHS_LATE + 1) if months is None else np.asarray(list(months), dtype=int)
+
+    year_col = np.asarray(years, dtype=int)[:, None]
+    base = sfr_base_tax(
+        year_col, np.asarray(statuses, dtype=object)[None, :],
+        np.asarray(list(se_income), dtype=float)[:, None], np.asarray(list(nonse_income), dtype=float)[:, None]
+    )
+    owed = base['se_tax'] + base['fed_tax'] - np.asarray(list(withholding), dtype=float)[:, None]
+
+    # Penalties and interest only apply to a positive balance
+    owed_3d = owed[:, :, None]
+    positive = owed_3d > 0
+    late = months[None, None, :]
+    ftp = np.where(positive, owed_3d * FTP_MONTHLY_RATE * np.minimum(late, FTP_MAX_MONTHS), 0.0)
+    ftf = np.where(positive, owed_3d * (FTF_MONTHLY_RATE - FTP_MONTHLY_RATE) * np.minimum(late, FTF_MAX_MONTHS), 0.0)
+    dues = [due_date(year) for year in years]
+    minimum = np.array([minimum_late_filing_penalty(year) for year in years])
+    past_minimum_days = np.array([[(add_months(due, int(m)) - due).days > MIN_PENALTY_DAYS for m in months] for due in dues])
+    floor = np.minimum(minimum[:, None, None], owed_3d)
+    ftf = np.where(positive & past_minimum_days[:, None, :], np.maximum(ftf, floor), ftf)
+    table = get_interest_table()
+    growth = np.array([table.growth(due, as_of) for due in dues])[:, None, None]
+    interest = np.where(positive, (owed_3d + ftf) * (growth - 1.0), 0.0)
+
+    shape = owed.shape + (len(months),)
+    values = {k: np.broadcast_to(v[:, :, None], shape) for k, v in base.items()}
+    values['base_tax_owed'] = np.broadcast_to(owed_3d, shape)
+    values['ftf_penalty'] = ftf
+    values['ftp_penalty'] = ftp
+    values['interest'] = interest
+    values['total_owed'] = owed_3d + ftf + ftp + interest
+    return SFRScenarioGrid(years, statuses, months, {k: values[k] for k in MEASURES})
@@ -0,0 +1,96 @@
+"""
+Vectorized federal tax engine
+Evaluates income tax, standard deductions and SE tax for whole arrays of
+(tax year, filing status, income) in one NumPy call, using the year-indexed
+tables in utils/tax_tables.py
+"""
+
+from typing import Dict
+
+import numpy as np
+
+from utils.tax_tables import (
+    FILING_STATUSES, TABLE_YEARS, SS_RATE, MEDICARE_RATE, SS_WAGE_BASE,
+    normalize_filing_status, rates_for, thresholds_for, standard_deduction_for
+)
+
+# Dense tables indexed [year, status, bracket] / [year, status] / [year]
+_FIRST_YEAR = TABLE_YEARS[0]
+_LOWER = np.array([
+    [[0] + thresholds_for(year, status) for status in FILING_STATUSES] for year in TABLE_YEARS
+], dtype=float)
+_UPPER = np.concatenate([_LOWER[:, :, 1:], np.full(_LOWER.shape[:2] + (1,), np.inf)], axis=2)
+_RATES = np.array([rates_for(year) for year in TABLE_YEARS], dtype=float)
+_STD_DEDUCTION = np.array([
+    [standard_deduction_for(year, status) for status in FILING_STATUSES] for year in TABLE_YEARS
+], dtype=float)
+_WAGE_BASE = np.array([SS_WAGE_BASE[year] for year in TABLE_YEARS], dtype=float)
+
+
+def year_index(years) -> np.ndarray:
+    """Row of each tax year in the dense tables (clamped to the covered range)"""
+    years = np.asarray(years, dtype=int)
+    return np.clip(years - _FIRST_YEAR, 0, len(TABLE_YEARS) - 1)
+
+
+def status_index(statuses) -> np.ndarray:
+    """Column of each filing status in the dense tables"""
+    statuses = np.asarray(statuses, dtype=object)
+    unique, inverse = np.unique(statuses, return_inverse=True)
+    columns = np.array([FILING_STATUSES.index(normalize_filing_status(s)) for s in unique], dtype=int)
+    return columns[inverse].reshape(statuses.shape)
+
+
+def income_tax(years, statuses, taxable_income) -> np.ndarray:
+    """
+    Federal income tax on taxable income, elementwise over broadcast arrays
+
+    Example:
+        income_tax([2019, 2020], "Single", [50000, 50000])
+    """
+    y, s, income = np.broadcast_arrays(year_index(years), status_index(statuses), np.asarray(taxable_income, dtype=float))
+    lower = _LOWER[y, s]
+    width = _UPPER[y, s] - lower
+    in_bracket = np.clip(income[..., None] - lower, 0, width)
+    return (in_bracket * _RATES[y]).sum(axis=-1)
+
+
+def standard_deduction(years, statuses) -> np.ndarray:
+    y, s = np.broadcast_arrays(year_index(years), status_index(statuses))
+    return _STD_DEDUCTION[y, s]
+
+
+def ss_wage_base(years) -> np.ndarray:
+    return _WAGE_BASE[year_index(years)]
+
+
+def se_tax(years, se_income) -> Dict[str, np.ndarray]:
+    """Social Security (up to the year's wage base) and Medicare tax on SE income"""
+    se_income = np.asarray(se_income, dtype=float)
+    ss = np.minimum(se_income, ss_wage_base(years)) * SS_RATE
+    medicare = se_income * MEDICARE_RATE
+    return {'ss_tax': ss, 'medicare_tax': medicare, 'se_tax': ss + medicare}
+
+
+def sfr_base_tax(years, statuses, se_income, nonse_income) -> Dict[str, np.ndarray]:
+    """
+    Tax the IRS would compute on a substitute return: standard deduction only,
+    no credits. All arguments broadcast against each other.
+
+    Returns:
+        Dict of arrays: deduction, taxable_income, fed_tax, ss_tax,
+        medicare_tax, se_tax
+    """
+    years, statuses, se_income, nonse_income = np.broadcast_arrays(
+        np.asarray(years, dtype=int), np.asarray(statuses, dtype=object),
+        np.asarray(se_income, dtype=float), np.asarray(nonse_income, dtype=float)
+    )
+    deduction = standard_deduction(years, statuses)
+    taxable = np.maximum(0, se_income + nonse_income - deduction)
+    result = {
+        'deduction': deduction,
+        'taxable_income': taxable,
+        'fed_tax': income_tax(years, statuses, taxable),
+    }
+    result.update(se_tax(years, se_income))
+    return result
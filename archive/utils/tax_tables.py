@@ -0,0 +1,174 @@
+"""
+Federal income tax tables by tax year and filing status
+Bracket thresholds, standard deductions and Social Security wage bases used
+by the projection and summary pages (see utils/tax_engine.py)
+"""
+
+from typing import Dict, List
+
+FILING_STATUSES = [
+    "Single", "Married Filing Jointly", "Married Filing Separately", "Head of Household", "Qualifying Widow(er)"
+]
+
+# Other spellings seen on transcripts and in older code
+FILING_STATUS_ALIASES = {
+    "single": "Single",
+    "married filing joint": "Married Filing Jointly",
+    "married filing jointly": "Married Filing Jointly",
+    "mfj": "Married Filing Jointly",
+    "married filing separate": "Married Filing Separately",
+    "married filing separately": "Married Filing Separately",
+    "mfs": "Married Filing Separately",
+    "head of household": "Head of Household",
+    "hoh": "Head of Household",
+    "qualifying widow(er)": "Qualifying Widow(er)",
+    "qualifying widow": "Qualifying Widow(er)",
+    "qualifying surviving spouse": "Qualifying Widow(er)",
+}
+
+# Marginal rates by bracket (7 brackets in every covered year)
+RATES_PRE_2018 = [0.10, 0.15, 0.25, 0.28, 0.33, 0.35, 0.396]
+RATES_TCJA = [0.10, 0.12, 0.22, 0.24, 0.32, 0.35, 0.37]
+
+# Upper bounds of the first six brackets: {year: {status: [...]}}.
+# Qualifying Widow(er) uses the joint thresholds.
+BRACKET_THRESHOLDS: Dict[int, Dict[str, List[int]]] = {
+    2015: {
+        "Single": [9225, 37450, 90750, 189300, 411500, 413200],
+        "Married Filing Jointly": [18450, 74900, 151200, 230450, 411500, 464850],
+        "Married Filing Separately": [9225, 37450, 75600, 115225, 205750, 232425],
+        "Head of Household": [13150, 50200, 129600, 209850, 411500, 439000],
+    },
+    2016: {
+        "Single": [9275, 37650, 91150, 190150, 413350, 415050],
+        "Married Filing Jointly": [18550, 75300, 151900, 231450, 413350, 466950],
+        "Married Filing Separately": [9275, 37650, 75950, 115725, 206675, 233475],
+        "Head of Household": [13250, 50400, 130150, 210800, 413350, 441000],
+    },
+    2017: {
+        "Single": [9325, 37950, 91900, 191650, 416700, 418400],
+        "Married Filing Jointly": [18650, 75900, 153100, 233350, 416700, 470700],
+        "Married Filing Separately": [9325, 37950, 76550, 116675, 208350, 235350],
+        "Head of Household": [13350, 50800, 131200, 212500, 416700, 444550],
+    },
+    2018: {
+        "Single": [9525, 38700, 82500, 157500, 200000, 500000],
+        "Married Filing Jointly": [19050, 77400, 165000, 315000, 400000, 600000],
+        "Married Filing Separately": [9525, 38700, 82500, 157500, 200000, 300000],
+        "Head of Household": [13600, 51800, 82500, 157500, 200000, 500000],
+    },
+    2019: {
+        "Single": [9700, 39475, 84200, 160725, 204100, 510300],
+        "Married Filing Jointly": [19400, 78950, 168400, 321450, 408200, 612350],
+        "Married Filing Separately": [9700, 39475, 84200, 160725, 204100, 306175],
+        "Head of Household": [13850, 52850, 84200, 160700, 204100, 510300],
+    },
+    2020: {
+        "Single": [9875, 40125, 85525, 163300, 207350, 518400],
+        "Married Filing Jointly": [19750, 80250, 171050, 326600, 414700, 622050],
+        "Married Filing Separately": [9875, 40125, 85525, 163300, 207350, 311025],
+        "Head of Household": [14100, 53700, 85500, 163300, 207350, 518400],
+    },
+    2021: {
+        "Single": [9950, 40525, 86375, 164925, 209425, 523600],
+        "Married Filing Jointly": [19900, 81050, 172750, 329850, 418850, 628300],
+        "Married Filing Separately": [9950, 40525, 86375, 164925, 209425, 314150],
+        "Head of Household": [14200, 54200, 86350, 164900, 209400, 523600],
+    },
+    2022: {
+        "Single": [10275, 41775, 89075, 170050, 215950, 539900],
+        "Married Filing Jointly": [20550, 83550, 178150, 340100, 431900, 647850],
+        "Married Filing Separately": [10275, 41775, 89075, 170050, 215950, 323925],
+        "Head of Household": [14650, 55900, 89050, 170050, 215950, 539900],
+    },
+    2023: {
+        "Single": [11000, 44725, 95375, 182100, 231250, 578125],
+        "Married Filing Jointly": [22000, 89450, 190750, 364200, 462500, 693750],
+        "Married Filing Separately": [11000, 44725, 95375, 182100, 231250, 346875],
+        "Head of Household": [15700, 59850, 95350, 182100, 231250, 578100],
+    },
+    2024: {
+        "Single": [11600, 47150, 100525, 191950, 243725, 609350],
+        "Married Filing Jointly": [23200, 94300, 201050, 383900, 487450, 731200],
+        "Married Filing Separately": [11600, 47150, 100525, 191950, 243725, 365600],
+        "Head of Household": [16550, 63100, 100500, 191950, 243700, 609350],
+    },
+    2025: {
+        "Single": [11925, 48475, 103350, 197300, 250525, 626350],
+        "Married Filing Jointly": [23850, 96950, 206700, 394600, 501050, 751600],
+        "Married Filing Separately": [11925, 48475, 103350, 197300, 250525, 375800],
+        "Head of Household": [17000, 64850, 103350, 197300, 250500, 626350],
+    },
+}
+
+# Standard deduction: {year: (Single/MFS, Joint/QW, Head of Household)}
+STANDARD_DEDUCTIONS = {
+    2015: (6300, 12600, 9250),
+    2016: (6300, 12600, 9300),
+    2017: (6350, 12700, 9350),
+    2018: (12000, 24000, 18000),
+    2019: (12200, 24400, 18350),
+    2020: (12400, 24800, 18650),
+    2021: (12550, 25100, 18800),
+    2022: (12950, 25900, 19400),
+    2023: (13850, 27700, 20800),
+    2024: (14600, 29200, 21900),
+    2025: (15750, 31500, 23625),
+}
+
+# Social Security wage base (maximum earnings subject to the 12.4% SS tax)
+SS_WAGE_BASE = {
+    2015: 118500,
+    2016: 118500,
+    2017: 127200,
+    2018: 128400,
+    2019: 132900,
+    2020: 137700,
+    2021: 142800,
+    2022: 147000,
+    2023: 160200,
+    2024: 168600,
+    2025: 176100,
+}
+
+SS_RATE = 0.124
+MEDICARE_RATE = 0.029
+
+TABLE_YEARS = sorted(BRACKET_THRESHOLDS)
+
+
+def normalize_filing_status(status: str) -> str:
+    """Map a filing status as written anywhere in the app to FILING_STATUSES (default Single)"""
+    if status in FILING_STATUSES:
+        return status
+    return FILING_STATUS_ALIASES.get(str(status or '').strip().lower(), "Single")
+
+
+def table_year(year) -> int:
+    """Closest year covered by the tables (years outside the range are clamped)"""
+    try:
+        year = int(year)
+    except (TypeError, ValueError):
+        return TABLE_YEARS[-1]
+    return min(max(year, TABLE_YEARS[0]), TABLE_YEARS[-1])
+
+
+def rates_for(year: int) -> List[float]:
+    return RATES_PRE_2018 if year < 2018 else RATES_TCJA
+
+
+def thresholds_for(year: int, status: str) -> List[int]:
+    status = normalize_filing_status(status)
+    if status == "Qualifying Widow(er)":
+        status = "Married Filing Jointly"
+    return BRACKET_THRESHOLDS[table_year(year)][status]
+
+
+def standard_deduction_for(year: int, status: str) -> int:
+    single, joint, head = STANDARD_DEDUCTIONS[table_year(year)]
+    status = normalize_filing_status(status)
+    if status in ("Married Filing Jointly", "Qualifying Widow(er)"):
+        return joint
+    if status == "Head of Household":
+        return head
+    return single
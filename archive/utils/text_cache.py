@@ -0,0 +1,233 @@
+"""
+Content-addressed cache for extracted document text
+Text is stored once on disk under its SHA-256 and referenced by key, so logs
+and session state can carry a short reference instead of a full copy
+
+Transcript texts carry SSNs in plain text, so the cache does not keep them
+forever: a text (with its normalized sidecars) is removed once it has not
+been read or written for the retention period (TIPARSER_TEXT_CACHE_DAYS,
+default 30), and the least recently used texts go first when the cache is
+over its size limit (TIPARSER_TEXT_CACHE_MB, default 500). Stored cases
+whose texts were removed keep their results; re-parsing them needs the PDFs
+again. Sweep or empty the cache by hand:
+    python -m utils.text_cache [--purge]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.environ.get("TIPARSER_TEXT_CACHE", ".text_cache")
+DEFAULT_TEXT_TTL = int(os.environ.get("TIPARSER_TEXT_CACHE_DAYS", "30")) * 86400
+DEFAULT_MAX_BYTES = int(os.environ.get("TIPARSER_TEXT_CACHE_MB", "500")) * 1024 * 1024
+
+# How often (seconds) put() sweeps expired texts
+CLEANUP_INTERVAL = 600
+
+
+def text_key(text: str) -> str:
+    """Cache key (SHA-256 hex digest) for a text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class TextCache:
+    """Disk-backed text store with a small in-memory LRU in front of it"""
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, memory_items: int = 32,
+                 ttl_seconds: int = DEFAULT_TEXT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.memory_items = memory_items
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.txt")
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        """Mark a text as used (its mtime is the last use the sweep goes by)"""
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def put(self, text: str) -> str:
+        """Store a text (no-op if already cached) and return its key"""
+        key = text_key(text)
+        path = self._path(key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file first so readers never see a partial text
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        else:
+            self._touch(path)
+        self._remember(key, text)
+        self._maybe_cleanup()
+        return key
+
+    def get(self, key: str) -> Optional[str]:
+        """Load a cached text by key, or None if it is not cached"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        # newline="": line breaks come back exactly as stored (offsets and keys depend on them)
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            text = f.read()
+        self._touch(path)
+        self._remember(key, text)
+        return text
+
+    def normalized(self, key: str):
+        """
+        Normalized text (parsers.text_normalize.NormalizedText) of a cached text, or None if not cached
+
+        Normalization runs once per text and normalizer version; the result,
+        its offset map and the boilerplate spans dropped before it are stored
+        next to the text.
+        """
+        from parsers.text_normalize import NORMALIZE_VERSION, NormalizedText, normalize_text, strip_boilerplate
+        memory_key = f"{key}:norm{NORMALIZE_VERSION}"
+        with self._lock:
+            if memory_key in self._memory:
+                self._memory.move_to_end(memory_key)
+                return self._memory[memory_key]
+        text = self.get(key)
+        if text is None:
+            return None
+        path = self._path(key)[:-len(".txt")] + f".norm{NORMALIZE_VERSION}.json"
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            removed = data.get('removed')
+            source = strip_boilerplate(text, removed) if removed else text
+            normalized = NormalizedText(data['text'], source, data['anchors'])
+        else:
+            normalized = normalize_text(text)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({'text': str(normalized), 'anchors': normalized.anchors,
+                           'removed': getattr(normalized.source, 'removed', [])}, f)
+            os.replace(tmp_path, path)
+        self._remember(memory_key, normalized)
+        return normalized
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def _remember(self, key: str, text: str) -> None:
+        with self._lock:
+            self._memory[key] = text
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _entries(self):
+        """(last use, bytes, [files]) of every cached text, its sidecars included"""
+        entries = {}
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(".tmp"):
+                    continue  # a put() in progress
+                key = filename.split(".", 1)[0]
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entry = entries.setdefault(key, [0.0, 0, []])
+                if filename == f"{key}.txt":
+                    entry[0] = stat.st_mtime
+                entry[1] += stat.st_size
+                entry[2].append(path)
+        return sorted(entries.items(), key=lambda item: item[1][0])
+
+    def _remove(self, key: str, paths) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            for memory_key in [k for k in self._memory if k.split(":", 1)[0] == key]:
+                del self._memory[memory_key]
+
+    def _maybe_cleanup(self) -> None:
+        now = time.time()
+        if now - self._last_cleanup < CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = now
+        self.cleanup(now)
+
+    def cleanup(self, now: Optional[float] = None) -> int:
+        """
+        Remove texts unused for longer than the TTL, then the least recently
+        used ones while the cache is over max_bytes; returns how many were removed
+        """
+        now = now or time.time()
+        entries = self._entries()
+        total = sum(size for _, (_, size, _) in entries)
+        removed = 0
+        for key, (last_used, size, paths) in entries:
+            if now - last_used <= self.ttl_seconds and total <= self.max_bytes:
+                break
+            self._remove(key, paths)
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"Removed {removed} cached texts (retention {self.ttl_seconds // 86400} days)")
+        return removed
+
+    def purge(self) -> int:
+        """Remove every cached text; returns how many were removed"""
+        entries = self._entries()
+        for key, (_, _, paths) in entries:
+            self._remove(key, paths)
+        return len(entries)
+
+
+_default_cache = None
+
+
+def get_text_cache() -> TextCache:
+    """Shared TextCache for the default cache directory"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TextCache()
+    return _default_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=DEFAULT_CACHE_DIR, help="Cache directory")
+    parser.add_argument("--purge", action="store_true", help="Remove every cached text")
+    args = parser.parse_args()
+
+    cache = TextCache(args.root)
+    if args.purge:
+        print(f"Purged {cache.purge()} cached texts from {args.root}")
+    else:
+        print(f"Removed {cache.cleanup()} expired cached texts from {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -86,53 +86,8 @@ class TPSParser:
         Returns:
             Dictionary with totals by owner type
         """
-        totals = {}
-        
-        for year, forms in wi_data.items():
-            year_totals = {
-                'taxpayer': {'income': 0, 'withholding': 0, 'se_income': 0, 'non_se_income': 0},
-                'spouse': {'income': 0, 'withholding': 0, 'se_income': 0, 'non_se_income': 0},
-                'joint': {'income': 0, 'withholding': 0, 'se_income': 0, 'non_se_income': 0},
-                'combined': {'income': 0, 'withholding': 0, 'se_income': 0, 'non_se_income': 0}
-            }
-            
-            for form in forms:
-                owner = form.get('Owner')
-                income = float(form.get('Income', 0))
-                withholding = float(form.get('Withholding', 0))
-                category = form.get('Category', '')
-                
-                # Determine which bucket to add to
-                if owner == 'TP':
-                    bucket = 'taxpayer'
-                elif owner == 'S':
-                    bucket = 'spouse'
-                elif owner is None:
-                    bucket = 'joint'
-                else:
-                    bucket = 'taxpayer'  # Default fallback
-                
-                # Add to appropriate bucket
-                year_totals[bucket]['income'] += income
-                year_totals[bucket]['withholding'] += withholding
-                
-                # Categorize income type
-                if category == 'SE':
-                    year_totals[bucket]['se_income'] += income
-                elif category == 'Non-SE':
-                    year_totals[bucket]['non_se_income'] += income
-                
-                # Always add to combined totals
-                year_totals['combined']['income'] += income
-                year_totals['combined']['withholding'] += withholding
-                if category == 'SE':
-                    year_totals['combined']['se_income'] += income
-                elif category == 'Non-SE':
-                    year_totals['combined']['non_se_income'] += income
-            
-            totals[year] = year_totals
-        
-        return totals
+        from utils.wi_cube import WICube
+        return WICube.from_wi_data(wi_data).owner_totals_by_year()
     
     @staticmethod
     def detect_missing_spouse_data(totals: Dict, filing_status: str) -> List[str]:
@@ -0,0 +1,120 @@
+"""
+Aggregation cube for Wage & Income results
+Sums every WI form once into a dense year x owner x category x measure array,
+so the summary tables, owner breakdowns, projection rows and comparison values
+are all slices of the same totals
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from utils.money import to_cents, to_dollars
+
+# Owner buckets as reported by TPSParser.aggregate_income_by_owner
+OWNERS = ['taxpayer', 'spouse', 'joint']
+OWNER_BUCKETS = {'TP': 'taxpayer', 'S': 'spouse', None: 'joint'}  # anything else -> taxpayer
+
+CATEGORIES = ['SE', 'Non-SE', 'Neither']
+
+# Money measures are int64 cents; 'forms' is a count
+MEASURES = ['income', 'withholding', 'forms']
+
+
+class WICube:
+    """WI totals as a [year, owner, category, measure] array"""
+
+    def __init__(self, years: List, values: np.ndarray):
+        self.years = years
+        self.values = values
+        self._year_index = {year: i for i, year in enumerate(years)}
+
+    @classmethod
+    def from_wi_data(cls, wi_data: Dict) -> "WICube":
+        """Build the cube from `wi_data` ({year: [form dicts]}) in one pass over the forms"""
+        years = list(wi_data)
+        rows, owners, categories, income, withholding = [], [], [], [], []
+        for y, year in enumerate(years):
+            for form in wi_data[year]:
+                rows.append(y)
+                owners.append(OWNERS.index(OWNER_BUCKETS.get(form.get('Owner'), 'taxpayer')))
+                category = form.get('Category', 'Neither')
+                # Forms with a category outside CATEGORIES count as 'Neither'
+                categories.append(CATEGORIES.index(category) if category in CATEGORIES else 2)
+                income.append(to_cents(form.get('Income')))
+                withholding.append(to_cents(form.get('Withholding')))
+
+        values = np.zeros((len(years), len(OWNERS), len(CATEGORIES), len(MEASURES)), dtype=np.int64)
+        index = (np.array(rows, dtype=np.intp), np.array(owners, dtype=np.intp), np.array(categories, dtype=np.intp))
+        np.add.at(values, index + (0,), np.array(income, dtype=np.int64))
+        np.add.at(values, index + (1,), np.array(withholding, dtype=np.int64))
+        np.add.at(values, index + (2,), 1)
+        return cls(years, values)
+
+    def _slice(self, years: Optional[Iterable] = None, owners: Optional[Iterable[str]] = None,
+               categories: Optional[Iterable[str]] = None) -> np.ndarray:
+        view = self.values
+        if years is not None:
+            view = view[[self._year_index[y] for y in years if y in self._year_index]]
+        if owners is not None:
+            view = view[:, [OWNERS.index(o) for o in owners]]
+        if categories is not None:
+            view = view[:, :, [CATEGORIES.index(c) for c in categories]]
+        return view
+
+    def total(self, measure: str = 'income', years: Optional[Iterable] = None,
+              owners: Optional[Iterable[str]] = None, categories: Optional[Iterable[str]] = None):
+        """Sum of one measure over the selected years/owners/categories (dollars, or a count for 'forms')"""
+        value = self._slice(years, owners, categories)[..., MEASURES.index(measure)].sum()
+        return int(value) if measure == 'forms' else to_dollars(value)
+
+    def year_total(self, year, measure: str = 'income', owners: Optional[Iterable[str]] = None,
+                   categories: Optional[Iterable[str]] = None):
+        return self.total(measure, [year], owners, categories)
+
+    def owner_totals(self, year) -> Dict[str, Dict[str, float]]:
+        """Owner breakdown for one year, same shape as aggregate_income_by_owner()[year]"""
+        totals = {}
+        if year not in self._year_index:
+            year_values = np.zeros(self.values.shape[1:], dtype=np.int64)
+        else:
+            year_values = self.values[self._year_index[year]]
+        se, non_se = CATEGORIES.index('SE'), CATEGORIES.index('Non-SE')
+        for name, owner_values in zip(OWNERS + ['combined'], list(year_values) + [year_values.sum(axis=0)]):
+            totals[name] = {
+                'income': to_dollars(owner_values[:, 0].sum()),
+                'withholding': to_dollars(owner_values[:, 1].sum()),
+                'se_income': to_dollars(owner_values[se, 0]),
+                'non_se_income': to_dollars(owner_values[non_se, 0]),
+            }
+        return totals
+
+    def owner_totals_by_year(self) -> Dict:
+        return {year: self.owner_totals(year) for year in self.years}
+
+    def summary_rows(self) -> List[Dict]:
+        """Rows for `wi_summary`, newest year first"""
+        rows = []
+        for year in sorted(self.years, reverse=True):
+            by_category = self.values[self._year_index[year]].sum(axis=0)
+            se, nonse, other = (by_category[c] for c in range(len(CATEGORIES)))
+            rows.append({
+                'Tax Year': str(year),
+                'Number of Forms': int(by_category[:, 2].sum()),
+                'SE Income': to_dollars(se[0]),
+                'SE Withholding': to_dollars(se[1]),
+                'Non-SE Income': to_dollars(nonse[0]),
+                'Non-SE Withholding': to_dollars(nonse[1]),
+                'Other Income': to_dollars(other[0]),
+                'Other Withholding': to_dollars(other[1]),
+                'Total Income': to_dollars(by_category[:, 0].sum()),
+                'Total Withholding': to_dollars(by_category[:, 1].sum())
+            })
+        return rows
+
+    def projection_rows(self) -> List[Dict]:
+        """Rows for `wi_projection` (tax projection inputs), newest year first"""
+        return [
+            {k: row[k] for k in ('Tax Year', 'SE Income', 'SE Withholding', 'Non-SE Income', 'Non-SE Withholding', 'Other Income')}
+            for row in self.summary_rows()
+        ]